@@ -50,11 +50,32 @@ export interface ReviewResponse {
     "Gap handling": string;
   }>;
   Questions?: string[];
+  Changes_Since_Prior?: string;  // present when changes_since_prior was requested
+  Resume_Variant?: string;  // resume library variant used as the baseline, if any
+  Revision?: number;  // this round's number in the revision history (see getRevision)
   error?: string;
 }
 
+// Compact redline returned when redline_format is "segments" or "offsets":
+// "=" unchanged, "-" deleted, "+" added; in "offsets" format "=" and "-" are [op, start, end] into the baseline
+export type RedlineSegment = ["=" | "-" | "+", string] | ["=" | "-", number, number];
+export interface RedlineSegments {
+  version: number;
+  format: "segments" | "offsets";
+  segments: RedlineSegment[];
+  baseline_sha256?: string;
+}
+
+export type SegmentReviewResponse = Omit<ReviewResponse, "Tailored_Resume"> & {
+  Tailored_Resume?: RedlineSegments;
+};
+
 export interface ResumeResponse {
   resume?: string;
+  name?: string;  // library variant loaded by manageResume({ name })
+  resumes?: { name: string; chars: number; updated_at: number }[];  // action "list"
+  current?: string | null;  // variant the session baseline came from
+  pinned?: boolean;  // baseline loaded explicitly; reviews do not switch variants until action "auto"
   error?: string;
 }
 
@@ -469,6 +490,156 @@ export async function postReview({
   );
 }
 
+// Same as postReview, but the redline comes back as typed segments (see parseRedlineSegments)
+export async function postReviewSegments({
+  jobDescription,
+  url,
+  offsets,
+}: { jobDescription: string; url: string; offsets?: boolean }): Promise<SegmentReviewResponse> {
+  return apiFetch<SegmentReviewResponse>("/review", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      job_description: jobDescription,
+      url,
+      redline_format: offsets ? "offsets" : "segments",
+    }),
+  }, { auth: true, timeoutMs: 150000, parse: "json" });
+}
+
+// --- Background review jobs: submit, then long-poll until finished ---
+export interface ReviewJob {
+  job_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  created_at: number;
+  finished_at: number | null;
+  result?: ReviewResponse;
+  error?: string;
+}
+
+// POST /jobs/review; returns immediately with the job id
+export async function submitReviewJob(
+  { jobDescription, url, demo }: { jobDescription: string; url: string; demo?: boolean },
+): Promise<ReviewJob> {
+  return apiFetch<ReviewJob>("/jobs/review", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ job_description: jobDescription, url, demo: !!demo }),
+  }, { auth: true, timeoutMs: 30000, parse: "json" });
+}
+
+// Long-poll GET /jobs/{id} until the job finishes; each request is short enough for proxies
+export async function waitForReviewJob(jobId: string, { waitSeconds = 25 } = {}): Promise<ReviewResponse> {
+  for (;;) {
+    const job = await apiFetch<ReviewJob>(
+      `/jobs/${encodeURIComponent(jobId)}?wait=${waitSeconds}`,
+      { method: "GET" },
+      { auth: true, timeoutMs: (waitSeconds + 10) * 1000, parse: "json" },
+    );
+    if (job.status === "done") return job.result as ReviewResponse;
+    if (job.status === "failed") throw new Error(job.error || "Review job failed");
+  }
+}
+
+// --- Batch screening: rank many listings by Fit, without tailored resumes ---
+export interface BatchListing {
+  job_description?: string;
+  url?: string;
+}
+
+export interface BatchReviewResponse {
+  results: { index: number; url: string | null; job_description: string; resume_variant?: string | null; Fit: ReviewResponse["Fit"]; Gap_Map: ReviewResponse["Gap_Map"] }[];
+  errors: { index: number; url: string | null; error: string }[];
+}
+
+// POST /review/batch; open a result with postReview to get its tailored resume
+export async function postReviewBatch({
+  listings,
+  demo,
+}: { listings: BatchListing[]; demo?: boolean }): Promise<BatchReviewResponse> {
+  return apiFetch<BatchReviewResponse>("/review/batch", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ listings, demo: !!demo }),
+  }, { auth: true, timeoutMs: 300000, parse: "json" });
+}
+
+// POST /review/preassess: local keyword Fit/Gap_Map in milliseconds, before the LLM review
+export async function postPreassess({
+  jobDescription,
+  url,
+  demo,
+}: { jobDescription: string; url: string; demo?: boolean }): Promise<Pick<ReviewResponse, "Fit" | "Gap_Map">> {
+  return apiFetch<Pick<ReviewResponse, "Fit" | "Gap_Map">>("/review/preassess", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ job_description: jobDescription, url, demo: !!demo }),
+  }, { auth: true, timeoutMs: 15000, parse: "json" });
+}
+
+// --- Streaming review (Server-Sent Events over fetch) ---
+// Preliminary (local keyword Fit/Gap_Map) arrives first and is replaced by the LLM's sections
+export type ReviewSection = "Preliminary" | "Fit" | "Gap_Map" | "Questions" | "Tailored_Resume" | "Changes_Since_Prior";
+
+export interface ReviewStreamHandlers {
+  onSection?: (section: ReviewSection, value: any) => void;
+  onToken?: (delta: string) => void;
+}
+
+// POST /review/stream and call handlers as each event arrives; resolves with the assembled review
+export async function streamReview(
+  { jobDescription, url, demo, redlineFormat, changesSincePrior }: {
+    jobDescription: string; url: string; demo?: boolean;
+    redlineFormat?: "html" | "segments" | "offsets"; changesSincePrior?: boolean;
+  },
+  { onSection, onToken }: ReviewStreamHandlers = {},
+): Promise<ReviewResponse> {
+  const res = await apiFetch<Response>("/review/stream", {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify({
+      job_description: jobDescription, url, demo: !!demo,
+      redline_format: redlineFormat ?? "html", changes_since_prior: !!changesSincePrior,
+    }),
+  }, { auth: true, timeoutMs: 150000, parse: "raw" });
+  if (!res.body) throw new Error("Streaming not supported by this browser");
+
+  const review: ReviewResponse = {};
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    // events are separated by a blank line
+    let end: number;
+    while ((end = buffer.indexOf("\n\n")) >= 0) {
+      const raw = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : null;
+      if (event === "token") {
+        onToken?.(payload);
+      } else if (event === "error") {
+        throw new Error(payload?.detail || "Review stream failed");
+      } else if (event === "Preliminary") {
+        onSection?.(event, payload);
+      } else if (event === "Fit" || event === "Gap_Map" || event === "Questions" || event === "Tailored_Resume"
+                 || event === "Changes_Since_Prior") {
+        (review as any)[event] = payload;
+        onSection?.(event, payload);
+      }
+    }
+  }
+  return review;
+}
+
 export async function postQuestions({
   qa_pairs,
   demo,
@@ -558,13 +729,13 @@ export function getJobDescription({ url, demo }: { url: string; demo?: boolean }
       method: "POST",
       headers: { "Content-Type": "application/json", Accept: "application/json" },
       body: JSON.stringify({ url, demo: !!demo }),
-    }, { auth: false, timeoutMs: 30000, parse: "json" }),
+    }, { auth: !demo, timeoutMs: 30000, parse: "json" }),
     {
       retries: 1,
       delayMs: 2000,
       shouldRetry: (e) => {
         const msg = String((e as Error)?.message || "");
-        // Retry most network-ish failures; job description is public/unauth
+        // Retry most network-ish failures, but not auth failures
         return !(msg.includes("401") || msg.includes("403"));
       }
     }
@@ -572,9 +743,10 @@ export function getJobDescription({ url, demo }: { url: string; demo?: boolean }
 }
 
 export function manageResume(
-  { action = "load", demo = false }: { action?: string; demo?: boolean } = {}
+  { action = "load", demo = false, name }: { action?: string; demo?: boolean; name?: string } = {}
 ): Promise<ResumeResponse> {
   const qs = new URLSearchParams({ command: action, demo: String(!!demo) });
+  if (name) qs.set("name", name);
   return withRetry(
     () => apiFetch<ResumeResponse>(`/resume?${qs.toString()}`, {
       method: "GET",
@@ -590,3 +762,52 @@ export function manageResume(
     }
   );
 }
+
+// --- Resume library: named variants; reviews use the one closest to each job description ---
+// PUT /resume/library/{name}
+export async function saveResumeVariant(name: string, resume: string): Promise<{ saved: string }> {
+  return apiFetch<{ saved: string }>(`/resume/library/${encodeURIComponent(name)}`, {
+    method: "PUT",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ resume }),
+  }, { auth: true, timeoutMs: 30000, parse: "json" });
+}
+
+// DELETE /resume/library/{name}
+export async function deleteResumeVariant(name: string): Promise<{ deleted: string }> {
+  return apiFetch<{ deleted: string }>(`/resume/library/${encodeURIComponent(name)}`, {
+    method: "DELETE",
+  }, { auth: true, timeoutMs: 30000, parse: "json" });
+}
+
+// --- Revision history: every review round, to compare rounds ---
+export interface RevisionSummary {
+  number: number;
+  created_at: number;
+  chars: number;
+  stored_bytes: number;
+  snapshot: boolean;
+}
+export interface Revision {
+  number: number;
+  created_at: number;
+  job_description: string;
+  llm_response: ReviewResponse;
+  tailored_resume: string;
+  Changes?: string;  // present when compareTo was given
+}
+
+// GET /revisions
+export async function listRevisions(): Promise<{ revisions: RevisionSummary[] }> {
+  return apiFetch<{ revisions: RevisionSummary[] }>("/revisions", {
+    method: "GET",
+  }, { auth: true, timeoutMs: 30000, parse: "json" });
+}
+
+// GET /revisions/{number}
+export async function getRevision(number: number, { compareTo }: { compareTo?: number } = {}): Promise<Revision> {
+  const qs = compareTo != null ? `?compare_to=${compareTo}` : "";
+  return apiFetch<Revision>(`/revisions/${number}${qs}`, {
+    method: "GET",
+  }, { auth: true, timeoutMs: 30000, parse: "json" });
+}
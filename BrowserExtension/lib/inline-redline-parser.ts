@@ -85,6 +85,52 @@ export function parseInlineChanges(markdown: string): { processedMarkdown: strin
   return { processedMarkdown, changes }
 }
 
+// Build the same placeholders and changes as parseInlineChanges from typed redline
+// segments (redline_format "segments"/"offsets"), without any regex parsing.
+// "offsets" segments need the baseline resume they point into.
+export function parseRedlineSegments(
+  redline: { segments: Array<[string, string] | [string, number, number]> },
+  baseline = "",
+): { processedMarkdown: string; changes: InlineChange[] } {
+  const changes: InlineChange[] = []
+  const parts: string[] = []
+  const segments = redline.segments.map(
+    (s) => [s[0], s.length === 3 ? baseline.slice(s[1] as number, s[2] as number) : (s[1] as string)] as const,
+  )
+  let changeId = 0
+  let length = 0
+  const push = (text: string) => {
+    parts.push(text)
+    length += text.length
+  }
+
+  for (let i = 0; i < segments.length; i++) {
+    const [op, text] = segments[i]
+    if (op === "=") {
+      push(text)
+      continue
+    }
+    const changeIdStr = `change-${changeId++}`
+    const startIndex = length
+    if (op === "-" && segments[i + 1]?.[0] === "+") {
+      const newText = segments[++i][1]
+      push(`<span data-change-id="${changeIdStr}" class="inline-change replacement">${text}</span>`)
+      changes.push({ id: changeIdStr, type: "replacement", originalText: text.trim(), newText: newText.trim(),
+        status: "pending", startIndex, endIndex: length })
+    } else if (op === "-") {
+      push(`<span data-change-id="${changeIdStr}" class="inline-change deletion">${text}</span>`)
+      changes.push({ id: changeIdStr, type: "deletion", originalText: text.trim(),
+        status: "pending", startIndex, endIndex: length })
+    } else {
+      push(`<span data-change-id="${changeIdStr}" class="inline-change addition">${text}</span>`)
+      changes.push({ id: changeIdStr, type: "addition", newText: text.trim(),
+        status: "pending", startIndex, endIndex: length })
+    }
+  }
+
+  return { processedMarkdown: parts.join(""), changes }
+}
+
 export function applyInlineChanges(markdown: string, changes: InlineChange[]): string {
   let result = markdown
 
@@ -1,19 +1,40 @@
 """Backend APIs for generating a resume review and redlines against a job listing."""
 
 from fastapi import FastAPI, Security, HTTPException, status, Response
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from openai import OpenAI
-from langsmith import traceable, Client
+from typing import Literal
 from pathlib import Path
-import os, shutil, datetime
+import os, datetime, time
+import sqlite3
+import threading
+import asyncio
 import httpx
 import json
+import hashlib
 from dotenv import load_dotenv
-from .redline import redline_diff
+from .redline import redline_diff, redline_segments
+from .streaming import JSONSectionParser, sse_event
+from .session_store import SessionState, SessionStore
+from .llm_cache import LLMResponseCache, make_cache_key
+from .assets import AssetCache
+from .job_queue import JobQueue, QueueFull
+from .llm_client import HedgedLLMClient, LLMEndpoint, parse_endpoints
+from . import tracing
+from .tracing import traceable
+from .jd_fetcher import JobDescriptionFetcher, JobDescriptionFetchError
+from .jd_index import JDMatch, JobDescriptionIndex
+from .pre_assess import keyword_hints, pre_assess
+from .resume_library import LibraryFull, ResumeLibrary, ResumeMatch
+from .revision_store import RevisionStore
+from .metrics import registry as metrics_registry, stage_timer
+from .llm_output import ReviewOutput, ScreenOutput, parse_llm_output, reask_prompt
+from .prompt_budget import (compact_json, compact_qa_pairs, count_tokens, fit_to_budget,
+                            strip_jd_boilerplate)
+from . import security as auth
 from .security import check_authorized_user, verify_token, security
 from .security import router as oauth_router
 
@@ -35,13 +56,52 @@ ADDITIONAL_EXPERIENCE_FILE = USER_DIR / "additional_candidate_info.txt"
 # Prompt templates
 PROMPT_RESUME_REVIEW_FILE = PROMPT_DIR / "prompt_resume_review_GOLD.txt"
 PROMPT_DIFF_FILE = PROMPT_DIR / "prompt_resume_diff_GOLD.txt"
-# Temp working files
-RESUME_BASELINE_FILE = TEMP_DIR / "resume_baseline.txt"
-RESUME_REVISED_FILE = TEMP_DIR / "resume_revised.txt"
-USER_RESPONSE_FILE = TEMP_DIR / "user_response.json"
-OUTPUT_FROM_LLM_PRIOR_FILE = TEMP_DIR / "LLM_response_prior.json"
-OUTPUT_FROM_LLM_CURRENT_FILE = TEMP_DIR / "LLM_response_current.json"
-JOB_DESCRIPTION_FILE = TEMP_DIR / "job_description.txt"
+PROMPT_RESUME_SCREEN_FILE = PROMPT_DIR / "prompt_resume_screen_GOLD.txt"
+# Per-user session state (replaces the shared temp working files)
+SESSION_DB_FILE = TEMP_DIR / "sessions.db"
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+# LLM response cache keyed on the prompt inputs
+LLM_CACHE_DIR = TEMP_DIR / "llm_cache"
+LLM_CACHE_MEMORY_MB = int(os.getenv("LLM_CACHE_MEMORY_MB", "32"))
+LLM_CACHE_DISK_MB = int(os.getenv("LLM_CACHE_DISK_MB", "512"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+JOB_DB_FILE = TEMP_DIR / "jobs.db"
+# job description dedup: a user's exact copies of one listing share one canonical text (near ones are reported)
+JD_INDEX_DB_FILE = TEMP_DIR / "jd_index.db"
+JD_DEDUP = os.getenv("JD_DEDUP", "true").lower() == "true"
+JD_DEDUP_THRESHOLD = float(os.getenv("JD_DEDUP_THRESHOLD", "0.85"))
+JD_INDEX_MAX_ENTRIES = int(os.getenv("JD_INDEX_MAX_ENTRIES", "100000"))
+# resume library: named resume variants per user; the closest to each job description becomes the baseline
+RESUME_LIBRARY_DB_FILE = TEMP_DIR / "resumes.db"
+RESUME_LIBRARY_MAX_VARIANTS = int(os.getenv("RESUME_LIBRARY_MAX_VARIANTS", "20"))
+RESUME_AUTO_SELECT = os.getenv("RESUME_AUTO_SELECT", "true").lower() == "true"
+# revision history: every review round per user, as deltas with a full snapshot every N rounds
+REVISION_DB_FILE = TEMP_DIR / "revisions.db"
+REVISION_SNAPSHOT_EVERY = int(os.getenv("REVISION_SNAPSHOT_EVERY", "8"))
+REVISION_MAX_PER_USER = int(os.getenv("REVISION_MAX_PER_USER", "50"))
+# background review jobs: workers per process, queue limits, per-job timeout
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "500"))
+JOB_MAX_QUEUED_PER_USER = int(os.getenv("JOB_MAX_QUEUED_PER_USER", "10"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "600"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600)))
+JOB_MAX_WAIT_SECONDS = 30.0  # longest long-poll a client can ask for
+# prompt compaction: token budget for the whole prompt, answered questions kept,
+# and whether to strip EEO/benefits boilerplate from job descriptions
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+QA_PAIRS_MAX = int(os.getenv("QA_PAIRS_MAX", "12"))
+JD_STRIP_BOILERPLATE = os.getenv("JD_STRIP_BOILERPLATE", "true").lower() == "true"
+# pass the local keyword pre-assessment (pre_assess.py) to the LLM as Keyword_Hits; off by
+# default: the hints add ~400 prompt tokens and nothing in the prompt is dropped for them yet
+PREASSESS_HINTS = os.getenv("PREASSESS_HINTS", "false").lower() == "true"
+# follow-up calls asking only for fields missing from a response that local repair could not fix
+LLM_MAX_REASKS = int(os.getenv("LLM_MAX_REASKS", "1"))
+# /review/batch limits
+BATCH_MAX_LISTINGS = int(os.getenv("BATCH_MAX_LISTINGS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# seconds between mtime/size checks of cached prompt, user and demo files
+ASSET_CHECK_INTERVAL = float(os.getenv("ASSET_CHECK_INTERVAL", "1.0"))
 # Demo files
 RESUME_DEMO_FILE = DEMO_DIR / "resume_demo.txt"
 JOB_DESCRIPTION_DEMO_FILE = DEMO_DIR / "job_description_demo.txt"
@@ -53,40 +113,153 @@ print(f"{datetime.datetime.now()} starting up API server...")
 proxy_url = os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
 print("proxy url for pythonanywhere:", proxy_url)
 _timeout = httpx.Timeout(connect=10.0, read=180.0, write=30.0, pool=60.0)
-if proxy_url:
-    transport = httpx.HTTPTransport(proxy=proxy_url, retries=1)
-    http_client = httpx.Client(transport=transport, timeout=_timeout)
-else:
-    http_client = httpx.Client(timeout=_timeout)
-
-# Setup Open AI and LangSmith tracing
-LLM = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-os.environ["LANGSMITH_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "AIRecruitingAgent"
-langsmith_client = Client(api_key=os.getenv("LANGSMITH_API_KEY"))
-
-# Prepare temp and working files for FastAPI app
+# keep enough pooled connections for hundreds of in-flight reviews per worker
+MAX_LLM_CONNECTIONS = int(os.getenv("MAX_LLM_CONNECTIONS", "500"))
+_limits = httpx.Limits(max_connections=MAX_LLM_CONNECTIONS,
+                       max_keepalive_connections=100)
+
+# job listing pages are fetched on the same pool; extracted text is cached per URL
+JD_FETCH_MAX_BYTES = int(os.getenv("JD_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+JD_FETCH_TIMEOUT = float(os.getenv("JD_FETCH_TIMEOUT", "15"))
+JD_CACHE_SIZE = int(os.getenv("JD_CACHE_SIZE", "512"))
+# cached listings younger than this are served without revalidating (ETag / Last-Modified)
+JD_CACHE_FRESH_SECONDS = float(os.getenv("JD_CACHE_FRESH_SECONDS", "3600"))
+
+# Open AI (async client on the shared pool), tried in order with fallbacks
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-5-mini")
+# models tried in order after LLM_MODEL when it fails or its circuit is open,
+# comma-separated "model" or "model@base_url" (any OpenAI-compatible API, e.g. backend/llm_stub.py)
+LLM_FALLBACKS = os.getenv("LLM_FALLBACKS", "")
+# send a second, hedged request when the first is slower than this percentile of recent calls
+LLM_HEDGE = os.getenv("LLM_HEDGE", "true").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_INITIAL_DELAY = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "90"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "5"))
+LLM_HEDGE_MAX_DELAY = float(os.getenv("LLM_HEDGE_MAX_DELAY", "120"))
+# after startup, import the OpenAI and Google auth SDKs in a background thread
+# so the first review does not wait for them; false keeps them unloaded until first use
+SDK_WARM_UP = os.getenv("SDK_WARM_UP", "true").lower() == "true"
+
+# The clients below are built on first use, not at import: the SDK imports and the
+# SSL context take about a second, which every worker restart would otherwise pay
+# before /health or a demo request could be served.
+http_client: httpx.AsyncClient | None = None
+llm_client: HedgedLLMClient | None = None
+jd_fetcher: JobDescriptionFetcher | None = None
+_clients_lock = threading.RLock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the pooled httpx client shared by the LLM and job page fetches."""
+    global http_client
+    with _clients_lock:
+        if http_client is None:
+            if proxy_url:
+                transport = httpx.AsyncHTTPTransport(proxy=proxy_url, retries=1, limits=_limits)
+                http_client = httpx.AsyncClient(transport=transport, timeout=_timeout)
+            else:
+                http_client = httpx.AsyncClient(timeout=_timeout, limits=_limits)
+        return http_client
+
+
+def get_llm_client() -> HedgedLLMClient:
+    """Return the hedged LLM client, importing openai on the first call."""
+    global llm_client
+    with _clients_lock:
+        if llm_client is None:
+            from openai import AsyncOpenAI
+            llm = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=get_http_client())
+            llm_client = HedgedLLMClient(
+                [LLMEndpoint(LLM_MODEL, llm, LLM_MODEL),
+                 *parse_endpoints(LLM_FALLBACKS, llm, os.getenv("OPENAI_API_KEY"), get_http_client())],
+                hedge=LLM_HEDGE, hedge_percentile=LLM_HEDGE_PERCENTILE,
+                initial_hedge_delay=LLM_HEDGE_INITIAL_DELAY,
+                min_hedge_delay=LLM_HEDGE_MIN_DELAY, max_hedge_delay=LLM_HEDGE_MAX_DELAY)
+        return llm_client
+
+
+def get_jd_fetcher() -> JobDescriptionFetcher:
+    """Return the job page fetcher and its per-URL cache."""
+    global jd_fetcher
+    with _clients_lock:
+        if jd_fetcher is None:
+            jd_fetcher = JobDescriptionFetcher(get_http_client(), max_bytes=JD_FETCH_MAX_BYTES,
+                                               timeout=JD_FETCH_TIMEOUT, max_entries=JD_CACHE_SIZE,
+                                               fresh_seconds=JD_CACHE_FRESH_SECONDS)
+        return jd_fetcher
+
+
+def warm_up_sdks():
+    """Import and build the SDK clients ahead of the first request that needs them."""
+    started = time.perf_counter()
+    try:
+        get_llm_client()
+        get_jd_fetcher()
+        auth._google_auth()
+    except Exception as e:
+        print("SDK warm-up failed:", type(e).__name__, str(e))
+        return
+    print(f"{datetime.datetime.now()}: SDKs loaded in {time.perf_counter() - started:.2f} s")
+
+
+# metrics exposed on /metrics; stage latencies come from stage_timer (see metrics.py)
+http_in_flight = metrics_registry.gauge("http_requests_in_flight", "HTTP requests being served.")
+http_requests = metrics_registry.counter(
+    "http_requests_total", "HTTP requests served, by route and status.", ("route", "status"))
+http_seconds = metrics_registry.histogram(
+    "http_request_seconds", "HTTP request latency by route.", ("route",))
+llm_tokens = metrics_registry.counter(
+    "llm_tokens_total", "LLM tokens reported by the provider.", ("kind",))
+prompt_tokens_hist = metrics_registry.histogram(
+    "review_prompt_tokens", "Prompt tokens after each compaction stage.", ("stage",),
+    buckets=(500, 1000, 2000, 4000, 8000, 12000, 16000, 32000, 64000))
+jd_matches = metrics_registry.counter(
+    "jd_dedup_total", "Job descriptions looked up in the dedup index, by match kind.", ("kind",))
+llm_cache_requests = metrics_registry.counter(
+    "llm_cache_requests_total", "LLM response cache lookups by result.", ("result",))
+llm_invalid_responses = metrics_registry.counter(
+    "llm_invalid_responses_total", "LLM responses still invalid after local repair and re-asks, by schema.",
+    ("schema",))
+# prompt templates, user files and demo payloads served from memory
+assets = AssetCache(check_interval=ASSET_CHECK_INTERVAL)
+
+
+def new_session_state() -> SessionState:
+    """Start a session with the demo resume as baseline and the demo job description."""
+    return SessionState(
+        resume_baseline=assets.text(RESUME_DEMO_FILE),
+        job_description=assets.text(JOB_DESCRIPTION_DEMO_FILE),
+    )
+
+
+sessions = SessionStore(SESSION_DB_FILE, factory=new_session_state,
+                        max_cached=SESSION_CACHE_SIZE, ttl_seconds=SESSION_TTL_SECONDS)
+llm_cache = LLMResponseCache(LLM_CACHE_DIR,
+                             max_memory_bytes=LLM_CACHE_MEMORY_MB * 1024 * 1024,
+                             max_disk_bytes=LLM_CACHE_DISK_MB * 1024 * 1024,
+                             ttl_seconds=LLM_CACHE_TTL_SECONDS)
+jd_index = JobDescriptionIndex(JD_INDEX_DB_FILE, threshold=JD_DEDUP_THRESHOLD,
+                               max_entries=JD_INDEX_MAX_ENTRIES)
+resume_library = ResumeLibrary(RESUME_LIBRARY_DB_FILE, max_variants=RESUME_LIBRARY_MAX_VARIANTS)
+revisions = RevisionStore(REVISION_DB_FILE, snapshot_every=REVISION_SNAPSHOT_EVERY,
+                          max_revisions=REVISION_MAX_PER_USER, ttl_seconds=SESSION_TTL_SECONDS)
+
+
+# Prepare temp directory and session store for FastAPI app
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Setup temp working directory on startup."""
+    """Setup temp working directory, stores and review workers on startup."""
     ## startup items
-    # make temp directory
     TEMP_DIR.mkdir(parents=True, exist_ok=True)
-    # copy the user's saved resume.txt into temp directory as the baseline
-    shutil.copyfile(RESUME_DEMO_FILE, RESUME_BASELINE_FILE)
-    # Make the demo job description the working job description
-    shutil.copyfile(JOB_DESCRIPTION_DEMO_FILE, JOB_DESCRIPTION_FILE)
-    # delete temp working files if they exist
-    try:
-        os.remove(OUTPUT_FROM_LLM_CURRENT_FILE)
-        os.remove(RESUME_REVISED_FILE)
-        os.remove(USER_RESPONSE_FILE)
-        os.remove(OUTPUT_FROM_LLM_PRIOR_FILE)
-    except FileNotFoundError:
-        pass
+    await asyncio.gather(*(asyncio.to_thread(store.init)
+                           for store in (sessions, jd_index, resume_library, revisions, jobs)))
+    await jobs.start()
+    if SDK_WARM_UP:
+        threading.Thread(target=warm_up_sdks, name="sdk-warm-up", daemon=True).start()
     yield
     ## cleanup items here
-    # none for now
+    await jobs.stop()
+    await asyncio.to_thread(tracing.tracer.queue.flush, 2.0)
 
 # setup FastAPI app with CORS; mount oauth_router and static files
 app = FastAPI(debug=True, lifespan=lifespan)
@@ -107,6 +280,23 @@ app.add_middleware(
 )
 # Mount the callback rounter /oauth2cb
 app.include_router(oauth_router)
+
+
+@app.middleware("http")
+async def record_http_metrics(request, call_next):
+    """Count requests in flight and record latency and status per route."""
+    start = time.perf_counter()
+    http_in_flight.inc()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        http_in_flight.dec()
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_seconds.observe(time.perf_counter() - start, route=route)
+        http_requests.inc(route=route, status=status_code)
 # Serve static files at /static
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
@@ -145,49 +335,350 @@ def splash():
     return FileResponse(STATIC_DIR / "index.html")
 
 
-@traceable(name="prompt_LLM")
-def prompt_llm(prompt: str) -> str:
-    """Call OpenAI API to get a response."""
-    response = LLM.chat.completions.create(
-        model="gpt-5-mini",
+# prompt token usage across LLM calls; cached_tokens were served from the provider's prefix cache
+llm_usage = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+
+def record_llm_usage(usage):
+    """Add a response's token usage to llm_usage and log the prefix cache hit."""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+    llm_usage["calls"] += 1
+    llm_usage["prompt_tokens"] += usage.prompt_tokens or 0
+    llm_usage["cached_tokens"] += cached
+    llm_usage["completion_tokens"] += usage.completion_tokens or 0
+    llm_tokens.inc(usage.prompt_tokens or 0, kind="prompt")
+    llm_tokens.inc(cached, kind="cached")
+    llm_tokens.inc(usage.completion_tokens or 0, kind="completion")
+    print(f"{datetime.datetime.now()}: LLM usage prompt_tokens={usage.prompt_tokens}",
+          f"cached_tokens={cached} completion_tokens={usage.completion_tokens}")
+
+
+async def _llm() -> HedgedLLMClient:
+    """Return the LLM client, building it in a worker thread on first use (openai import)."""
+    return llm_client if llm_client is not None else await asyncio.to_thread(get_llm_client)
+
+
+@traceable(name="prompt_LLM", run_type="llm")
+async def prompt_llm(prompt: str) -> str:
+    """Call OpenAI API to get a response (hedged, with fallbacks; see llm_client)."""
+    response = await (await _llm()).create(
         temperature=1,
         messages=[{"role": "user",
                    "content": prompt}
-                  ]
+                  ],
+        prompt_cache_key=prompt_cache_key(prompt),
     )
+    record_llm_usage(response.usage)
     return response.choices[0].message.content.strip()
 
 
-def create_review_prompt(job_description: str) -> str:
-    """Construct JSON input and inject into prompt template."""
+@traceable(name="prompt_LLM_stream", run_type="llm")
+async def prompt_llm_stream(prompt: str):
+    """Call OpenAI API and yield the response text as it is generated."""
+    stream = (await _llm()).stream(
+        temperature=1,
+        messages=[{"role": "user",
+                   "content": prompt}
+                  ],
+        prompt_cache_key=prompt_cache_key(prompt),
+        stream_options={"include_usage": True},
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if chunk.usage is not None:  # sent in a final chunk without choices
+            record_llm_usage(chunk.usage)
+
+
+def create_review_input(job_description: str, state: SessionState) -> dict:
+    """Construct the JSON input for the review prompt from the user's session."""
     input_dict = {
         "Job_Description": job_description,
-        "Resume": RESUME_BASELINE_FILE.read_text(),
+        "Resume": state.resume_baseline,
     }
-    if ADDITIONAL_EXPERIENCE_FILE.exists():
-        input_dict["Additional_Info"] = ADDITIONAL_EXPERIENCE_FILE.read_text()
-    if OUTPUT_FROM_LLM_CURRENT_FILE.exists():
-        llm_response = json.loads(OUTPUT_FROM_LLM_CURRENT_FILE.read_text())
+    additional_info = assets.text_or_none(ADDITIONAL_EXPERIENCE_FILE)
+    if additional_info is not None:
+        input_dict["Additional_Info"] = additional_info
+    if PREASSESS_HINTS:
+        assessment = pre_assess(job_description, state.resume_baseline)
+        if assessment["Gap_Map"]:
+            input_dict["Keyword_Hits"] = keyword_hints(assessment)
+    if state.llm_response_current:
+        llm_response = json.loads(state.llm_response_current)
         input_dict["Fit"] = llm_response.get("Fit")
         input_dict["Gap_Map"] = llm_response.get("Gap_Map")
-    if USER_RESPONSE_FILE.exists():
-        input_dict["qa_pairs"] = json.loads(USER_RESPONSE_FILE.read_text())
+    if state.qa_pairs:
+        input_dict["qa_pairs"] = state.qa_pairs
+    return input_dict
+
+
+def compact_review_input(input_dict: dict, template_file: Path) -> dict:
+    """
+    Shrink the prompt input: strip JD boilerplate, dedupe and age out
+    qa_pairs, then fit the prompt into PROMPT_TOKEN_BUDGET.
+    Logs the prompt token count after each stage.
+    """
+    template_tokens = count_tokens(assets.text(template_file))
+    def tokens(d):
+        return template_tokens + count_tokens(compact_json(d))
+    stages = [("compact", tokens(input_dict))]
+    input_dict = dict(input_dict)
+    if JD_STRIP_BOILERPLATE:
+        input_dict["Job_Description"] = strip_jd_boilerplate(input_dict["Job_Description"])
+        stages.append(("jd_stripped", tokens(input_dict)))
+    if input_dict.get("qa_pairs"):
+        input_dict["qa_pairs"] = compact_qa_pairs(input_dict["qa_pairs"], QA_PAIRS_MAX)
+        stages.append(("qa_compacted", tokens(input_dict)))
+    input_dict, steps = fit_to_budget(input_dict, PROMPT_TOKEN_BUDGET, template_tokens)
+    stages.append(("budgeted", tokens(input_dict)))
+    for name, n in stages:
+        prompt_tokens_hist.observe(n, stage=name)
+    print(f"{datetime.datetime.now()}: prompt tokens",
+          ", ".join(f"{name}={n}" for name, n in stages), *steps)
+    return input_dict
+
+
+# input fields that stay the same across the /review and /questions rounds of one listing
+STABLE_INPUT_KEYS = ("Job_Description", "Resume", "Additional_Info", "Keyword_Hits")
+# fields that change every round; they open the dynamic tail of the prompt
+_DYNAMIC_INPUT_MARKERS = tuple(f',"{key}":' for key in ("Fit", "Gap_Map", "qa_pairs"))
+
+
+def order_review_input(input_dict: dict) -> dict:
+    """Put the stable fields first so follow-up rounds share a byte-identical prompt prefix."""
+    ordered = {key: input_dict[key] for key in STABLE_INPUT_KEYS if key in input_dict}
+    ordered.update((key, value) for key, value in input_dict.items() if key not in ordered)
+    return ordered
+
+
+def prompt_cache_key(prompt: str) -> str:
+    """
+    Hash the stable prefix of a rendered prompt: template, JD, resume and
+    additional info, up to the first dynamic field. Sent as the provider's
+    prompt_cache_key so rounds for the same listing are routed to the same
+    prefix cache. Quotes inside JSON strings are escaped, so a marker can
+    only match a real key.
+    """
+    ends = [i for i in (prompt.find(marker) for marker in _DYNAMIC_INPUT_MARKERS) if i >= 0]
+    end = min(ends) if ends else prompt.rfind("}")
+    return hashlib.sha256(prompt[:end].encode("utf-8")).hexdigest()[:32]
 
+
+def render_review_prompt(input_dict: dict, template_file: Path = PROMPT_RESUME_REVIEW_FILE) -> str:
+    """Inject the JSON input into the prompt template, stable fields first."""
     # replace placeholder {{input}} in the prompt template
-    input_json = json.dumps(input_dict, indent=4)
-    prompt = PROMPT_RESUME_REVIEW_FILE.read_text()
+    input_json = compact_json(order_review_input(input_dict))
+    prompt = assets.text(template_file)
     prompt = prompt.replace("{{INPUT}}", input_json)
 
     return prompt
 
 
-def create_resume_diff(baseline:str, revised:str) -> str:
+def create_review_prompt(job_description: str, state: SessionState) -> str:
+    """Construct JSON input from the user's session and inject into prompt template."""
+    return prepare_review_prompt(job_description, state)[0]
+
+
+def prepare_review_prompt(job_description: str, state: SessionState) -> tuple[str, str]:
+    """Return the compacted review prompt and the LLM cache key of its inputs."""
+    input_dict = compact_review_input(create_review_input(job_description, state),
+                                      PROMPT_RESUME_REVIEW_FILE)
+    cache_key = make_cache_key(LLM_MODEL, assets.text(PROMPT_RESUME_REVIEW_FILE), input_dict)
+    return render_review_prompt(input_dict), cache_key
+
+
+def prepare_screen_prompt(job_description: str, state: SessionState) -> tuple[str, str]:
+    """Return the fit-screening prompt (Fit and Gap_Map only) and its LLM cache key.
+    Prior Fit, Gap_Map and qa_pairs belong to the session's open listing, so they are left out.
+    """
+    input_dict = {
+        "Job_Description": job_description,
+        "Resume": state.resume_baseline,
+    }
+    additional_info = assets.text_or_none(ADDITIONAL_EXPERIENCE_FILE)
+    if additional_info is not None:
+        input_dict["Additional_Info"] = additional_info
+    input_dict = compact_review_input(input_dict, PROMPT_RESUME_SCREEN_FILE)
+    cache_key = make_cache_key(LLM_MODEL, assets.text(PROMPT_RESUME_SCREEN_FILE), input_dict)
+    return render_review_prompt(input_dict, PROMPT_RESUME_SCREEN_FILE), cache_key
+
+
+class InvalidLLMResponse(ValueError):
+    """The LLM response still misses required fields after repair and re-asks."""
+
+
+async def validate_llm_response(prompt: str, llm_response_json: str,
+                                schema=ReviewOutput) -> str:
+    """
+    Check an LLM response against schema and return it as compact JSON.
+    Fenced, truncated or slightly malformed output is repaired locally; only
+    fields that are still missing or invalid are asked for again (up to
+    LLM_MAX_REASKS times) instead of re-running the whole review.
+    """
+    response, missing = parse_llm_output(llm_response_json, schema)
+    if not missing:
+        try:  # already valid: keep the model's text as is
+            json.loads(llm_response_json)
+            return llm_response_json
+        except json.JSONDecodeError:
+            pass
+    for _ in range(LLM_MAX_REASKS):
+        if not missing:
+            break
+        print(f"{datetime.datetime.now()}: LLM response missing {missing}, re-asking")
+        partial, _ = parse_llm_output(await prompt_llm(reask_prompt(prompt, missing)), schema)
+        response.update({key: partial[key] for key in missing if key in partial})
+        response, missing = parse_llm_output(compact_json(response), schema)
+    if missing:
+        llm_invalid_responses.inc(schema=schema.__name__)
+        raise InvalidLLMResponse(f"LLM response is missing or has invalid {', '.join(missing)}")
+    return compact_json(response)
+
+
+async def canonical_job_description(sub: str, job_description: str,
+                                    url: str | None = None) -> tuple[str, JDMatch | None]:
+    """
+    Return the canonical text of a job description: the user's first indexed
+    copy when it is an exact duplicate (differing only in boilerplate, case
+    or punctuation), so reposts on other sites build the same prompts and
+    reuse the same cached reviews. Near duplicates are only reported in the
+    match, and other users' copies are never used. The index is best effort:
+    on errors, or with JD_DEDUP off, the text is used as is.
+    """
+    if not JD_DEDUP:
+        return job_description, None
+    try:
+        with stage_timer("jd_dedup"):
+            match = await asyncio.to_thread(jd_index.lookup, sub, job_description, url)
+    except sqlite3.Error as e:
+        print("job description index failed:", type(e).__name__, str(e))
+        return job_description, None
+    jd_matches.inc(kind=match.kind)
+    return match.job_description, match
+
+
+async def closest_variant(sub: str, job_description: str, state: SessionState) -> ResumeMatch | None:
+    """
+    Return the user's resume library variant closest to the job description,
+    or None if auto-selection is off, the user pinned a baseline with /resume,
+    or has no variants. Like the JD index, selection is best effort.
+    """
+    if not RESUME_AUTO_SELECT or state.resume_pinned:
+        return None
+    try:
+        with stage_timer("resume_select"):
+            return await asyncio.to_thread(resume_library.select, sub, job_description)
+    except sqlite3.Error as e:
+        print("resume library failed:", type(e).__name__, str(e))
+        return None
+
+
+def with_variant(state: SessionState, match: ResumeMatch | None) -> SessionState:
+    """Return a copy of state using the variant as baseline, without saving it."""
+    if match is None:
+        return state
+    return state.model_copy(update={"resume_baseline": match.resume, "resume_variant": match.name})
+
+
+async def select_baseline(sub: str, job_description: str, state: SessionState) -> SessionState:
+    """Make the closest resume library variant (see closest_variant) the session baseline."""
+    match = await closest_variant(sub, job_description, state)
+    if match is None or (match.name == state.resume_variant and match.resume == state.resume_baseline):
+        return state
+    return await asyncio.to_thread(_set_baseline, sub, match.resume, match.name)
+
+
+def lookup_llm_cache(cache_key: str, no_cache: bool) -> str | None:
+    """Return a cached LLM response unless the request bypasses the cache."""
+    if no_cache:
+        llm_cache.record_bypass()
+        llm_cache_requests.inc(result="bypass")
+        return None
+    cached = llm_cache.get(cache_key)
+    llm_cache_requests.inc(result="miss" if cached is None else "hit")
+    if cached is not None:
+        print(f"{datetime.datetime.now()}: LLM cache hit", cache_key[:12], llm_cache.stats())
+    return cached
+
+
+# "html" inlines styled <add>/<del> spans; "segments"/"offsets" return typed segments
+RedlineFormat = Literal["html", "segments", "offsets"]
+
+
+def create_resume_diff(baseline:str, revised:str, redline_format: RedlineFormat = "html"):
     """Create a redlined diff between two resume versions."""
-    return redline_diff(baseline, revised)
+    if redline_format == "html":
+        return redline_diff(baseline, revised)
+    return redline_segments(baseline, revised, offsets=(redline_format == "offsets"))
+
+
+def save_llm_response(sub: str, job_description: str, llm_response_json: str,
+                      revised_resume: str) -> SessionState:
+    """Save the LLM response and revised resume to the user's session; return the new state."""
+    return sessions.update(sub, lambda s: s.record_llm_response(
+        llm_response_json, revised_resume, job_description))
+
+
+async def save_revision(sub: str, job_description: str, llm_response_json: str,
+                        revised_resume: str) -> int | None:
+    """Add the round to the user's revision history; return its number, or None if it could not be saved."""
+    try:
+        with stage_timer("revision_save"):
+            return await asyncio.to_thread(revisions.add, sub, llm_response_json, revised_resume, job_description)
+    except sqlite3.Error as e:  # the history is best effort; the review still succeeds
+        print("save_revision: failed:", type(e).__name__, str(e))
+        return None
+
+
+def get_session(claims: dict) -> SessionState:
+    """Return the session for the verified user."""
+    return sessions.get(claims["sub"])
+
+
+def _collect_gauges():
+    """Refresh gauges that mirror state kept outside the metrics registry."""
+    depth = jobs.depth()
+    job_queue_depth.set(depth["queued"], status="queued")
+    job_queue_depth.set(depth["running"], status="running")
+    if llm_client is not None:
+        for name, stats in llm_client.stats().items():
+            llm_hedges.set(stats["hedges"], endpoint=name)
+            llm_circuit_open.set(int(stats["circuit"] != "closed"), endpoint=name)
+    cache = llm_cache.stats()
+    llm_cache_memory_bytes.set(cache["memory_bytes"])
+    if jd_fetcher is not None:
+        for outcome, count in jd_fetcher.stats().items():
+            if outcome != "entries":
+                jd_fetches.set(count, outcome=outcome)
+    for outcome, count in tracing.tracer.stats().items():
+        traces.set(count, outcome=outcome)
+
+
+job_queue_depth = metrics_registry.gauge("job_queue_depth", "Review jobs by status.", ("status",))
+llm_hedges = metrics_registry.gauge("llm_hedged_requests", "Hedged LLM requests sent.", ("endpoint",))
+llm_circuit_open = metrics_registry.gauge(
+    "llm_circuit_open", "1 when the endpoint's circuit breaker is open or half-open.", ("endpoint",))
+llm_cache_memory_bytes = metrics_registry.gauge(
+    "llm_cache_memory_bytes", "Bytes held in the LLM response cache memory tier.")
+jd_fetches = metrics_registry.gauge(
+    "jd_fetches", "Job description lookups by outcome (cache hit, revalidated, download, error).", ("outcome",))
+traces = metrics_registry.gauge(
+    "traces", "Traces by outcome (sampled, unsampled, queued, exported, dropped, errors).", ("outcome",))
+metrics_registry.add_collector(_collect_gauges)
+
+
+@app.get("/metrics")
+async def show_metrics():
+    """Return pipeline metrics in the Prometheus text exposition format."""
+    text = await asyncio.to_thread(metrics_registry.render)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health")
-def show_heartbeat():
+async def show_heartbeat():
     """Return a message to show API is up."""
     return {"message": "Hello World"}
 
@@ -198,17 +689,35 @@ class Url(BaseModel):
     demo: bool = False   # if true, return static demo response
 
 
+async def fetch_job_description(url: str) -> str:
+    """Return the job description at a URL; raise JobDescriptionFetchError if it cannot be read."""
+    fetcher = jd_fetcher if jd_fetcher is not None else await asyncio.to_thread(get_jd_fetcher)
+    with stage_timer("jd_fetch"):
+        return await fetcher.fetch(url)
+
+
 @app.post("/jobdescription")
-def get_job_description_from_url(url:Url):
-    """Fetch job description from URL."""
-    # TODO: Implement logic to fetch job description based on URL vs. demo JD
+async def get_job_description_from_url(url:Url,
+                                       creds=Security(security)
+                                       ):
+    """Fetch job description from URL; the page is fetched server side, so only
+    authorized users may ask for it (the demo listing needs no token)."""
     if url.demo:
-        job_description = JOB_DESCRIPTION_FILE.read_text()
+        job_description = await asyncio.to_thread(assets.text, JOB_DESCRIPTION_DEMO_FILE)
         return {"job_description": job_description}
 
-    # For now, always return the demo JD when not implemented.
-    job_description = JOB_DESCRIPTION_FILE.read_text()
-    return {"job_description": job_description}
+    with stage_timer("verify_token"):
+        claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+
+    try:
+        job_description = await fetch_job_description(url.url)
+    except JobDescriptionFetchError as e:
+        print("job description fetch failed:", str(e))
+        raise HTTPException(status_code=502, detail=f"Could not read the job description: {e}")
+    job_description, match = await canonical_job_description(claims["sub"], job_description, url.url)
+    return {"job_description": job_description,
+            "duplicate_of": match.id if match and match.kind != "new" else None}
 
 
 class JobListing(BaseModel):
@@ -216,119 +725,597 @@ class JobListing(BaseModel):
     job_description: str  # Job description to be reviewed
     url: str  # URL of calling page for tracking purposes
     demo: bool = False   # if true, return static demo response
+    no_cache: bool = False  # if true, skip the LLM response cache lookup
+    redline_format: RedlineFormat = "html"  # shape of Tailored_Resume in the response
+    changes_since_prior: bool = False  # if true, also redline against the previous tailored resume
 
 
 @app.post("/review")
 @traceable(name="generate_review_endpoint")
-def generate_review(job_listing: JobListing,
-                    creds=Security(security)
-                    ):
+async def generate_review(job_listing: JobListing,
+                          creds=Security(security)
+                          ):
     """Generate a review and tailored resume based on the job description.
     Algo:
     1. If demo is true, return canned response
-    2. Create LLM prompt with create_review_prompt()
-    3. Call prompt_LLM with the prompt
-    4. Save the response to OUTPUT_FROM_LLM_CURRENT_FILE
-    5. Save the revised resume to RESUME_REVISED
-    6. Save the diff of baseline and revised resumes in the API response
-    7. Return the response
+    2. Create LLM prompt with create_review_prompt(), using the user's canonical copy
+       of the job description when they already reviewed the listing (jd_index.py), and
+       the user's resume library variant closest to it as the baseline
+       (resume_library.py; named in Resume_Variant)
+    3. Return the cached LLM response for the same inputs, or call prompt_LLM
+    4. Save the response, revised resume and job description to the user's session
+    5. Save the diff of baseline and revised resumes in the API response, as
+       inline HTML or as typed segments depending on redline_format
+    6. If changes_since_prior, add Changes_Since_Prior: a redline of the previous
+       round's tailored resume against this one (only the edits this round made)
+    7. Return the response, with the round's number in the revision history as Revision
+       (see /revisions)
+    Blocking session I/O, token verification and the diff run in worker threads
+    so the event loop stays free while reviews wait on the LLM.
     """
-    if job_listing.demo:  # returned stubbed API response
-        response = json.loads(RESPONSE_REVIEW_DEMO_FILE.read_text())
-        return response
+    if job_listing.demo:  # returned stubbed API response, pre-serialized
+        return Response(content=await asyncio.to_thread(assets.json_bytes, RESPONSE_REVIEW_DEMO_FILE),
+                        media_type="application/json")
 
     # authenticate/authorize
-    claims = verify_token(creds)
+    with stage_timer("verify_token"):
+        claims = await asyncio.to_thread(verify_token, creds)
     check_authorized_user(claims)
+    return await run_review(claims["sub"], job_listing)
+
+
+async def create_review_redlines(state: SessionState, revised_resume: str, job_listing: JobListing) -> dict:
+    """
+    Return the redlines of a saved review round in the listing's redline_format:
+    Tailored_Resume (baseline against the revised resume), and Changes_Since_Prior
+    (the previous round's tailored resume against this one) if asked for and
+    there was a previous round. Shared by /review and /review/stream.
+    """
+    redlines = {}
+    with stage_timer("redline"):
+        redlines["Tailored_Resume"] = await asyncio.to_thread(
+            create_resume_diff, state.resume_baseline, revised_resume, job_listing.redline_format)
+        if job_listing.changes_since_prior and state.resume_revised_prior is not None:
+            redlines["Changes_Since_Prior"] = await asyncio.to_thread(
+                create_resume_diff, state.resume_revised_prior, revised_resume,
+                job_listing.redline_format)
+    return redlines
 
+
+async def run_review(sub: str, job_listing: JobListing) -> dict:
+    """Run steps 2-7 of /review for an authorized user; shared with background jobs."""
+    tracing.set_user(sub)
+    job_description, _ = await canonical_job_description(sub, job_listing.job_description, job_listing.url)
     # get the LLM response
-    prompt = create_review_prompt(job_listing.job_description)
-    print(f"{datetime.datetime.now()}: calling OpenAI with prompt length", len(prompt))
+    with stage_timer("session_load"):
+        state = await asyncio.to_thread(sessions.get, sub)
+    state = await select_baseline(sub, job_description, state)
+    with stage_timer("prompt_build"):
+        prompt, cache_key = await asyncio.to_thread(
+            prepare_review_prompt, job_description, state)
+    with stage_timer("cache_lookup"):
+        llm_response_json = await asyncio.to_thread(
+            lookup_llm_cache, cache_key, job_listing.no_cache)
+    cache_hit = llm_response_json is not None
+    if not cache_hit:
+        print(f"{datetime.datetime.now()}: calling OpenAI with prompt length", len(prompt))
+        try:
+            with stage_timer("llm_call"):
+                llm_response_json = await prompt_llm(prompt)
+            with stage_timer("validate"):
+                llm_response_json = await validate_llm_response(prompt, llm_response_json)
+        except InvalidLLMResponse as e:
+            print("generate_review: invalid LLM response:", str(e))
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"generate_review: LLM returned an invalid review: {e}"
+            )
+        except Exception as e:
+            print("generate_review: OpenAI call failed:", type(e).__name__, str(e))
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"generate_review: OpenAI call failed: ({type(e).__name__}): {e}"
+            )
+
+    # save the LLM response and revised resume, then diff against the baseline
+    with stage_timer("json_parse"):
+        response = json.loads(llm_response_json)
+    revised_resume = response["Tailored_Resume"]
+    if not cache_hit:
+        with stage_timer("cache_put"):
+            await asyncio.to_thread(llm_cache.put, cache_key, llm_response_json)
+    with stage_timer("session_save"):
+        state = await asyncio.to_thread(
+            save_llm_response, sub, job_description,
+            llm_response_json, revised_resume)
+    revision = await save_revision(sub, job_description, llm_response_json, revised_resume)
+    response.update(await create_review_redlines(state, revised_resume, job_listing))
+    if state.resume_variant is not None:
+        response["Resume_Variant"] = state.resume_variant
+    if revision is not None:
+        response["Revision"] = revision
+
+    return response
+
+
+async def run_review_job(sub: str, payload: dict) -> dict:
+    """Job queue handler: run a /review request submitted to /jobs/review."""
+    job_listing = JobListing.model_validate(payload)
+    if job_listing.demo:
+        return await asyncio.to_thread(assets.json, RESPONSE_REVIEW_DEMO_FILE)
+    return await run_review(sub, job_listing)
+
+
+jobs = JobQueue(JOB_DB_FILE, run_review_job, workers=JOB_WORKERS,
+                max_queued=JOB_MAX_QUEUED, max_queued_per_user=JOB_MAX_QUEUED_PER_USER,
+                timeout_seconds=JOB_TIMEOUT_SECONDS, retention_seconds=JOB_RETENTION_SECONDS)
+
+
+def job_status(job) -> dict:
+    """Return the client view of a job: status, and the result or error once finished."""
+    view = {"job_id": job.id, "status": job.status,
+            "created_at": job.created_at, "finished_at": job.finished_at}
+    if job.status == "done":
+        view["result"] = job.result
+    elif job.status == "failed":
+        view["error"] = job.error
+    return view
+
+
+@app.post("/jobs/review", status_code=status.HTTP_202_ACCEPTED)
+async def submit_review_job(job_listing: JobListing, creds=Security(security)):
+    """Queue a /review request and return its job id right away.
+    Poll GET /jobs/{job_id} (optionally long-polling with ?wait=seconds) or
+    GET /jobs/{job_id}/result for the same response /review would return.
+    Responds 429 when the queue, or the user's share of it, is full.
+    """
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
     try:
-        llm_response_json = prompt_llm(prompt)
+        job = await jobs.enqueue(claims["sub"], job_listing.model_dump())
+    except QueueFull as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    return job_status(job)
+
+
+async def _get_own_job(job_id: str, creds, wait: float = 0):
+    """Return the caller's job, waiting up to `wait` seconds for it to finish; 404 otherwise."""
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    job = await jobs.wait(job_id, max(0.0, min(wait, JOB_MAX_WAIT_SECONDS)))
+    if job is None or job.sub != claims["sub"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_review_job(job_id: str, wait: float = 0, creds=Security(security)):
+    """Return a job's status; with wait > 0, hold the request until it finishes or wait runs out."""
+    return job_status(await _get_own_job(job_id, creds, wait))
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_review_job_result(job_id: str, wait: float = 0, creds=Security(security)):
+    """Return a finished job's /review response; 202 while pending, 502 if it failed."""
+    job = await _get_own_job(job_id, creds, wait)
+    if job.status == "failed":
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=job.error)
+    if job.status != "done":
+        return Response(status_code=status.HTTP_202_ACCEPTED,
+                        content=json.dumps(job_status(job)), media_type="application/json")
+    return job.result
+
+
+# sections sent as soon as they are complete; Tailored_Resume is sent last, redlined
+STREAMED_SECTIONS = ("Fit", "Gap_Map", "Questions")
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _stream_demo_review(response: dict):
+    """Replay a canned review as Server-Sent Events."""
+    for section in STREAMED_SECTIONS:
+        yield sse_event(section, response.get(section))
+    yield sse_event("Tailored_Resume", response.get("Tailored_Resume"))
+    yield sse_event("done", {})
+
+
+async def _replay_cached(llm_response_json: str):
+    """Yield a cached LLM response as a single streamed chunk."""
+    yield llm_response_json
+
+
+@traceable(name="stream_review_endpoint")
+async def _stream_llm_review(prompt: str, sub: str, job_description: str, job_listing: JobListing,
+                             cache_key: str, cached: str | None, preliminary: dict | None = None):
+    """Forward LLM tokens and completed review sections as Server-Sent Events."""
+    tracing.set_user(sub)
+    if preliminary is not None:
+        yield sse_event("Preliminary", preliminary)
+    parser = JSONSectionParser()
+    chunks = []
+    llm_stream = _replay_cached(cached) if cached is not None else prompt_llm_stream(prompt)
+    try:
+        async for delta in llm_stream:
+            chunks.append(delta)
+            yield sse_event("token", delta)
+            for section, value in parser.feed(delta):
+                if section in STREAMED_SECTIONS:
+                    yield sse_event(section, value)
     except Exception as e:
-        print("generate_review: OpenAI call failed:", type(e).__name__, str(e))
+        print("stream_review: OpenAI call failed:", type(e).__name__, str(e))
+        yield sse_event("error", {"detail": f"stream_review: OpenAI call failed: ({type(e).__name__}): {e}"})
+        return
+
+    # validate (repairing or re-asking if needed), save, and send the redlined resume last
+    llm_response_json = "".join(chunks).strip()
+    try:
+        if cached is None:
+            llm_response_json = await validate_llm_response(prompt, llm_response_json)
+        revised_resume = json.loads(llm_response_json)["Tailored_Resume"]
+    except InvalidLLMResponse as e:
+        print("stream_review: invalid LLM response:", str(e))
+        yield sse_event("error", {"detail": f"stream_review: LLM returned an invalid review: {e}"})
+        return
+    except Exception as e:  # e.g. the re-ask for missing fields failed
+        print("stream_review: OpenAI call failed:", type(e).__name__, str(e))
+        yield sse_event("error", {"detail": f"stream_review: OpenAI call failed: ({type(e).__name__}): {e}"})
+        return
+    if cached is None:
+        await asyncio.to_thread(llm_cache.put, cache_key, llm_response_json)
+    state = await asyncio.to_thread(
+        save_llm_response, sub, job_description, llm_response_json, revised_resume)
+    revision = await save_revision(sub, job_description, llm_response_json, revised_resume)
+    for section, redline in (await create_review_redlines(state, revised_resume, job_listing)).items():
+        yield sse_event(section, redline)
+    yield sse_event("done", {"Revision": revision} if revision is not None else {})
+
+
+@app.post("/review/stream")
+async def stream_review(job_listing: JobListing,
+                        creds=Security(security)
+                        ):
+    """Stream a review as Server-Sent Events.
+    Events, in order:
+    - Preliminary: local keyword Fit and Gap_Map (see /review/preassess), before the LLM answers
+    - token: raw LLM text as it arrives
+    - Fit, Gap_Map, Questions: each section as soon as it is complete
+    - Tailored_Resume: the redlined resume in redline_format, once the full response is saved
+    - Changes_Since_Prior: if changes_since_prior, as in /review
+    - done, with the round's Revision number (or error if the LLM call or final parse fails)
+    """
+    if job_listing.demo:  # replay stubbed API response
+        response = await asyncio.to_thread(assets.json, RESPONSE_REVIEW_DEMO_FILE)
+        return StreamingResponse(_stream_demo_review(response),
+                                 media_type="text/event-stream", headers=SSE_HEADERS)
+
+    # authenticate/authorize before the stream starts so errors are plain HTTP errors
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+
+    job_description, _ = await canonical_job_description(claims["sub"], job_listing.job_description,
+                                                         job_listing.url)
+    state = await asyncio.to_thread(get_session, claims)
+    state = await select_baseline(claims["sub"], job_description, state)
+    with stage_timer("pre_assess"):
+        preliminary = await asyncio.to_thread(pre_assess, job_description, state.resume_baseline)
+    prompt, cache_key = await asyncio.to_thread(
+        prepare_review_prompt, job_description, state)
+    cached = await asyncio.to_thread(lookup_llm_cache, cache_key, job_listing.no_cache)
+    if cached is None:
+        print(f"{datetime.datetime.now()}: streaming OpenAI with prompt length", len(prompt))
+    return StreamingResponse(_stream_llm_review(prompt, claims["sub"], job_description, job_listing,
+                                                cache_key, cached, preliminary),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.post("/review/preassess")
+async def preassess_review(job_listing: JobListing, creds=Security(security)):
+    """Return a preliminary Fit and Gap_Map from local keyword matching of the
+    session's baseline resume against the job description, in milliseconds and
+    without an LLM call. Fit.preliminary is true; the LLM review replaces it.
+    """
+    if job_listing.demo:
+        return await asyncio.to_thread(lambda: pre_assess(assets.text(JOB_DESCRIPTION_DEMO_FILE),
+                                                          assets.text(RESUME_DEMO_FILE)))
+
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    job_description, _ = await canonical_job_description(claims["sub"], job_listing.job_description,
+                                                         job_listing.url)
+    state = await asyncio.to_thread(get_session, claims)
+    # a preview: uses the variant a review would pick, but leaves the session as is
+    state = with_variant(state, await closest_variant(claims["sub"], job_description, state))
+    with stage_timer("pre_assess"):
+        return await asyncio.to_thread(pre_assess, job_description, state.resume_baseline)
+
+
+class BatchListing(BaseModel):
+    """One listing in a /review/batch request: a job description, a URL, or both."""
+    job_description: str | None = None
+    url: str | None = None
+
+
+class BatchReview(BaseModel):
+    """Define the shape of data expected by /review/batch."""
+    listings: list[BatchListing]  # listings to screen against the session's baseline resume
+    demo: bool = False   # if true, return static demo Fit/Gap_Map for every listing
+    no_cache: bool = False  # if true, skip the LLM response cache lookup
+
+
+async def _screen_listing(index: int, listing: BatchListing, sub: str, state: SessionState,
+                          no_cache: bool, limit: asyncio.Semaphore) -> dict:
+    """Score one batch listing with the screening prompt; raise on failure."""
+    async with limit:
+        job_description = listing.job_description
+        if not job_description:
+            if not listing.url:
+                raise ValueError("listing needs a job_description or a url")
+            job_description = await fetch_job_description(listing.url)
+        job_description, match = await canonical_job_description(sub, job_description, listing.url)
+        # this listing only; the session baseline is left as is
+        state = with_variant(state, await closest_variant(sub, job_description, state))
+        prompt, cache_key = await asyncio.to_thread(prepare_screen_prompt, job_description, state)
+        llm_response_json = await asyncio.to_thread(lookup_llm_cache, cache_key, no_cache)
+        cache_hit = llm_response_json is not None
+        if not cache_hit:
+            llm_response_json = await validate_llm_response(
+                prompt, await prompt_llm(prompt), ScreenOutput)
+        screen = json.loads(llm_response_json)
+        fit, gap_map = screen["Fit"], screen["Gap_Map"]
+        if not cache_hit:
+            await asyncio.to_thread(llm_cache.put, cache_key, llm_response_json)
+    return {"index": index, "url": listing.url, "job_description": job_description,
+            "duplicate_of": match.id if match and match.kind != "new" else None,
+            "resume_variant": state.resume_variant, "Fit": fit, "Gap_Map": gap_map}
+
+
+def _fit_score(result: dict) -> float:
+    try:
+        return float(result["Fit"].get("score"))
+    except (AttributeError, TypeError, ValueError):
+        return float("-inf")
+
+
+@app.post("/review/batch")
+@traceable(name="batch_review_endpoint")
+async def batch_review(batch: BatchReview, creds=Security(security)):
+    """Screen one resume against many job listings and rank them by Fit score.
+    Algo:
+    1. If demo is true, return the canned Fit/Gap_Map for every listing
+    2. Fetch job descriptions given only by URL, and resolve exact duplicates of
+       listings the user already saw to their canonical text
+    3. Run the screening prompt (Fit and Gap_Map only) for every listing, at
+       most BATCH_CONCURRENCY at a time, reusing cached LLM responses
+    4. Return results ranked by Fit score, plus per-listing errors
+    Tailored resumes and redlines are not generated here: the client calls
+    /review with a result's job_description when the user opens that listing.
+    """
+    if len(batch.listings) > BATCH_MAX_LISTINGS:
         raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"generate_review: OpenAI call failed: ({type(e).__name__}): {e}"
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A batch can have at most {BATCH_MAX_LISTINGS} listings."
         )
+    if batch.demo:
+        demo, demo_jd = await asyncio.to_thread(
+            lambda: (assets.json(RESPONSE_REVIEW_DEMO_FILE), assets.text(JOB_DESCRIPTION_DEMO_FILE)))
+        results = [{"index": i, "url": listing.url,
+                    "job_description": listing.job_description or demo_jd,
+                    "Fit": demo["Fit"], "Gap_Map": demo["Gap_Map"]}
+                   for i, listing in enumerate(batch.listings)]
+        return {"results": results, "errors": []}
 
-    # rotate the files to keep the last two LLM responses
-    if OUTPUT_FROM_LLM_CURRENT_FILE.exists():
-        os.replace(OUTPUT_FROM_LLM_CURRENT_FILE, OUTPUT_FROM_LLM_PRIOR_FILE)
-    OUTPUT_FROM_LLM_CURRENT_FILE.write_text(llm_response_json)
+    # authenticate/authorize
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    tracing.set_user(claims["sub"])
 
-    # diff the baseline and revised resumes, and save the diff in the API response
-    response = json.loads(llm_response_json)
-    revised_resume = response["Tailored_Resume"]
-    RESUME_REVISED_FILE.write_text(revised_resume)  # save revised resume
-    baseline_resume = RESUME_BASELINE_FILE.read_text()
-    response["Tailored_Resume"] = create_resume_diff(baseline_resume, revised_resume)
+    state = await asyncio.to_thread(get_session, claims)
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+    outcomes = await asyncio.gather(
+        *(_screen_listing(i, listing, claims["sub"], state, batch.no_cache, limit)
+          for i, listing in enumerate(batch.listings)),
+        return_exceptions=True,
+    )
 
-    return response
+    results, errors = [], []
+    for i, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            print(f"batch_review: listing {i} failed:", type(outcome).__name__, str(outcome))
+            errors.append({"index": i, "url": batch.listings[i].url,
+                           "error": f"{type(outcome).__name__}: {outcome}"})
+        else:
+            results.append(outcome)
+    results.sort(key=_fit_score, reverse=True)
+    return {"results": results, "errors": errors}
 
 
 class QuestionAnswers(BaseModel):
     """Define the shape of data expected by /questions_answers."""
     qa_pairs: list[dict[str, str]]  # list of question-answer pairs
     demo: bool = False   # if true, return static demo response
+    no_cache: bool = False  # if true, skip the LLM response cache lookup
+    redline_format: RedlineFormat = "html"  # shape of Tailored_Resume in the response
+    changes_since_prior: bool = False  # if true, also show what the answers changed
 
 
 @app.post("/questions")
 @traceable(name="process_questions_and_answers_endpoint")
-def process_questions_and_answers(user_response: QuestionAnswers,
-                                  creds=Security(security)
-                                  ):
+async def process_questions_and_answers(user_response: QuestionAnswers,
+                                        creds=Security(security)
+                                        ):
     """Generate an updated review and resume based on candidate's answers.
     Algo:
     1. If demo is true, return canned response
-    2. Save user response to USER_RESPONSE_FILE
-    4. Call generate_review() to get the updated review and resume
+    2. Save user response to the user's session
+    3. Call generate_review() with the session's job description
     """
     # return stubbed response for demo
     if user_response.demo:
-        response = json.loads(RESPONSE_REVIEW_ADD_INFO_DEMO_FILE.read_text())
-        return response
+        return Response(content=await asyncio.to_thread(assets.json_bytes, RESPONSE_REVIEW_ADD_INFO_DEMO_FILE),
+                        media_type="application/json")
 
     # authenticate/authorize before proceeding
-    claims = verify_token(creds)
+    claims = await asyncio.to_thread(verify_token, creds)
     check_authorized_user(claims)
 
-    # save user response to file
-    user_response_dict = user_response.qa_pairs
-    USER_RESPONSE_FILE.write_text(json.dumps(user_response_dict, indent=4))
+    # save user response to the session
+    def save_qa_pairs(state: SessionState):
+        state.qa_pairs = user_response.qa_pairs
+    state = await asyncio.to_thread(sessions.update, claims["sub"], save_qa_pairs)
 
     # call generate_review() to get the updated review and resume
     job_listing = JobListing(
-        job_description=JOB_DESCRIPTION_FILE.read_text(),
+        job_description=state.job_description,
         url="Follow-up prompt from user",
+        no_cache=user_response.no_cache,
+        redline_format=user_response.redline_format,
+        changes_since_prior=user_response.changes_since_prior,
     )
-    response = generate_review(job_listing=job_listing, creds=creds)
+    response = await generate_review(job_listing=job_listing, creds=creds)
 
     return response
 
 
+def _set_baseline(sub: str, resume: str, variant: str | None = None, pinned: bool = False) -> SessionState:
+    """Make resume the baseline of the user's session and return the new state.
+    A pinned baseline is kept by later reviews instead of auto-selecting a variant."""
+    def set_baseline(state: SessionState):
+        state.resume_baseline = resume
+        state.resume_variant = variant
+        state.resume_pinned = pinned
+    return sessions.update(sub, set_baseline)
+
+
+def _load_resume(sub: str, source: Path) -> str:
+    """Pin a saved resume as the baseline of the user's session and return its text."""
+    resume = assets.text(source)
+    _set_baseline(sub, resume, pinned=True)
+    return resume
+
+
+def _load_variant(sub: str, name: str) -> str | None:
+    """Pin a resume library variant as the baseline of the user's session and return its text."""
+    resume = resume_library.get(sub, name)
+    if resume is not None:
+        _set_baseline(sub, resume, name, pinned=True)
+    return resume
+
+
+def _unpin_baseline(sub: str) -> SessionState:
+    return sessions.update(sub, lambda state: setattr(state, "resume_pinned", False))
+
+
 @app.get("/resume")
-def manage_resume(command: str, demo: bool = False,
-                  creds = Security(security),
-                  ):
-    """Return the user's saved resume."""
+async def manage_resume(command: str, demo: bool = False, name: str | None = None,
+                        creds = Security(security),
+                        ):
+    """Manage the user's saved resumes.
+    - load: pin the saved resume (or the library variant `name`) as the session baseline and return it;
+      reviews keep a pinned baseline instead of picking the closest library variant
+    - auto: unpin the baseline, so reviews pick the closest library variant again
+    - list: return the names of the user's library variants, the current baseline's variant and
+      whether it is pinned
+    """
     # return stubbed response for demo (no auth required for demo)
     if demo:
-        shutil.copyfile(RESUME_DEMO_FILE, RESUME_BASELINE_FILE)
-        return {"resume": RESUME_BASELINE_FILE.read_text()}
+        return {"resume": await asyncio.to_thread(assets.text, RESUME_DEMO_FILE)}
 
     # If not in demo and no credentials provided, avoid 401 spam and return a clear error
     if not creds:
         return {"error": "Authentication required to load resume."}
 
     # authenticate/authorize before proceeding
-    claims = verify_token(creds)
+    claims = await asyncio.to_thread(verify_token, creds)
     check_authorized_user(claims)
 
-    if command == "load":
-        shutil.copyfile(RESUME_FILE, RESUME_BASELINE_FILE)
-        response = {"resume": RESUME_FILE.read_text()}
+    if command == "load" and name:
+        resume = await asyncio.to_thread(_load_variant, claims["sub"], name)
+        if resume is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No resume named {name!r}")
+        response = {"resume": resume, "name": name}
+    elif command == "load":
+        response = {"resume": await asyncio.to_thread(_load_resume, claims["sub"], RESUME_FILE)}
+    elif command == "list":
+        variants = await asyncio.to_thread(resume_library.variants, claims["sub"])
+        state = await asyncio.to_thread(get_session, claims)
+        response = {"resumes": variants, "current": state.resume_variant, "pinned": state.resume_pinned}
+    elif command == "auto":
+        await asyncio.to_thread(_unpin_baseline, claims["sub"])
+        response = {"pinned": False}
     else:
         response = {"error": "Invalid command"}
     return response
+
+
+class ResumeVariant(BaseModel):
+    """Define the shape of data expected by PUT /resume/library/{name}."""
+    resume: str  # plain text resume
+
+
+@app.put("/resume/library/{name}")
+async def save_resume_variant(name: str, variant: ResumeVariant, creds=Security(security)):
+    """Add or replace a named resume variant (e.g. "ic", "manager", "fintech") in the user's library.
+    Reviews pick the variant closest to each job description as the baseline (RESUME_AUTO_SELECT).
+    """
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    if not name.strip() or not variant.resume.strip():
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Resume name and text must not be empty")
+    try:
+        await asyncio.to_thread(resume_library.save, claims["sub"], name, variant.resume)
+    except LibraryFull as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return {"saved": name}
+
+
+@app.delete("/resume/library/{name}")
+async def delete_resume_variant(name: str, creds=Security(security)):
+    """Remove a resume variant from the user's library; the session baseline is left as is."""
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    if not await asyncio.to_thread(resume_library.delete, claims["sub"], name):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No resume named {name!r}")
+    return {"deleted": name}
+
+
+@app.get("/revisions")
+async def list_revisions(creds=Security(security)):
+    """List the user's review rounds (number, time, size), oldest first."""
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    return {"revisions": await asyncio.to_thread(revisions.revisions, claims["sub"])}
+
+
+@app.get("/revisions/{number}")
+async def get_revision(number: int, compare_to: int | None = None,
+                       redline_format: RedlineFormat = "html", creds=Security(security)):
+    """Return a review round: the LLM response, its tailored resume and the job description.
+    With compare_to, also return Changes: a redline of that round's tailored resume against this one's.
+    """
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    revision = await asyncio.to_thread(revisions.get, claims["sub"], number)
+    other = await asyncio.to_thread(revisions.get, claims["sub"], compare_to) if compare_to is not None else None
+    if revision is None or (compare_to is not None and other is None):
+        missing = number if revision is None else compare_to
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No revision {missing}")
+    response = {
+        "number": revision["number"],
+        "created_at": revision["created_at"],
+        "job_description": revision["job_description"],
+        "llm_response": json.loads(revision["llm_response"]),
+        "tailored_resume": revision["resume"],
+    }
+    if other is not None:
+        response["Changes"] = await asyncio.to_thread(
+            create_resume_diff, other["resume"], revision["resume"], redline_format)
+    return response
+
+
+@app.post("/assets/reload")
+async def reload_assets(creds=Security(security)):
+    """Drop cached prompt templates, user files and demo payloads so they are re-read."""
+    claims = await asyncio.to_thread(verify_token, creds)
+    check_authorized_user(claims)
+    return {"reloaded": assets.reload()}
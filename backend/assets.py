@@ -0,0 +1,92 @@
+"""In-memory cache of prompt templates, user files and demo payloads."""
+import json
+import threading
+import time
+from pathlib import Path
+
+
+class _Asset:
+    """One cached file and the forms derived from it."""
+    def __init__(self, signature, text: str | None):
+        self.signature = signature  # (mtime_ns, size), or None if the file is missing
+        self.text = text
+        self.checked_at = time.monotonic()
+        self.parsed = None
+        self.json_bytes = None
+
+
+class AssetCache:
+    """
+    Load small files once and serve them from memory.
+    A file is re-stat'ed at most every check_interval seconds and re-read
+    only when its mtime or size changed, so edits to prompts or demo files
+    are picked up without a restart. reload() drops entries immediately.
+    Parsed JSON is shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._assets: dict[Path, _Asset] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path: Path):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _get(self, path: Path) -> _Asset:
+        path = Path(path)
+        asset = self._assets.get(path)
+        now = time.monotonic()
+        if asset is not None and now - asset.checked_at < self.check_interval:
+            return asset
+        signature = self._signature(path)
+        if asset is not None and signature == asset.signature:
+            asset.checked_at = now
+            return asset
+        with self._lock:
+            text = path.read_text() if signature is not None else None
+            asset = _Asset(signature, text)
+            self._assets[path] = asset
+        return asset
+
+    def text_or_none(self, path: Path) -> str | None:
+        """Return the file's text, or None if it does not exist."""
+        return self._get(path).text
+
+    def text(self, path: Path) -> str:
+        """Return the file's text."""
+        text = self.text_or_none(path)
+        if text is None:
+            raise FileNotFoundError(path)
+        return text
+
+    @staticmethod
+    def _parsed(asset: _Asset, path: Path):
+        if asset.text is None:
+            raise FileNotFoundError(path)
+        if asset.parsed is None:
+            asset.parsed = json.loads(asset.text)
+        return asset.parsed
+
+    def json(self, path: Path):
+        """Return the parsed JSON content of the file (read-only)."""
+        return self._parsed(self._get(path), path)
+
+    def json_bytes(self, path: Path) -> bytes:
+        """Return the file's JSON re-serialized compactly as UTF-8, ready to send."""
+        asset = self._get(path)
+        if asset.json_bytes is None:
+            asset.json_bytes = json.dumps(self._parsed(asset, path), ensure_ascii=False,
+                                          separators=(",", ":")).encode("utf-8")
+        return asset.json_bytes
+
+    def reload(self) -> int:
+        """Drop all cached files so the next access reads them again."""
+        with self._lock:
+            count = len(self._assets)
+            self._assets.clear()
+        return count
@@ -1,5 +1,7 @@
 """Utility program to create files for demo API response and input to the LLM."""
 import json
+import random
+import re
 from pathlib import Path
 from backend.api import create_resume_diff
 
@@ -20,6 +22,14 @@ OUTPUT_FROM_LLM_CURRENT_FILE = TEMP_DIR / "LLM_response_current.json"
 JOB_DESCRIPTION_DEMO_FILE = DEMO_DIR / "job_description_demo.txt"
 RESPONSE_REVIEW_ADD_INFO_DEMO_FILE = DEMO_DIR / "API_response_review_add_info_demo.json"
 RESPONSE_REVIEW_DEMO_FILE = DEMO_DIR / "API_response_review_demo.json"
+RESUME_DEMO_FILE = DEMO_DIR / "resume_demo.txt"
+# Benchmark corpus
+BENCH_CORPUS_DIR = BASE_DIR / "bench" / "corpus"
+CORPUS_PAGES = (1, 2, 5, 10, 20, 25)
+CORPUS_EDIT_DENSITIES = (0.05, 0.25, 0.6, 1.0)
+# words a tailoring pass typically weaves in
+_TAILORING_WORDS = ("cross-functional", "data-driven", "scalable", "GTM", "OKRs",
+                    "stakeholder", "AI/ML", "end-to-end", "roadmap", "P&L")
 
 
 def create_prompt_json_input():
@@ -61,11 +71,82 @@ def create_api_response(path_file: Path):
     path_file.write_text(json.dumps(api_response_dict, indent=4))
 
 
+def scale_text(text: str, pages: int, seed: int = 0) -> str:
+    """
+    Repeat a one-page demo text `pages` times. Numbers and capitalized names
+    in each copy are varied so copies are distinct, as in a long real resume.
+    """
+    rng = random.Random(seed)
+    copies = [text]
+    for _ in range(1, pages):
+        copy = re.sub(r"\d+", lambda m: str(rng.randint(1, 99)), text)
+        copy = re.sub(r"\b([A-Z]{3,})\b", lambda m: m.group(1)[::-1] if rng.random() < 0.5 else m.group(1), copy)
+        copies.append(copy)
+    return "\n".join(copies)
+
+
+def edit_text(text: str, density: float, seed: int = 0) -> str:
+    """
+    Rewrite about `density` of the non-blank lines the way a tailoring pass
+    does: reword, reorder, add keywords, drop or add the odd bullet.
+    density 0.05 is a few bullet tweaks; 1.0 rewrites every line.
+    """
+    rng = random.Random(seed)
+    out = []
+    for line in text.splitlines(keepends=True):
+        if not line.strip() or rng.random() >= density:
+            out.append(line)
+            continue
+        action = rng.random()
+        if action < 0.05:  # drop the line
+            continue
+        words = line.rstrip("\n").split(" ")
+        for _ in range(max(1, len(words) // 6)):
+            i = rng.randrange(len(words))
+            if rng.random() < 0.5:
+                words[i] = rng.choice(_TAILORING_WORDS)
+            else:
+                words.insert(i, rng.choice(_TAILORING_WORDS))
+        if action > 0.9 and len(words) > 4:  # move a phrase to the front
+            words = words[len(words) // 2:] + words[:len(words) // 2]
+        out.append(" ".join(words) + ("\n" if line.endswith("\n") else ""))
+        if action > 0.97:  # add a bullet
+            out.append(f"* Led {rng.choice(_TAILORING_WORDS)} initiative across {rng.randint(2, 9)} teams\n")
+    return "".join(out)
+
+
+def create_benchmark_case(pages: int, density: float, seed: int = 0) -> dict:
+    """Return a baseline resume, a tailored revision and a job description of about `pages` pages."""
+    baseline = scale_text(RESUME_DEMO_FILE.read_text(), pages, seed)
+    return {
+        "pages": pages,
+        "density": density,
+        "baseline": baseline,
+        "revised": edit_text(baseline, density, seed),
+        "job_description": scale_text(JOB_DESCRIPTION_DEMO_FILE.read_text(), pages, seed),
+    }
+
+
+def create_benchmark_corpus(out_dir: Path = BENCH_CORPUS_DIR):
+    """Write the benchmark corpus (every size and edit density) to out_dir for inspection."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for pages in CORPUS_PAGES:
+        for density in CORPUS_EDIT_DENSITIES:
+            case = create_benchmark_case(pages, density)
+            stem = f"p{pages:02d}_d{int(density * 100):03d}"
+            (out_dir / f"{stem}_baseline.txt").write_text(case["baseline"])
+            (out_dir / f"{stem}_revised.txt").write_text(case["revised"])
+        (out_dir / f"p{pages:02d}_job_description.txt").write_text(
+            create_benchmark_case(pages, 0)["job_description"])
+    print(f"Benchmark corpus written to {out_dir}")
+
+
 if __name__ == "__main__":
     print("Demo file maker")
     print("1. Create JSON input for LLM ")
     print("2. Create API response for first review")
     print("3. Create API response for review with additional info")
+    print("4. Create benchmark corpus")
     print()
     choice = input("What do you want to do? ")
 
@@ -76,6 +157,8 @@ if __name__ == "__main__":
             create_api_response(RESPONSE_REVIEW_DEMO_FILE)
         case "3":
             create_api_response(RESPONSE_REVIEW_ADD_INFO_DEMO_FILE)
+        case "4":
+            create_benchmark_corpus()
         case _:
             print("Invalid choice")
 
@@ -0,0 +1,333 @@
+"""Fetch job listing pages and extract the job description text as the page streams in."""
+import asyncio
+import codecs
+import ipaddress
+import json
+import re
+import socket
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+import httpx
+
+# content never part of the job text
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer",
+              "form", "button", "select", "iframe", "title"}
+# elements that start a line; blank lines between paragraphs are kept because
+# boilerplate stripping (prompt_budget.py) ends a dropped section at a blank line
+_BLOCK_TAGS = {"p", "div", "section", "article", "main", "ul", "ol", "tr", "h1", "h2", "h3",
+               "h4", "h5", "h6", "table", "dl", "blockquote", "pre"}
+_VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "embed",
+              "source", "track", "wbr"}
+_SPACES = re.compile(r"[ \t\r\f\v ]+")
+_NEWLINES = re.compile(r"[\r\n]+")
+MAX_REDIRECTS = 5  # each hop's Location is checked with check_url
+_REDIRECT_CODES = {301, 302, 303, 307, 308}
+
+
+class JobDescriptionFetchError(Exception):
+    """Raised when a URL cannot be fetched or holds no job description."""
+
+
+class JobTextExtractor(HTMLParser):
+    """
+    Incremental HTML to job text. Feed decoded chunks as they arrive; only
+    the extracted text (capped at max_chars per candidate) is kept, never
+    the page. Candidates, best first: the description of a schema.org
+    JobPosting in JSON-LD (what most job boards embed), the visible text of
+    <main>, then the visible text of the whole page.
+    """
+
+    def __init__(self, max_chars: int = 50_000):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self._skipping = []  # open skipped elements (nav, script, ...), innermost last
+        self._main_tag = None  # tag of the <main> or role="main" element being read
+        self._main_depth = 0
+        self._pre_depth = 0  # inside <pre>, source newlines are kept
+        self._page, self._main = [], []
+        self._page_len = self._main_len = 0
+        self._json_ld = None  # chunks of the JSON-LD script being read
+        self._json_ld_len = 0
+        self.posting = None  # {"title", "description"} from JSON-LD
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script" and ("type", "application/ld+json") in attrs and self.posting is None:
+            self._json_ld, self._json_ld_len = [], 0
+        if tag in _VOID_TAGS:
+            if tag == "br":
+                self._text("\n")
+            return
+        if tag in _SKIP_TAGS:
+            self._skipping.append(tag)
+        if self._skipping:
+            return
+        if self._main_tag is None and (tag == "main" or ("role", "main") in attrs):
+            self._main_tag = tag
+        if tag == self._main_tag:
+            self._main_depth += 1
+        if tag == "pre":
+            self._pre_depth += 1
+        if tag in _BLOCK_TAGS:
+            self._text("\n\n")
+        elif tag in ("li", "dd", "dt"):
+            self._text("\n* " if tag == "li" else "\n")
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._json_ld is not None:
+            self._read_json_ld("".join(self._json_ld))
+            self._json_ld = None
+        if tag in _VOID_TAGS:
+            return
+        if tag in self._skipping:  # also closes skipped elements left open inside it
+            del self._skipping[len(self._skipping) - 1 - self._skipping[::-1].index(tag):]
+            return
+        if self._skipping:
+            return
+        if tag in _BLOCK_TAGS:
+            self._text("\n\n")
+        if tag == "pre" and self._pre_depth:
+            self._pre_depth -= 1
+        if tag == self._main_tag and self._main_depth:
+            self._main_depth -= 1
+
+    def handle_data(self, data):
+        if self._json_ld is not None:
+            if self._json_ld_len < self.max_chars * 4:
+                self._json_ld.append(data)
+                self._json_ld_len += len(data)
+            return
+        if not self._skipping:  # outside <pre>, source line breaks are just spaces
+            self._text(data if self._pre_depth else _NEWLINES.sub(" ", data))
+
+    def _text(self, data: str):
+        if self._page_len < self.max_chars:
+            self._page.append(data)
+            self._page_len += len(data)
+        if self._main_depth and self._main_len < self.max_chars:
+            self._main.append(data)
+            self._main_len += len(data)
+
+    def _read_json_ld(self, text: str):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        items = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for item in items:
+            kind = item.get("@type") if isinstance(item, dict) else None
+            if (kind == "JobPosting" or isinstance(kind, list) and "JobPosting" in kind) \
+                    and isinstance(item.get("description"), str):
+                self.posting = {"title": str(item.get("title") or ""), "description": item["description"]}
+                return
+
+    @property
+    def done(self) -> bool:
+        """True once a JSON-LD job posting was found, so the rest of the page can be skipped."""
+        return self.posting is not None
+
+    def text(self) -> str:
+        """Return the best job text extracted so far."""
+        if self.posting:
+            body = html_to_text(self.posting["description"], self.max_chars)
+            title = self.posting["title"].strip()
+            return f"{title}\n\n{body}" if title and title not in body[:len(title) + 50] else body
+        main = _clean("".join(self._main))
+        return main or _clean("".join(self._page))
+
+
+def _clean(text: str) -> str:
+    """Collapse whitespace within lines and runs of blank lines."""
+    lines = (_SPACES.sub(" ", line).strip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def html_to_text(html: str, max_chars: int = 50_000) -> str:
+    """Return the visible text of an HTML fragment."""
+    extractor = JobTextExtractor(max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return _clean("".join(extractor._page))
+
+
+def resolve_host(host: str, port: int) -> list[str]:
+    """Return every address host resolves to."""
+    return [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+
+
+def check_url(url: str, resolve=resolve_host) -> str:
+    """
+    Return the URL if it may be fetched: http(s) only, and a host that is
+    neither "localhost" nor resolves to any loopback, private or link-local
+    address (the server must not be used to reach internal services). Raise
+    JobDescriptionFetchError otherwise. With resolve=None only literal
+    addresses are checked. The name is resolved again when connecting, so
+    a DNS answer that changes in between is not caught; filter egress too.
+    """
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise JobDescriptionFetchError(f"Not an http(s) URL: {url!r}")
+    host = parts.hostname
+    if host == "localhost" or host.endswith(".localhost"):
+        raise JobDescriptionFetchError(f"Refusing to fetch local URL: {url!r}")
+    try:
+        addresses = [ipaddress.ip_address(host)]
+    except ValueError:  # a name
+        if resolve is None:
+            return url.strip()
+        try:
+            addresses = [ipaddress.ip_address(a.partition("%")[0]) for a in resolve(host, parts.port or 0)]
+        except (OSError, UnicodeError, ValueError) as e:
+            raise JobDescriptionFetchError(f"Could not resolve {host!r}: {e}") from e
+    if not addresses or not all(address.is_global for address in addresses):
+        raise JobDescriptionFetchError(f"Refusing to fetch non-public address: {url!r}")
+    return url.strip()
+
+
+class _Entry:
+    __slots__ = ("text", "etag", "last_modified", "checked_at")
+
+    def __init__(self, text: str, etag: str | None, last_modified: str | None, checked_at: float):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = checked_at
+
+
+class JobDescriptionFetcher:
+    """
+    Fetch job descriptions on a shared pooled httpx client.
+    - Streaming: the body is decoded and parsed chunk by chunk and the
+      download stops at max_bytes or as soon as a JSON-LD job posting is
+      complete, so whole pages are never held in memory.
+    - Cache: extracted text per URL in a bounded LRU. Entries younger than
+      fresh_seconds are returned without a request; older ones are
+      revalidated with If-None-Match / If-Modified-Since, and a 304 reuses
+      the cached text without downloading the page.
+    - Concurrent fetches of the same URL share one download.
+    - Redirects are followed by hand, up to MAX_REDIRECTS, and the host of
+      the URL and of every Location is resolved with `resolve` and checked
+      by check_url before it is requested.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, max_bytes: int = 2 * 1024 * 1024,
+                 timeout: float = 15.0, max_entries: int = 512, fresh_seconds: float = 3600.0,
+                 max_chars: int = 50_000, user_agent: str = "Mozilla/5.0 (compatible; ResumeReviewBot/1.0)",
+                 resolve=resolve_host):
+        self.client = client
+        self.resolve = resolve
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.fresh_seconds = fresh_seconds
+        self.max_chars = max_chars
+        self.user_agent = user_agent
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self.errors = 0
+
+    def _remember(self, url: str, entry: _Entry):
+        self._cache[url] = entry
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def fetch(self, url: str) -> str:
+        """Return the job description text at url, from cache when possible."""
+        url = check_url(url, resolve=None)  # resolved before each request in _fetch
+        entry = self._cache.get(url)
+        if entry and time.monotonic() - entry.checked_at < self.fresh_seconds:
+            self._cache.move_to_end(url)
+            self.hits += 1
+            return entry.text
+        if url in self._inflight:
+            return await asyncio.shield(self._inflight[url])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            text = await self._fetch(url, entry)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.errors += 1
+            future.set_exception(e)
+            future.exception()  # mark retrieved when no one else is waiting
+            raise
+        else:
+            future.set_result(text)
+            return text
+        finally:
+            del self._inflight[url]
+
+    async def _fetch(self, url: str, entry: _Entry | None) -> str:
+        headers = {"User-Agent": self.user_agent, "Accept": "text/html,application/xhtml+xml,text/plain"}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        target = url
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                await asyncio.to_thread(check_url, target, self.resolve)
+                async with self.client.stream("GET", target, headers=headers, timeout=self.timeout,
+                                              follow_redirects=False) as response:
+                    if response.status_code in _REDIRECT_CODES and "Location" in response.headers:
+                        target = str(response.url.join(response.headers["Location"]))
+                        continue
+                    if response.status_code == 304 and entry:
+                        entry.checked_at = time.monotonic()
+                        self._remember(url, entry)
+                        self.revalidated += 1
+                        return entry.text
+                    if response.status_code != 200:
+                        raise JobDescriptionFetchError(f"{url} returned HTTP {response.status_code}")
+                    text = await self._extract(response)
+                    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+                    break
+            else:
+                raise JobDescriptionFetchError(f"{url} redirected more than {MAX_REDIRECTS} times")
+        except httpx.HTTPError as e:
+            raise JobDescriptionFetchError(f"Could not fetch {url}: {type(e).__name__} {e}") from e
+        if not text:
+            raise JobDescriptionFetchError(f"No job description text found at {url}")
+        self.downloads += 1
+        self._remember(url, _Entry(text, etag, last_modified, time.monotonic()))
+        return text
+
+    async def _extract(self, response: httpx.Response) -> str:
+        """Parse the body as it streams; stop at max_bytes or a complete JSON-LD posting."""
+        content_type = response.headers.get("Content-Type", "text/html").lower()
+        if "html" not in content_type and not content_type.startswith("text/"):
+            raise JobDescriptionFetchError(f"Unsupported content type {content_type!r}")
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        if "html" not in content_type:  # plain text listing
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(decoder.decode(chunk[:self.max_bytes - size]))
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break
+            return _clean("".join(chunks) + decoder.decode(b"", final=True))[:self.max_chars]
+
+        extractor = JobTextExtractor(self.max_chars)
+        size = 0
+        async for chunk in response.aiter_bytes():
+            extractor.feed(decoder.decode(chunk[:self.max_bytes - size]))
+            size += len(chunk)
+            if size >= self.max_bytes or extractor.done:
+                break
+        extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+        return extractor.text()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._cache), "hits": self.hits, "revalidated": self.revalidated,
+                "downloads": self.downloads, "errors": self.errors}
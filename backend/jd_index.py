@@ -0,0 +1,248 @@
+"""Index of reviewed job descriptions for exact and near-duplicate detection (MinHash + LSH in SQLite)."""
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Literal
+from pydantic import BaseModel
+from .prompt_budget import strip_jd_boilerplate
+
+_MERSENNE = (1 << 61) - 1
+_WORD = re.compile(r"[a-z0-9]+(?:[+#.][a-z0-9+#]+)*")
+
+
+class JDMatch(BaseModel):
+    """Result of indexing a job description."""
+    id: int  # index id of the matching (or added) job description
+    kind: Literal["exact", "near", "new"]
+    similarity: float  # estimated Jaccard similarity of the shingle sets (1.0 for exact)
+    job_description: str  # text to use: the user's first indexed copy if exact, else the text looked up
+
+
+def normalize_jd(text: str) -> list[str]:
+    """Return the words of a job description without boilerplate, case or punctuation."""
+    return _WORD.findall(strip_jd_boilerplate(text).lower())
+
+
+def shingles(words: list[str], size: int = 5) -> set[int]:
+    """Return 64-bit hashes of the overlapping `size`-word shingles."""
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return {int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "little")
+            for g in grams}
+
+
+class JobDescriptionIndex:
+    """
+    Fingerprints of each user's job descriptions, so copies of one listing
+    the user reviews on several sites resolve to the same canonical text (and
+    so the same prompts, LLM cache entries and provider prompt-cache
+    prefixes). Entries are scoped by user (`sub`): one user's text is never
+    matched against, or returned to, another.
+    - Exact: SHA-256 of the normalized words (boilerplate, case, punctuation
+      and whitespace removed). The first indexed copy is returned.
+    - Near: MinHash signatures of 5-word shingles, bucketed by LSH into
+      `bands` bands of num_perm / bands rows. A lookup reads only the rows
+      sharing a bucket with the new signature (indexed), so its cost does
+      not grow with the number of stored JDs; candidates whose estimated
+      Jaccard similarity is at least `threshold` are duplicates. A near
+      duplicate is only reported: the text looked up is returned unchanged,
+      since the words that differ (seniority, location) may be the ones
+      that matter.
+    Texts with fewer than `min_words` words only match exactly, and texts
+    with fewer than `min_exact_words` normalized words (e.g. a title, or a
+    JD that is all boilerplate) never match: they are keyed by a hash of
+    the raw text and always returned as they are. SQLite (WAL)
+    is shared by all workers; past `max_entries` the least recently seen
+    listings are dropped.
+    """
+
+    SWEEP_EVERY = 256  # inserts between evictions over max_entries
+
+    def __init__(self, db_file: Path, threshold: float = 0.85, num_perm: int = 128, bands: int = 16,
+                 min_words: int = 30, min_exact_words: int = 8, max_entries: int = 100_000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.db_file = Path(db_file)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_words = min_words
+        self.min_exact_words = min_exact_words
+        self.max_entries = max_entries
+        rng = random.Random(seed)  # fixed permutations: signatures are stored
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)]
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(jds)")]
+            if columns and "sub" not in columns:  # index from before entries were per user: rebuild
+                conn.execute("DROP TABLE jds")
+                conn.execute("DROP TABLE IF EXISTS lsh")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jds ("
+                " id INTEGER PRIMARY KEY,"
+                " sub TEXT NOT NULL,"
+                " content_hash TEXT NOT NULL,"
+                " url TEXT,"
+                " signature BLOB,"
+                " job_description TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " seen_at REAL NOT NULL,"
+                " UNIQUE (sub, content_hash))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lsh ("
+                " sub TEXT NOT NULL,"
+                " band INTEGER NOT NULL,"
+                " bucket INTEGER NOT NULL,"
+                " jd_id INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS lsh_bucket ON lsh (sub, band, bucket)")
+            conn.execute("CREATE INDEX IF NOT EXISTS lsh_jd ON lsh (jd_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jds_seen ON jds (seen_at)")
+            self._local.conn = conn
+        return conn
+
+    def init(self):
+        """Create the database if needed."""
+        self._connect()
+
+    def signature(self, hashes: set[int]) -> list[int]:
+        """Return the MinHash signature of a set of shingle hashes."""
+        return [min(((a * h + b) % _MERSENNE for h in hashes), default=_MERSENNE)
+                for a, b in self._perms]
+
+    def _buckets(self, signature: list[int]) -> list[int]:
+        """Return one signed 64-bit bucket per LSH band."""
+        buckets = []
+        for band in range(self.bands):
+            rows = array("Q", signature[band * self.rows:(band + 1) * self.rows]).tobytes()
+            buckets.append(int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "little", signed=True))
+        return buckets
+
+    def _similarity(self, signature: list[int], stored: bytes) -> float:
+        other = array("Q")
+        other.frombytes(stored)
+        return sum(x == y for x, y in zip(signature, other)) / self.num_perm
+
+    def lookup(self, sub: str, job_description: str, url: str | None = None) -> JDMatch:
+        """
+        Return how job_description matches the user's indexed ones: the
+        user's first copy of it if an exact duplicate, the id of a near
+        duplicate with job_description itself, or job_description itself,
+        which is then added.
+        """
+        words = normalize_jd(job_description)
+        conn = self._connect()
+        now = time.time()
+        if len(words) < self.min_exact_words:
+            # too little text to tell listings apart: never substitute another listing
+            content_hash = "raw:" + hashlib.sha256(job_description.encode()).hexdigest()
+            jd_id = self._insert(conn, sub, content_hash, url, None, None, job_description, now)[0]
+            return JDMatch(id=jd_id, kind="new", similarity=0.0, job_description=job_description)
+
+        content_hash = hashlib.sha256(" ".join(words).encode()).hexdigest()
+        row = conn.execute("SELECT id, job_description FROM jds WHERE sub = ? AND content_hash = ?",
+                           (sub, content_hash)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE jds SET seen_at = ? WHERE id = ?", (now, row[0]))
+            return JDMatch(id=row[0], kind="exact", similarity=1.0, job_description=row[1])
+
+        signature = buckets = None
+        if len(words) >= self.min_words:
+            signature = self.signature(shingles(words))
+            buckets = self._buckets(signature)
+            best = self._nearest(conn, sub, signature, buckets)
+            if best is not None:
+                jd_id, similarity = best
+                conn.execute("UPDATE jds SET seen_at = ? WHERE id = ?", (now, jd_id))
+                return JDMatch(id=jd_id, kind="near", similarity=similarity, job_description=job_description)
+
+        jd_id, text, inserted = self._insert(conn, sub, content_hash, url, signature, buckets,
+                                             job_description, now)
+        if not inserted:  # another worker indexed the same text first
+            return JDMatch(id=jd_id, kind="exact", similarity=1.0, job_description=text)
+        return JDMatch(id=jd_id, kind="new", similarity=0.0, job_description=job_description)
+
+    def _insert(self, conn, sub: str, content_hash: str, url: str | None, signature: list[int] | None,
+                buckets: list[int] | None, job_description: str, now: float) -> tuple[int, str, bool]:
+        """Add a JD unless the user's index has its hash; return (id, stored text, whether it was added)."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT INTO jds (sub, content_hash, url, signature, job_description, created_at, seen_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(sub, content_hash) DO NOTHING",
+                (sub, content_hash, url, array("Q", signature).tobytes() if signature else None,
+                 job_description, now, now))
+            if cursor.rowcount == 0:
+                jd_id, text = conn.execute("SELECT id, job_description FROM jds WHERE sub = ? AND content_hash = ?",
+                                           (sub, content_hash)).fetchone()
+                conn.execute("UPDATE jds SET seen_at = ? WHERE id = ?", (now, jd_id))
+                conn.execute("COMMIT")
+                return jd_id, text, False
+            jd_id = cursor.lastrowid
+            if buckets:
+                conn.executemany("INSERT INTO lsh (sub, band, bucket, jd_id) VALUES (?, ?, ?, ?)",
+                                 [(sub, band, bucket, jd_id) for band, bucket in enumerate(buckets)])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:  # lookups run on several worker threads
+            self._inserts += 1
+            sweep = self._inserts % self.SWEEP_EVERY == 0
+        if sweep:
+            self.evict_oldest()
+        return jd_id, job_description, True
+
+    def _nearest(self, conn, sub: str, signature: list[int], buckets: list[int]):
+        """Return (id, similarity) of the user's most similar indexed JD above threshold, or None."""
+        clauses = " OR ".join("(lsh.sub = ? AND band = ? AND bucket = ?)" for _ in buckets)
+        params = [value for band, bucket in enumerate(buckets) for value in (sub, band, bucket)]
+        candidates = conn.execute(
+            f"SELECT DISTINCT jds.id, jds.signature FROM lsh JOIN jds ON jds.id = lsh.jd_id"
+            f" WHERE {clauses}", params).fetchall()
+        best = None
+        for jd_id, stored in candidates:
+            similarity = self._similarity(signature, stored)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (jd_id, similarity)
+        return best
+
+    def evict_oldest(self) -> int:
+        """Drop the least recently seen JDs beyond max_entries; return how many."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (count,) = conn.execute("SELECT COUNT(*) FROM jds").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                ids = [(jd_id,) for (jd_id,) in conn.execute(
+                    "SELECT id FROM jds ORDER BY seen_at LIMIT ?", (excess,))]
+                conn.executemany("DELETE FROM lsh WHERE jd_id = ?", ids)
+                conn.executemany("DELETE FROM jds WHERE id = ?", ids)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return max(excess, 0)
+
+    def size(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM jds").fetchone()[0]
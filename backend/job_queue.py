@@ -0,0 +1,297 @@
+"""Durable background job queue in SQLite, drained by a pool of asyncio workers."""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Literal
+from pydantic import BaseModel
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class Job(BaseModel):
+    """One submitted job and, once finished, its result or error."""
+    id: str
+    sub: str
+    status: JobStatus
+    payload: dict[str, Any]
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    attempts: int = 0
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue or the user's share of it is full."""
+
+
+class JobQueue:
+    """
+    Jobs are rows in SQLite (WAL mode), so they survive a restart and can be
+    shared by several uvicorn workers. Each process runs `workers` asyncio
+    tasks that claim queued jobs and pass their payload to `handler`.
+
+    Fairness: the next job claimed is the oldest queued job of the user with
+    the fewest jobs running, so one user's backlog cannot starve the others.
+    Limits: submit() raises QueueFull past `max_queued` queued jobs in total
+    or `max_queued_per_user` for one user.
+    Recovery: a claim holds a lease of `timeout_seconds`; the handler is
+    cancelled when it runs longer, and a job whose lease ran out (its process
+    died) is claimed again, up to `max_attempts` times.
+    Finished jobs are deleted `retention_seconds` after they finish.
+    """
+
+    POLL_INTERVAL = 1.0  # seconds between checks for jobs submitted by other processes
+    SWEEP_EVERY = 256  # finished jobs between sweeps of expired ones
+    LEASE_GRACE = 30.0  # seconds a lease outlives the handler timeout
+
+    def __init__(self, db_file: Path, handler: Callable[[str, dict], Awaitable[dict]],
+                 workers: int = 4, max_queued: int = 500, max_queued_per_user: int = 10,
+                 timeout_seconds: float = 600, max_attempts: int = 2,
+                 retention_seconds: float = 24 * 3600):
+        self.db_file = Path(db_file)
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tasks: list[asyncio.Task] = []
+        self._changed: asyncio.Condition | None = None
+        self._finished = 0
+        self._running: set[str] = set()  # ids of jobs this process is running
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " sub TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL,"
+                " lease_until REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, sub, created_at)")
+            self._local.conn = conn
+        return conn
+
+    def init(self):
+        """Create the database if needed and delete expired finished jobs."""
+        self._connect()
+        self.evict_finished()
+
+    # --- synchronous store operations (run in worker threads) ---
+
+    def submit(self, sub: str, payload: dict) -> Job:
+        """Queue a job for the user and return it; raise QueueFull when over a limit."""
+        conn = self._connect()
+        job = Job(id=uuid.uuid4().hex, sub=sub, status="queued", payload=payload,
+                  created_at=time.time())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total, mine = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(sub = ?), 0) FROM jobs WHERE status = 'queued'",
+                (sub,),
+            ).fetchone()
+            if total >= self.max_queued:
+                raise QueueFull("The review queue is full, try again later.")
+            if mine >= self.max_queued_per_user:
+                raise QueueFull(f"At most {self.max_queued_per_user} queued reviews per user.")
+            conn.execute(
+                "INSERT INTO jobs (id, sub, status, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, sub, job.status, json.dumps(payload), job.created_at),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Return the job, or None if it does not exist (or was evicted)."""
+        row = self._connect().execute(
+            "SELECT id, sub, status, payload, result, error, attempts, created_at,"
+            " started_at, finished_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return Job(id=row[0], sub=row[1], status=row[2], payload=json.loads(row[3]),
+                   result=json.loads(row[4]) if row[4] is not None else None,
+                   error=row[5], attempts=row[6], created_at=row[7],
+                   started_at=row[8], finished_at=row[9])
+
+    def claim(self) -> Job | None:
+        """Mark the next job (fairest first) as running and return it, or None if idle."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # jobs whose lease ran out belong to a worker that died; give up after max_attempts
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL,"
+                " error = 'Job did not finish after ' || attempts || ' attempts.'"
+                " WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs AS j"
+                " WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)"
+                " ORDER BY (SELECT COUNT(*) FROM jobs AS r"
+                "           WHERE r.sub = j.sub AND r.status = 'running' AND r.lease_until >= ?),"
+                " created_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                    " started_at = ?, lease_until = ? WHERE id = ?",
+                    (now, now + self.timeout_seconds + self.LEASE_GRACE, row[0]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row[0]) if row is not None else None
+
+    def finish(self, job_id: str, result: dict | None = None, error: str | None = None):
+        """Record the outcome of a running job."""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL"
+            " WHERE id = ?",
+            ("failed" if error is not None else "done",
+             json.dumps(result) if result is not None else None, error, time.time(), job_id),
+        )
+        with self._lock:  # finish() runs on several worker threads
+            self._finished += 1
+            sweep = self._finished % self.SWEEP_EVERY == 0
+        if sweep:
+            self.evict_finished()
+
+    def release(self, job_ids):
+        """Put running jobs back in the queue without counting the interrupted attempt."""
+        conn = self._connect()
+        for job_id in job_ids:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0),"
+                " started_at = NULL, lease_until = NULL WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+
+    def evict_finished(self) -> int:
+        """Delete jobs that finished more than retention_seconds ago; return how many."""
+        cutoff = time.time() - self.retention_seconds
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def depth(self) -> dict:
+        """Return the number of queued and running jobs."""
+        counts = dict(self._connect().execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY status"
+        ).fetchall())
+        return {"queued": counts.get("queued", 0), "running": counts.get("running", 0)}
+
+    # --- asyncio side: worker pool and waiting ---
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _wait_changed(self, timeout: float):
+        try:
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def start(self):
+        """Start the worker tasks on the running event loop."""
+        self._changed = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the worker tasks and put the jobs they were running back in the queue."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        running, self._running = list(self._running), set()
+        await asyncio.to_thread(self.release, running)
+
+    async def enqueue(self, sub: str, payload: dict) -> Job:
+        """Submit a job and wake an idle worker."""
+        job = await asyncio.to_thread(self.submit, sub, payload)
+        if self._changed is not None:
+            await self._notify()
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Job | None:
+        """Return the job once it has finished, or as it is when timeout runs out."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await asyncio.to_thread(self.get, job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job.status in ("done", "failed") or remaining <= 0:
+                return job
+            if self._changed is None:
+                await asyncio.sleep(min(self.POLL_INTERVAL, remaining))
+            else:
+                await self._wait_changed(min(self.POLL_INTERVAL, remaining))
+
+    async def _claim(self) -> Job | None:
+        """Claim a job in a thread; if cancelled meanwhile, still track what was claimed."""
+        claim = asyncio.ensure_future(asyncio.to_thread(self.claim))
+        try:
+            return await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            job = await claim
+            if job is not None:
+                self._running.add(job.id)  # so stop() puts it back in the queue
+            raise
+
+    async def _worker(self, n: int):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"job worker {n}: claim failed:", type(e).__name__, str(e))
+                job = None
+            if job is None:
+                await self._wait_changed(self.POLL_INTERVAL)
+                continue
+            self._running.add(job.id)
+            try:
+                result = await asyncio.wait_for(self.handler(job.sub, job.payload),
+                                                self.timeout_seconds)
+                await asyncio.to_thread(self.finish, job.id, result)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self.finish, job.id, None,
+                                        f"Job timed out after {self.timeout_seconds:g} seconds.")
+            except Exception as e:
+                print(f"job worker {n}: job {job.id} failed:", type(e).__name__, str(e))
+                detail = getattr(e, "detail", None) or f"{type(e).__name__}: {e}"
+                await asyncio.to_thread(self.finish, job.id, None, str(detail))
+            self._running.discard(job.id)
+            await self._notify()
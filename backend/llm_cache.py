@@ -0,0 +1,146 @@
+"""Content-addressed cache of LLM responses with a memory tier and a disk tier."""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def make_cache_key(model: str, template: str, input_dict: dict) -> str:
+    """Hash the model, prompt template and prompt inputs into a stable cache key."""
+    canonical = json.dumps(
+        {"model": model, "template": template, "input": input_dict},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of raw LLM responses.
+    - Memory: LRU bounded by total bytes, per process.
+    - Disk: one file per key under cache_dir, shared by all workers, bounded
+      by total bytes (oldest files evicted first).
+    Entries older than ttl_seconds are ignored and removed in both tiers.
+    """
+
+    def __init__(self, cache_dir: Path, max_memory_bytes: int = 32 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None  # computed lazily from the directory
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _remember(self, key: str, stored_at: float, value: str):
+        """Add an entry to the memory tier, evicting least recently used entries."""
+        size = len(value)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old:
+                self._memory_bytes -= len(old[1])
+            self._memory[key] = (stored_at, value)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+                self._memory_bytes -= len(entry[1])
+
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if now - stored_at > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError
+            value = path.read_text()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        self._remember(key, stored_at, value)
+        with self._lock:
+            self.hits_disk += 1
+        return value
+
+    def put(self, key: str, value: str):
+        """Store a response in both tiers."""
+        now = time.time()
+        self._remember(key, now, value)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(value)
+        os.replace(tmp, path)  # atomic, so other workers never read a partial file
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(value)
+        self._evict_disk()
+
+    def record_bypass(self):
+        """Count a request that skipped the cache lookup."""
+        with self._lock:
+            self.bypassed += 1
+
+    def _evict_disk(self):
+        """Drop expired files, then the oldest files until under max_disk_bytes."""
+        with self._lock:
+            if self._disk_bytes is not None and self._disk_bytes <= self.max_disk_bytes:
+                return
+        now = time.time()
+        files = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
@@ -0,0 +1,265 @@
+"""Latency-aware LLM calls: hedged requests, ordered fallbacks and circuit breakers."""
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # openai is imported when the first endpoint is built (see api.get_llm_client)
+    from openai import AsyncOpenAI
+
+
+class CircuitOpen(Exception):
+    """Raised when every endpoint's circuit breaker is open."""
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """
+    Return True if an error says the endpoint is unhealthy (connection
+    errors, timeouts, HTTP 408, 429 and 5xx), and False if it is the
+    request's fault (other 4xx, e.g. bad request or context length
+    exceeded), which another endpoint would reject too.
+    """
+    from openai import APIConnectionError, APIStatusError
+    if isinstance(error, APIStatusError):
+        return error.status_code >= 500 or error.status_code in (408, 429)
+    return isinstance(error, (APIConnectionError, TimeoutError, OSError))
+
+
+class CircuitBreaker:
+    """
+    Stop sending requests to an endpoint after failure_threshold consecutive
+    failures. After reset_seconds one trial request is let through
+    (half-open): success closes the circuit, failure opens it again, and a
+    trial that ends without an outcome (cancelled) lets the next request try.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None  # monotonic time the circuit opened, None when closed
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def release_trial(self):
+        """End a request that neither succeeded nor failed, e.g. a cancelled one."""
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent request latencies of one endpoint, for percentile-based hedge delays."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Return the q-quantile (0-1) of recent latencies, or None without enough samples."""
+        if len(self.samples) < 10:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMEndpoint:
+    """One model on one OpenAI-compatible API, with its own breaker and latency history."""
+
+    def __init__(self, name: str, client: "AsyncOpenAI", model: str,
+                 breaker: CircuitBreaker | None = None):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.hedges = 0
+        self.hedge_wins = 0
+
+
+class HedgedLLMClient:
+    """
+    Send chat completions to an ordered list of endpoints.
+    - Hedging: if the first request to an endpoint has not returned after
+      the hedge_percentile latency of its recent requests (clamped to
+      [min_hedge_delay, max_hedge_delay], or initial_hedge_delay until there
+      is enough history), a second identical request is sent and the first
+      response wins; the other is cancelled. Set hedge=False to disable.
+    - Fallback: when an endpoint fails (after hedging) or its circuit is
+      open, the next endpoint in the list is tried. Only endpoint failures
+      (see is_endpoint_failure) count toward the circuit breaker and fall
+      back; errors caused by the request itself are raised as they are.
+    """
+
+    def __init__(self, endpoints: list[LLMEndpoint], hedge: bool = True,
+                 hedge_percentile: float = 0.95, initial_hedge_delay: float = 90.0,
+                 min_hedge_delay: float = 5.0, max_hedge_delay: float = 120.0):
+        if not endpoints:
+            raise ValueError("HedgedLLMClient needs at least one endpoint")
+        self.endpoints = endpoints
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+
+    def hedge_delay(self, endpoint: LLMEndpoint) -> float:
+        """Seconds to wait for the first request before sending a hedge."""
+        observed = endpoint.latency.percentile(self.hedge_percentile)
+        if observed is None:
+            return self.initial_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, observed))
+
+    async def _timed(self, endpoint: LLMEndpoint, kwargs: dict):
+        start = time.monotonic()
+        response = await endpoint.client.chat.completions.create(model=endpoint.model, **kwargs)
+        endpoint.latency.record(time.monotonic() - start)
+        return response
+
+    async def _hedged(self, endpoint: LLMEndpoint, kwargs: dict):
+        """
+        Call one endpoint, hedging with a second request if the first is
+        slow. Requests still running when this returns or is cancelled (the
+        client went away) are cancelled.
+        """
+        first = asyncio.create_task(self._timed(endpoint, kwargs))
+        started = {first: time.monotonic()}
+        won = False
+        try:
+            if not self.hedge:
+                return await first
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_delay(endpoint))
+            if done:
+                return first.result()
+            endpoint.hedges += 1
+            second = asyncio.create_task(self._timed(endpoint, kwargs))
+            started[second] = time.monotonic()
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            endpoint.hedge_wins += 1
+                        won = True
+                        return task.result()
+            return first.result()  # both failed: raise the first request's error
+        finally:
+            now = time.monotonic()
+            for task, started_at in started.items():
+                if not task.done():
+                    task.cancel()
+                    if won:  # the loser took at least this long; leaving it out biases the percentile low
+                        endpoint.latency.record(now - started_at)
+
+    def _available(self):
+        """Yield endpoints in order, skipping those whose circuit is open."""
+        for endpoint in self.endpoints:
+            if endpoint.breaker.allow():
+                yield endpoint
+
+    async def create(self, **kwargs):
+        """Return a chat completion from the first endpoint that succeeds."""
+        last_error = None
+        for endpoint in self._available():
+            try:
+                response = await self._hedged(endpoint, kwargs)
+            except Exception as e:
+                if not is_endpoint_failure(e):  # the request's fault: no other endpoint would do better
+                    endpoint.breaker.release_trial()
+                    raise
+                endpoint.breaker.record_failure()
+                print(f"LLM endpoint {endpoint.name} failed:", type(e).__name__, str(e))
+                last_error = e
+                continue
+            except BaseException:  # cancelled: no outcome to record
+                endpoint.breaker.release_trial()
+                raise
+            endpoint.breaker.record_success()
+            return response
+        raise last_error or CircuitOpen("All LLM endpoints are unavailable.")
+
+    async def stream(self, **kwargs):
+        """
+        Yield chunks of a streamed chat completion. Falls back to the next
+        endpoint only if a stream fails before its first chunk, since tokens
+        already sent to the client cannot be taken back. Streams are not hedged.
+        """
+        last_error = None
+        for endpoint in self._available():
+            started = False
+            try:
+                stream = await endpoint.client.chat.completions.create(
+                    model=endpoint.model, stream=True, **kwargs)
+                async for chunk in stream:
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if not is_endpoint_failure(e):
+                    endpoint.breaker.release_trial()
+                    raise
+                endpoint.breaker.record_failure()
+                print(f"LLM endpoint {endpoint.name} stream failed:", type(e).__name__, str(e))
+                if started:
+                    raise
+                last_error = e
+                continue
+            except BaseException:  # cancelled, or the consumer closed the stream
+                endpoint.breaker.release_trial()
+                raise
+            endpoint.breaker.record_success()
+            return
+        raise last_error or CircuitOpen("All LLM endpoints are unavailable.")
+
+    def stats(self) -> dict:
+        """Return per-endpoint breaker state, hedge counts and p50/p95 latency."""
+        return {e.name: {"circuit": e.breaker.state, "hedges": e.hedges,
+                         "hedge_wins": e.hedge_wins,
+                         "p50_seconds": e.latency.percentile(0.5),
+                         "p95_seconds": e.latency.percentile(0.95)}
+                for e in self.endpoints}
+
+
+def parse_endpoints(spec: str, default_client: "AsyncOpenAI", api_key: str | None,
+                    http_client=None) -> list[LLMEndpoint]:
+    """
+    Build endpoints from a comma-separated list of "model" or
+    "model@base_url" entries; entries without a base URL use default_client.
+    """
+    from openai import AsyncOpenAI
+    endpoints = []
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        model, _, base_url = entry.partition("@")
+        client = (AsyncOpenAI(api_key=api_key or "unused", base_url=base_url,
+                              http_client=http_client)
+                  if base_url else default_client)
+        endpoints.append(LLMEndpoint(entry, client, model))
+    return endpoints
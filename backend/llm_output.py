@@ -0,0 +1,123 @@
+"""Schema validation and local repair of LLM review output."""
+import json
+import re
+from typing import Any
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+
+class FitSection(BaseModel):
+    """Fit section: score on the prompt's 1-10 scale and the rationale."""
+    model_config = ConfigDict(extra="allow")
+    score: int | float
+    rationale: str = ""
+
+
+class ScreenOutput(BaseModel):
+    """Fields the screening prompt must return."""
+    model_config = ConfigDict(extra="allow")
+    Fit: FitSection
+    Gap_Map: list[dict[str, Any]]
+
+
+class ReviewOutput(ScreenOutput):
+    """Fields the review prompt must return."""
+    Questions: list[str]
+    Tailored_Resume: str
+
+
+_FENCE = re.compile(r"^\s*```[\w-]*\s*|\s*```\s*$")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def repair_json(text: str) -> tuple[str, bool]:
+    """
+    Fix common defects in model JSON output: Markdown code fences, text
+    around the object, trailing commas, and a truncated tail (an open
+    string, a dangling key or comma, unclosed arrays and objects).
+    Returns the repaired text, which may still not parse if the damage is
+    elsewhere, and whether the last top-level value was cut off.
+    """
+    text = _FENCE.sub("", text.strip())
+    start = text.find("{")
+    if start < 0:
+        return text, False
+    text = text[start:]
+
+    stack = []
+    in_string = escape = False
+    end = None
+    for pos, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = pos + 1
+                break
+    if end is not None:  # complete object; drop anything after it
+        return _TRAILING_COMMA.sub(r"\1", text[:end]), False
+
+    # truncated: close the open string, drop a dangling key/colon/comma, close containers
+    # a value is only known to be whole when the cut is between top-level members
+    value_cut = in_string or len(stack) > 1 or not re.search(r'[,"\]}]\s*$', text)
+    if escape:
+        text = text[:-1]
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    if len(stack) == 1:  # a dangling top-level key: the value before it is whole
+        dropped = re.sub(r'(,|\{)\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', r"\1", text)
+        if dropped != text:
+            text, value_cut = dropped, False
+    text = re.sub(r"[,:]\s*$", "", text)
+    text = _TRAILING_COMMA.sub(r"\1", text + "".join(reversed(stack)))
+    return text, value_cut
+
+
+def parse_llm_output(text: str, schema: type[BaseModel] = ReviewOutput) -> tuple[dict, list[str]]:
+    """
+    Parse model output against schema, repairing it locally if needed.
+    Returns the valid fields and the names of required fields that are
+    missing or invalid (empty when the output is complete).
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        repaired, value_cut = repair_json(text)
+        try:
+            data = json.loads(repaired)
+        except json.JSONDecodeError:
+            data = {}
+        if isinstance(data, dict) and value_cut and data:
+            data.popitem()  # the member being written when the output was cut off
+    if not isinstance(data, dict):
+        data = {}
+    try:
+        return schema.model_validate(data).model_dump(), []
+    except ValidationError as e:
+        bad = {str(err["loc"][0]) for err in e.errors() if err["loc"]}
+    fields = [name for name in schema.model_fields if name not in bad and name in data]
+    valid = {name: data[name] for name in fields}
+    valid.update({k: v for k, v in data.items() if k not in schema.model_fields})
+    return valid, [name for name in schema.model_fields if name in bad]
+
+
+def reask_prompt(prompt: str, missing: list[str]) -> str:
+    """
+    Ask again for only the missing fields. The original prompt is kept as
+    the prefix so the provider's prompt cache still applies.
+    """
+    fields = ", ".join(f'"{name}"' for name in missing)
+    return (f"{prompt}\n\nYour previous answer was cut off or invalid for {fields}. "
+            f"Output only one valid JSON object with exactly these fields: {fields}, "
+            "following the same schema and rules. No commentary.")
@@ -0,0 +1,91 @@
+"""
+OpenAI-compatible stub LLM server with injected latency and failures.
+
+Serves POST /v1/chat/completions (plain and streamed) with the demo review
+as the answer, so hedging, fallbacks and load tests can run without an API
+key. Run it with:
+    uvicorn backend.llm_stub:app --port 8001
+and point the API at it with LLM_FALLBACKS="stub@http://localhost:8001/v1".
+Latency and failures come from STUB_* environment variables, see create_app().
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+DEMO_RESPONSE_FILE = Path(__file__).resolve().parent.parent / "demo" / "API_response_review_demo.json"
+
+
+def create_app(latency: float = 0.0, jitter: float = 0.0, slow_fraction: float = 0.0,
+               slow_latency: float = 0.0, fail_rate: float = 0.0,
+               content: str | None = None, seed: int | None = None,
+               pattern: list[float] | None = None, fail_status: int = 503) -> FastAPI:
+    """
+    Build a stub server. Each request waits latency plus up to jitter
+    seconds; a slow_fraction of requests waits slow_latency instead (the
+    tail that hedging targets), and a fail_rate fraction answers fail_status.
+    pattern, if given, is a list of latencies used in turn for successive
+    requests instead, for reproducible tests.
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    answer = content if content is not None else DEMO_RESPONSE_FILE.read_text()
+    app.state.requests = 0
+
+    async def delay():
+        app.state.requests += 1
+        if rng.random() < fail_rate:
+            raise HTTPException(status_code=fail_status, detail="stub: injected failure")
+        if pattern:
+            wait = pattern[(app.state.requests - 1) % len(pattern)]
+        elif rng.random() < slow_fraction:
+            wait = slow_latency
+        else:
+            wait = latency + rng.random() * jitter
+        await asyncio.sleep(wait)
+
+    def usage(prompt: str) -> dict:
+        prompt_tokens = len(prompt) // 4
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": len(answer) // 4,
+                "total_tokens": prompt_tokens + len(answer) // 4,
+                "prompt_tokens_details": {"cached_tokens": 0}}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = "".join(m.get("content") or "" for m in body.get("messages", []))
+        await delay()
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()),
+                "model": body.get("model", "stub")}
+        if not body.get("stream"):
+            return {**base, "object": "chat.completion",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": answer}}],
+                    "usage": usage(prompt)}
+
+        async def events():
+            chunk = {**base, "object": "chat.completion.chunk"}
+            for i in range(0, len(answer), 64):
+                delta = {"index": 0, "delta": {"content": answer[i:i + 64]}, "finish_reason": None}
+                yield f"data: {json.dumps({**chunk, 'choices': [delta]})}\n\n"
+                await asyncio.sleep(0)
+            yield f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage(prompt)})}\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+app = create_app(
+    latency=float(os.getenv("STUB_LATENCY", "1.0")),
+    jitter=float(os.getenv("STUB_JITTER", "0.5")),
+    slow_fraction=float(os.getenv("STUB_SLOW_FRACTION", "0.05")),
+    slow_latency=float(os.getenv("STUB_SLOW_LATENCY", "30")),
+    fail_rate=float(os.getenv("STUB_FAIL_RATE", "0")),
+    fail_status=int(os.getenv("STUB_FAIL_STATUS", "503")),
+)
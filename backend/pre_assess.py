@@ -0,0 +1,235 @@
+"""Local keyword pre-assessment of a resume against a job description (BM25), before the LLM answers."""
+import copy
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from .prompt_budget import strip_jd_boilerplate
+
+K1, B = 1.2, 0.75  # BM25 term saturation and length normalization
+MAX_REQUIREMENTS = 30
+# weight of each priority in the preliminary score
+PRIORITY_WEIGHTS = {"High": 3, "Med": 2, "Low": 1}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[+#]+|(?:[.'][a-z0-9]+)*)")
+_STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can
+could do does for from has have having how in including into is it its may more most must
+not of on or our over per such than that the their them then there these they this those
+through to under up upon us very via was we well were what when where which while who whom
+will with within without would you your yours etc e.g i.e
+ability able across based closely demonstrable demonstrated desire ensure environment
+excellent exceptional experience experienced field ideally knowledge new plus potential
+preferred proven related relevant required requirement requirements skill skills strong
+understanding various work working year years
+""".split())
+_SUFFIXES = ("ations", "ation", "ments", "ment", "ership", "ings", "ing", "ies", "ied", "ers", "er",
+             "ed", "es", "s")
+# irregular forms resumes use for the words job descriptions use
+_IRREGULAR = {"led": "lead", "built": "build", "grew": "grow", "grown": "grow", "ran": "run",
+              "won": "win", "sold": "sell", "drove": "drive", "driven": "drive", "made": "make",
+              "brought": "bring", "taught": "teach", "wrote": "write", "founded": "found"}
+
+# section headings of the job description and the priority of the lines under them
+_SECTION_PRIORITY = [
+    (re.compile(r"bonus|nice[- ]to[- ]have|preferred|plus|desired|ideal", re.I), "Low"),
+    (re.compile(r"qualification|requirement|must|what you (bring|need|have)|who you are|"
+                r"skills|you have|you bring|experience", re.I), "High"),
+    (re.compile(r"responsibilit|what you('ll| will) do|the role|duties|opportunity|you will|"
+                r"day[- ]to[- ]day|impact", re.I), "Med"),
+]
+_LINE_HIGH = re.compile(r"\b(required|must|minimum|at least)\b", re.I)
+_LINE_LOW = re.compile(r"\b(preferred|a plus|bonus|ideally|nice to have)\b", re.I)
+_HEADING = re.compile(r"^\s*(#+\s*)?([^\n]{1,60}):?\s*$")
+_BULLET = re.compile(r"^\s*([-*•·▪◦]|\d+[.)])\s+")
+
+
+@lru_cache(maxsize=65536)
+def _stem(word: str) -> str:
+    """Crude suffix stripping so lead/leading/leadership and manage/managed/management agree."""
+    word = _IRREGULAR.get(word, word)
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + ("y" if suffix in ("ies", "ied") else "")
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 4 else word
+
+
+def _words(text: str) -> list[tuple[str, str]]:
+    """Return (stem, word) for the content words of text."""
+    found = []
+    for word in _TOKEN.findall(text.lower()):
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        stem = _stem(word)
+        if stem not in _STOPWORDS:
+            found.append((stem, word))
+    return found
+
+
+def terms(text: str) -> list[str]:
+    """Return the stemmed content words of text."""
+    return [stem for stem, _ in _words(text)]
+
+
+def _label(line: str) -> str:
+    """Short name of a requirement: the lead-in before a colon, or its first words."""
+    head, sep, _ = line.partition(":")
+    if sep and len(head.split()) <= 6:
+        return head.strip()
+    words = line.split()
+    return " ".join(words[:8]) + ("..." if len(words) > 8 else "")
+
+
+def extract_requirements(job_description: str) -> list[dict]:
+    """
+    Return requirement lines of a job description with a High/Med/Low
+    priority, from the sections they appear in (Qualifications, Bonus,
+    Responsibilities, ...) and bulleted lines elsewhere. Falls back to every
+    substantial line when the description has no recognizable sections, and
+    to the text with its boilerplate when stripping it leaves no requirements.
+    """
+    stripped = strip_jd_boilerplate(job_description)
+    requirements = _requirements(stripped)
+    if not requirements and stripped != job_description.strip():
+        requirements = _requirements(job_description)
+    return requirements[:MAX_REQUIREMENTS]
+
+
+def _requirements(text: str) -> list[dict]:
+    requirements, fallback = [], []
+    section = None
+    for raw in text.splitlines():
+        line = _BULLET.sub("", raw).strip()
+        if not line:
+            continue
+        heading = _HEADING.match(line)
+        if heading and (line.endswith(":") or len(line.split()) <= 4) and not _BULLET.match(raw):
+            section = next((p for pattern, p in _SECTION_PRIORITY if pattern.search(heading.group(2))), None)
+            continue
+        if not terms(line):
+            continue
+        priority = section or ("Med" if _BULLET.match(raw) else None)
+        if priority is None:
+            fallback.append({"text": line, "priority": "Med"})
+            continue
+        if _LINE_HIGH.search(line):
+            priority = "High"
+        elif _LINE_LOW.search(line) and priority != "High":  # "(degree preferred)" in a must-have list
+            priority = "Low"
+        requirements.append({"text": line, "priority": priority})
+    if not requirements:
+        requirements = [r for r in fallback if len(terms(r["text"])) >= 4]
+    return requirements
+
+
+def resume_units(resume: str) -> list[dict]:
+    """Split a resume into lines, each with the employer or section heading it falls under."""
+    units, context = [], ""
+    for raw in resume.splitlines():
+        line = _BULLET.sub("", raw).strip().lstrip("#").strip()
+        if not line:
+            continue
+        first = line.split()[0]
+        if not _BULLET.match(raw) and first.isupper() and len(first) > 1:
+            # "ACME CORP   Apr 2020 - ..." -> "ACME CORP"
+            context = " ".join(w.strip(",") for w in line.split()[:6]
+                               if w.isupper() and w.strip(",").isalpha()) or context
+        units.append({"text": line, "context": context, "terms": terms(line)})
+    return units
+
+
+def bm25_scores(query: list[str], units: list[dict], idf: dict[str, float], avg_len: float) -> list[float]:
+    """Return the BM25 score of query against every resume unit."""
+    query_terms = set(query)
+    scores = []
+    for unit in units:
+        tf = Counter(t for t in unit["terms"] if t in query_terms)
+        norm = K1 * (1 - B + B * len(unit["terms"]) / avg_len)
+        scores.append(sum(idf[t] * n * (K1 + 1) / (n + norm) for t, n in tf.items()))
+    return scores
+
+
+@lru_cache(maxsize=256)
+def _assess(job_description: str, resume: str) -> dict:
+    units = resume_units(resume)
+    n = max(len(units), 1)
+    avg_len = max(sum(len(u["terms"]) for u in units) / n, 1.0)
+    df = Counter(t for u in units for t in set(u["terms"]))
+    gap_map, weighted, total_weight = [], 0.0, 0
+    for requirement in extract_requirements(job_description):
+        surface = {}  # stem -> the word the JD uses
+        for stem, word in _words(requirement["text"]):
+            surface.setdefault(stem, word)
+        query = list(surface)
+        idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in query}
+        scores = bm25_scores(query, units, idf, avg_len)
+        best = max(range(len(scores)), key=scores.__getitem__) if scores and max(scores) > 0 else None
+        found = [t for t in query if df[t]]
+        coverage = sum(idf[t] for t in found) / (sum(idf.values()) or 1)
+        best_terms = set(units[best]["terms"]) & set(query) if best is not None else set()
+        if coverage >= 0.55 and (len(best_terms) >= 2 or len(query) <= 2):
+            present, credit = "Yes", 1.0
+        elif coverage >= 0.25 and best is not None:
+            present, credit = "Partial", 0.5
+        else:
+            present, credit = "No", 0.0
+        missing = [surface[t] for t in query if not df[t]][:3]
+        if present == "Yes":
+            handling = "Keep - evidence found"
+        elif present == "Partial":
+            handling = "Rephrase - mirror JD terms: " + ", ".join(missing) if missing else "Rephrase - mirror JD wording"
+        else:
+            handling = "Add - if true, cover: " + ", ".join(missing or list(surface.values())[:3])
+        evidence = ""
+        if best is not None and present != "No":
+            unit = units[best]
+            text = unit["text"] if len(unit["text"]) <= 120 else unit["text"][:117] + "..."
+            evidence = f"{unit['context']}: {text}" if unit["context"] else text
+        gap_map.append({
+            "JD Requirement/Keyword": f"{_label(requirement['text'])} ({requirement['priority']})",
+            "Present in Resume?": present,
+            "Where/Evidence": evidence,
+            "Gap handling": handling,
+            "coverage": round(coverage, 2),
+        })
+        weight = PRIORITY_WEIGHTS[requirement["priority"]]
+        weighted += weight * credit
+        total_weight += weight
+
+    if not gap_map:  # nothing to score: no Fit rather than the lowest one
+        return {"Fit": {"score": None, "preliminary": True,
+                        "rationale": "Preliminary keyword match found no requirements in the job description."},
+                "Gap_Map": []}
+    ratio = weighted / total_weight if total_weight else 0.0
+    counts = Counter(row["Present in Resume?"] for row in gap_map)
+    rationale = (f"Preliminary keyword match, not a recruiter's assessment: of {len(gap_map)} requirements, "
+                 f"{counts['Yes']} found, {counts['Partial']} partly found and {counts['No']} not found "
+                 "in the resume.")
+    return {"Fit": {"score": max(1, min(10, round(1 + 9 * ratio))), "rationale": rationale,
+                    "preliminary": True},
+            "Gap_Map": gap_map}
+
+
+def pre_assess(job_description: str, resume: str) -> dict:
+    """
+    Return a preliminary Fit and Gap_Map from lexical matching alone: each
+    requirement line of the job description is scored with BM25 against the
+    resume lines (Where/Evidence is the best line), and its idf-weighted
+    term coverage of the resume decides Yes/Partial/No. Results for the same
+    inputs are cached; the returned dict is the caller's to modify.
+    """
+    return copy.deepcopy(_assess(job_description, resume))
+
+
+def keyword_hints(assessment: dict) -> dict[str, list[str]]:
+    """
+    Compact hints for the LLM: requirement names grouped by Yes/Partial/No,
+    with the employer or section of the evidence ("name (High) @ ACME").
+    """
+    hints = {"Yes": [], "Partial": [], "No": []}
+    for row in assessment["Gap_Map"]:
+        name = row["JD Requirement/Keyword"]
+        where = row["Where/Evidence"].partition(":")[0] if ":" in row["Where/Evidence"] else ""
+        hints[row["Present in Resume?"]].append(f"{name} @ {where}" if where else name)
+    return hints
@@ -0,0 +1,150 @@
+"""Token counting and compaction of review prompt inputs."""
+import json
+import re
+
+try:  # exact counts when tiktoken is installed, otherwise a character estimate
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+# ~4 characters per token for English prose and JSON
+CHARS_PER_TOKEN = 4
+
+# a heading line matching one of these starts a boilerplate section
+_BOILERPLATE_HEADING = re.compile(
+    r"^\W*(benefits|perks|what we offer|we offer|compensation( and| &)? benefits|"
+    r"equal (employment )?opportunity|eeo|diversity|our commitment to diversity|"
+    r"accommodations?|reasonable accommodations?|privacy( notice| policy)?|"
+    r"e-verify|pay transparency|salary range|about the benefits)\b[^\n]{0,40}$",
+    re.IGNORECASE,
+)
+# phrases that mark a sentence or list item as legal or benefits boilerplate
+_BOILERPLATE_PHRASE = re.compile(
+    r"equal (employment )?opportunity employer|without regard to (race|age|sex)|"
+    r"protected veteran|sexual orientation|gender identity|e-verify|"
+    r"reasonable accommodation|applicant privacy|pay transparency|"
+    r"401\(k\)|paid time off|medical, dental|dental,? and vision|parental leave",
+    re.IGNORECASE,
+)
+# a markdown heading, a short line ending in ":", or a capitalized line of a
+# few words without punctuation ("What you'll do") starts a new section
+_HEADING = re.compile(r"^\s*(#+\s+\S.*|[^\n]{1,60}:|[A-Z][\w'&/-]*( [\w'&/-]+){0,5})\s*$")
+# sentences and list items: split after sentence punctuation, or at a line
+# break unless the next line continues a wrapped sentence (starts lowercase)
+_UNIT_BREAK = re.compile(r"((?<=[.!?])[ \t]+|\n(?![ \t]*[a-z]))")
+# stripping that would leave less than this share of the text is not trusted
+MIN_KEPT_FRACTION = 0.2
+
+
+def count_tokens(text: str) -> int:
+    """Return the number of tokens in text (estimated when tiktoken is unavailable)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def compact_json(obj) -> str:
+    """Serialize without indentation or ASCII escapes, which only cost tokens."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def strip_jd_boilerplate(job_description: str) -> str:
+    """
+    Drop EEO statements, benefits lists, accommodation and privacy notices
+    from a job description. A boilerplate heading line drops its section
+    until a blank line or the next unrelated heading, and a heading with its
+    value on the same line ("Salary range: $150k") is dropped alone;
+    elsewhere only the sentences or list items that mention boilerplate are
+    dropped. If less than
+    MIN_KEPT_FRACTION of the text would remain, the text is returned as is.
+    """
+    text = job_description.strip()
+    lines = []
+    skipping = skipped = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if _BOILERPLATE_HEADING.match(stripped) and not stripped.endswith("."):
+            skipping = not stripped.partition(":")[2].strip()
+            skipped = False
+            continue
+        if skipping and (_HEADING.match(stripped) or (not stripped and skipped)):
+            skipping = False
+        if not skipping:
+            lines.append(line)
+        skipped = skipping and bool(stripped)
+    parts = _UNIT_BREAK.split("\n".join(lines))
+    # a dropped unit keeps its line break, so the lines around it stay apart
+    kept = "".join(("\n" if "\n" in sep else "") if _BOILERPLATE_PHRASE.search(unit) else unit + sep
+                   for unit, sep in zip(parts[::2], parts[1::2] + [""]))
+    kept = re.sub(r"\n{3,}", "\n\n", re.sub(r"[ \t]+\n", "\n", kept)).strip()
+    return kept if len(kept) >= MIN_KEPT_FRACTION * len(text) else text
+
+
+def compact_qa_pairs(qa_pairs: list[dict[str, str]], max_pairs: int) -> list[dict[str, str]]:
+    """
+    Keep the latest answer to each question, drop unanswered ones, and keep
+    only the max_pairs most recent, in their original order.
+    """
+    latest = {}
+    for pair in qa_pairs:
+        answer = (pair.get("answer") or "").strip()
+        if not answer:
+            continue
+        key = " ".join((pair.get("question") or "").lower().split())
+        latest.pop(key, None)  # re-insert so dict order follows the latest answer
+        latest[key] = pair
+    pairs = list(latest.values())
+    return pairs[-max_pairs:] if max_pairs > 0 else []
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, at a line break where possible."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * CHARS_PER_TOKEN]
+    while cut and count_tokens(cut) > max_tokens:
+        cut = cut[:int(len(cut) * 0.9)]
+    line_end = cut.rfind("\n")
+    return (cut[:line_end] if line_end > len(cut) // 2 else cut).rstrip() + "\n[...]"
+
+
+def fit_to_budget(input_dict: dict, budget: int, fixed_tokens: int = 0) -> tuple[dict, list[str]]:
+    """
+    Shrink the prompt input until compact_json(input) plus fixed_tokens (the
+    template) fits in budget tokens. In order: drop the oldest qa_pairs, drop
+    the prior Gap_Map, then truncate Additional_Info and Job_Description.
+    The resume is never cut since the tailored resume is rewritten from it.
+    Returns the new input and a list of the steps taken.
+    """
+    input_dict = dict(input_dict)
+    steps = []
+
+    def over() -> int:
+        return fixed_tokens + count_tokens(compact_json(input_dict)) - budget
+
+    dropped = 0
+    while over() > 0 and input_dict.get("qa_pairs"):
+        input_dict["qa_pairs"] = input_dict["qa_pairs"][1:]
+        dropped += 1
+    if dropped:
+        steps.append(f"dropped {dropped} oldest qa_pairs")
+    if not input_dict.get("qa_pairs"):
+        input_dict.pop("qa_pairs", None)
+    if over() > 0 and "Gap_Map" in input_dict:
+        del input_dict["Gap_Map"]
+        steps.append("dropped prior Gap_Map")
+    for key in ("Additional_Info", "Job_Description"):
+        excess = over()
+        if excess <= 0 or not input_dict.get(key):
+            continue
+        # JSON escaping makes the serialized text longer than the raw text, so repeat
+        target = count_tokens(input_dict[key]) - excess
+        while excess > 0 and input_dict[key]:
+            input_dict[key] = _truncate(input_dict[key], target)
+            excess = over()
+            target = min(target - excess, int(target * 0.95))
+        steps.append(f"truncated {key}")
+    return input_dict, steps
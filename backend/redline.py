@@ -1,28 +1,109 @@
 """Redline Diff Module with custom <add> and <del> tags."""
+import hashlib
+import os
 import re
+import threading
+from collections import OrderedDict
 from difflib import SequenceMatcher
+
+# words (with ' or -), single punctuation, or whitespace
+_TOKEN_PATTERN = re.compile(r"(\s+|[^\w\s]|[\w][\w'-]*[\w]|[\w])", re.UNICODE)
+
+# bump when the structure returned by redline_segments changes
+REDLINE_SEGMENTS_VERSION = 1
+
+# "classic" (default) diffs the whole token stream; "linewise" aligns unchanged lines first,
+# which is faster on long resumes but can place (and occasionally enlarge) edits differently
+REDLINE_ENGINE = os.getenv("REDLINE_ENGINE", "classic")
+# number of (baseline, revised) diffs memoized per process
+REDLINE_CACHE_SIZE = int(os.getenv("REDLINE_CACHE_SIZE", "256"))
+
+
 def _tokenize(text: str):
     """
     Split into words, punctuation, and whitespace — while preserving all
     whitespace tokens so we can reconstruct the Baseline verbatim.
+    Every character falls into one of the pattern's classes, so findall
+    covers the text without gaps.
+    """
+    return _TOKEN_PATTERN.findall(text)
+
+def _offsets(pieces) -> list[int]:
+    """Return the character offset where each piece starts, plus the total length."""
+    offsets = [0]
+    for piece in pieces:
+        offsets.append(offsets[-1] + len(piece))
+    return offsets
+
+def _token_opcodes(baseline: str, revised: str, a_start: int = 0, b_start: int = 0):
+    """
+    Diff the word/whitespace tokens of two texts with difflib.
+    Opcodes are (tag, a1, a2, b1, b2) in character offsets, shifted by
+    a_start/b_start so regions of a larger text can be diffed on their own.
     """
-    # words (with ' or -), single punctuation, or whitespace
-    pattern = re.compile(r"(\s+|[^\w\s]|[\w][\w'-]*[\w]|[\w])", re.UNICODE)
-    tokens, i = [], 0
-    while i < len(text):
-        m = pattern.match(text, i)
-        if m:
-            tokens.append(m.group(0))
-            i = m.end()
+    A = _tokenize(baseline)
+    B = _tokenize(revised)
+    a_pos = _offsets(A)
+    b_pos = _offsets(B)
+    sm = SequenceMatcher(a=A, b=B, autojunk=False)
+    return [(tag, a_start + a_pos[i1], a_start + a_pos[i2], b_start + b_pos[j1], b_start + b_pos[j2])
+            for tag, i1, i2, j1, j2 in sm.get_opcodes()]
+
+def _linewise_opcodes(baseline: str, revised: str):
+    """
+    Two-pass diff: align unchanged lines first, then run the token diff only
+    inside the changed regions. Cost scales with the size of the edits
+    instead of the square of the resume length.
+    """
+    a_lines = baseline.splitlines(keepends=True)
+    b_lines = revised.splitlines(keepends=True)
+    a_pos = _offsets(a_lines)
+    b_pos = _offsets(b_lines)
+    sm = SequenceMatcher(a=a_lines, b=b_lines, autojunk=False)
+    opcodes = []
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        a1, a2, b1, b2 = a_pos[i1], a_pos[i2], b_pos[j1], b_pos[j2]
+        if tag == "equal":
+            opcodes.append((tag, a1, a2, b1, b2))
         else:
-            tokens.append(text[i])  # fallback: single character
-            i += 1
-    return tokens
+            opcodes.extend(_token_opcodes(baseline[a1:a2], revised[b1:b2], a1, b1))
+    return opcodes
+
+ENGINES = {
+    "classic": _token_opcodes,
+    "linewise": _linewise_opcodes,
+}
 
-def _join(tokens):  # keep verbatim spacing
-    return "".join(tokens)
+_opcode_cache: OrderedDict[tuple[str, str, str], list] = OrderedDict()
+_opcode_cache_lock = threading.Lock()
 
-def redline_diff(baseline: str, revised: str) -> str:
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def redline_opcodes(baseline: str, revised: str, engine: str | None = None):
+    """
+    Return difflib-style opcodes in character offsets using the chosen engine.
+    Results are memoized by (baseline hash, revised hash, engine), so the
+    same pair is only diffed once (e.g. the HTML and segment formats, or a
+    re-sent follow-up round).
+    """
+    engine = engine or REDLINE_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown redline engine {engine!r}; choose from {sorted(ENGINES)}")
+    key = (_text_hash(baseline), _text_hash(revised), engine)
+    with _opcode_cache_lock:
+        opcodes = _opcode_cache.get(key)
+        if opcodes is not None:
+            _opcode_cache.move_to_end(key)
+            return opcodes
+    opcodes = ENGINES[engine](baseline, revised)
+    with _opcode_cache_lock:
+        _opcode_cache[key] = opcodes
+        while len(_opcode_cache) > REDLINE_CACHE_SIZE:
+            _opcode_cache.popitem(last=False)
+    return opcodes
+
+def redline_diff(baseline: str, revised: str, engine: str | None = None) -> str:
     """
     Return Baseline with changes from Revised applied using markup:
       - Additions: <span style="color:#008000"><add>…</add></span>
@@ -33,12 +114,12 @@ def redline_diff(baseline: str, revised: str) -> str:
       - Phrase-level spans (difflib groups contiguous changes)
       - Merge adjacent spans naturally (by opcode ranges)
       - No tag nesting
+    engine selects "classic" or "linewise" (default: REDLINE_ENGINE). Both
+    reproduce Baseline and Revised exactly, but the markup can differ:
+    linewise fixes the line alignment before diffing tokens, so it may place
+    an edit differently and, when edits move text across lines, mark more
+    text as changed than classic does.
     """
-    A = _tokenize(baseline)
-    B = _tokenize(revised)
-
-    sm = SequenceMatcher(a=A, b=B, autojunk=False)
-
     def wrap_add(s: str) -> str:
         return f'<span style="color:#008000"><add>{s}</add></span>'
 
@@ -46,23 +127,56 @@ def redline_diff(baseline: str, revised: str) -> str:
         return f'<span style="color:#c00000"><del>{s}</del></span>'
 
     out = []
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+    for tag, i1, i2, j1, j2 in redline_opcodes(baseline, revised, engine):
         if tag == "equal":
-            out.append(_join(A[i1:i2]))
-        elif tag == "delete":
-            text = _join(A[i1:i2])
-            if text:
-                out.append(wrap_del(text))
-        elif tag == "insert":
-            text = _join(B[j1:j2])
-            if text:
-                out.append(wrap_add(text))
-        elif tag == "replace":
-            del_text = _join(A[i1:i2])
-            ins_text = _join(B[j1:j2])
-            if del_text:
-                out.append(wrap_del(del_text))
-            if ins_text:
-                out.append(wrap_add(ins_text))
+            out.append(baseline[i1:i2])
+            continue
+        # delete, insert and replace: deletion first, then addition
+        del_text = baseline[i1:i2]
+        ins_text = revised[j1:j2]
+        if del_text:
+            out.append(wrap_del(del_text))
+        if ins_text:
+            out.append(wrap_add(ins_text))
     return "".join(out)
 
+def redline_segments(baseline: str, revised: str, offsets: bool = False,
+                     engine: str | None = None) -> dict:
+    """
+    Return the redline as compact typed segments instead of inline HTML:
+      {"version": 1, "format": "segments", "segments": [["=", "text"], ["-", "text"], ["+", "text"]]}
+    "=" is unchanged text, "-" deleted baseline text, "+" added text; a "-"
+    directly followed by "+" is a replacement. Adjacent segments of the same
+    type are merged.
+    With offsets=True, "=" and "-" segments are [op, start, end] character
+    offsets into the baseline (format "offsets"), and baseline_sha256 lets
+    the client check it holds the same baseline.
+    """
+    segments = []
+    def emit(op: str, start: int, end: int, text: str):
+        if start == end:
+            return
+        last = segments[-1] if segments else None
+        if offsets and op in "=-":
+            if last and last[0] == op and last[2] == start:
+                last[2] = end
+            else:
+                segments.append([op, start, end])
+        elif last and last[0] == op and isinstance(last[1], str):
+            last[1] += text
+        else:
+            segments.append([op, text])
+
+    for tag, i1, i2, j1, j2 in redline_opcodes(baseline, revised, engine):
+        if tag == "equal":
+            emit("=", i1, i2, baseline[i1:i2])
+        else:
+            emit("-", i1, i2, baseline[i1:i2])
+            emit("+", j1, j2, revised[j1:j2])
+
+    result = {"version": REDLINE_SEGMENTS_VERSION,
+              "format": "offsets" if offsets else "segments",
+              "segments": segments}
+    if offsets:
+        result["baseline_sha256"] = hashlib.sha256(baseline.encode("utf-8")).hexdigest()
+    return result
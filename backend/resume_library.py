@@ -0,0 +1,126 @@
+"""Per-user library of resume variants, with selection of the closest variant to a job description."""
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from pydantic import BaseModel
+from .pre_assess import terms
+
+
+class ResumeMatch(BaseModel):
+    """The variant closest to a job description and every variant's similarity."""
+    name: str
+    resume: str
+    similarity: float
+    scores: dict[str, float]
+
+
+class LibraryFull(Exception):
+    """Raised by save() when the user already has max_variants resumes."""
+
+
+def term_vector(text: str) -> dict[str, float]:
+    """Sublinear term frequencies (1 + log tf) of the stemmed content words of text."""
+    return {term: 1 + math.log(n) for term, n in Counter(terms(text)).items()}
+
+
+def _cosine(a: dict[str, float], b: dict[str, float], idf: dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(w * b[t] * idf.get(t, 1.0) ** 2 for t, w in a.items() if t in b)
+    norm_a = math.sqrt(sum((w * idf.get(t, 1.0)) ** 2 for t, w in a.items()))
+    norm_b = math.sqrt(sum((w * idf.get(t, 1.0)) ** 2 for t, w in b.items()))
+    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+
+class ResumeLibrary:
+    """
+    Named resume variants per user (IC vs manager, per industry, ...) in
+    SQLite (WAL), each stored with its precomputed sparse term vector.
+    select() scores a job description against every variant of the user
+    with TF-IDF cosine similarity, where idf comes from the user's own
+    variants, so the words the variants share count less than the words
+    that tell them apart.
+    """
+
+    def __init__(self, db_file: Path, max_variants: int = 20):
+        self.db_file = Path(db_file)
+        self.max_variants = max_variants
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                " sub TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " resume TEXT NOT NULL,"
+                " vector TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (sub, name))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def init(self):
+        """Create the database if needed."""
+        self._connect()
+
+    def save(self, sub: str, name: str, resume: str):
+        """Add or replace the user's variant `name`; raise LibraryFull past max_variants."""
+        vector = json.dumps(term_vector(resume), separators=(",", ":"))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (count,) = conn.execute("SELECT COUNT(*) FROM resumes WHERE sub = ? AND name != ?",
+                                    (sub, name)).fetchone()
+            if count >= self.max_variants:
+                raise LibraryFull(f"At most {self.max_variants} resumes per user.")
+            conn.execute(
+                "INSERT INTO resumes (sub, name, resume, vector, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(sub, name) DO UPDATE SET resume = excluded.resume,"
+                " vector = excluded.vector, updated_at = excluded.updated_at",
+                (sub, name, resume, vector, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, sub: str, name: str) -> bool:
+        """Remove a variant; return False if it did not exist."""
+        cursor = self._connect().execute("DELETE FROM resumes WHERE sub = ? AND name = ?", (sub, name))
+        return cursor.rowcount > 0
+
+    def get(self, sub: str, name: str) -> str | None:
+        row = self._connect().execute("SELECT resume FROM resumes WHERE sub = ? AND name = ?",
+                                      (sub, name)).fetchone()
+        return row[0] if row else None
+
+    def variants(self, sub: str) -> list[dict]:
+        """Return name, size and last update of the user's variants, by name."""
+        return [{"name": name, "chars": chars, "updated_at": updated_at}
+                for name, chars, updated_at in self._connect().execute(
+                    "SELECT name, LENGTH(resume), updated_at FROM resumes WHERE sub = ? ORDER BY name",
+                    (sub,))]
+
+    def select(self, sub: str, job_description: str) -> ResumeMatch | None:
+        """Return the user's variant closest to the job description, or None without variants."""
+        rows = self._connect().execute("SELECT name, vector FROM resumes WHERE sub = ?", (sub,)).fetchall()
+        if not rows:
+            return None
+        vectors = {name: json.loads(vector) for name, vector in rows}
+        df = Counter(t for vector in vectors.values() for t in vector)
+        idf = {t: math.log((len(vectors) + 1) / (n + 1)) + 1 for t, n in df.items()}
+        jd = term_vector(job_description)
+        scores = {name: round(_cosine(jd, vector, idf), 4) for name, vector in vectors.items()}
+        best = max(sorted(scores), key=scores.__getitem__)  # ties go to the first name
+        return ResumeMatch(name=best, resume=self.get(sub, best) or "", similarity=scores[best], scores=scores)
@@ -0,0 +1,203 @@
+"""Per-user history of review rounds, stored as deltas against the previous round."""
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from pathlib import Path
+
+# fields kept per revision
+FIELDS = ("llm_response", "resume", "job_description")
+
+# diff units: runs of text ending in a newline, period or comma, so the
+# single-line JSON of an LLM response diffs as finely as a resume
+_CHUNK = re.compile(r"[^\n.,]+[\n.,]?|[\n.,]")
+
+
+def _chunks(text: str) -> list[str]:
+    return _CHUNK.findall(text)
+
+
+def make_delta(prior: str, text: str) -> list:
+    """Encode text as copies of prior chunk ranges ([start, end]) and inserted strings."""
+    a, b = _chunks(prior), _chunks(text)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:  # replace or insert; deletions are just not copied
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def apply_delta(prior: str, ops: list) -> str:
+    """Rebuild a text from the prior text and a delta from make_delta()."""
+    a = _chunks(prior)
+    return "".join(op if isinstance(op, str) else "".join(a[op[0]:op[1]]) for op in ops)
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+
+
+def _unpack(data: bytes):
+    return json.loads(zlib.decompress(data))
+
+
+class RevisionStore:
+    """
+    Every review round's LLM response, tailored resume and job description
+    per user, in SQLite (WAL). A revision is stored as a zlib-compressed
+    delta against the one before it, and as a full snapshot every
+    `snapshot_every` revisions (or when the delta would not be smaller), so
+    rebuilding any revision applies at most snapshot_every - 1 deltas.
+    Only the last `max_revisions` rounds, plus the deltas back to their
+    snapshot, are kept, and histories not written for `ttl_seconds` are swept.
+    """
+
+    SWEEP_EVERY = 256  # writes between sweeps of expired histories
+
+    def __init__(self, db_file: Path, snapshot_every: int = 8, max_revisions: int = 50,
+                 ttl_seconds: float = 7 * 24 * 3600, max_cached: int = 256):
+        self.db_file = Path(db_file)
+        self.snapshot_every = max(1, snapshot_every)
+        self.max_revisions = max_revisions
+        self.ttl_seconds = ttl_seconds
+        self.max_cached = max_cached
+        # latest revision per user, so recording the next one does not rebuild it
+        self._latest: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS revisions ("
+                " sub TEXT NOT NULL,"
+                " number INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " snapshot INTEGER NOT NULL,"
+                " chars INTEGER NOT NULL,"
+                " data BLOB NOT NULL,"
+                " PRIMARY KEY (sub, number))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def init(self):
+        """Create the database if needed and sweep expired histories."""
+        self._connect()
+        self.evict_expired()
+
+    def _remember(self, sub: str, number: int, revision: dict):
+        with self._lock:
+            self._latest[sub] = (number, revision)
+            self._latest.move_to_end(sub)
+            while len(self._latest) > self.max_cached:
+                self._latest.popitem(last=False)
+
+    def _rebuild(self, conn: sqlite3.Connection, sub: str, number: int) -> dict | None:
+        """Apply the deltas from the nearest snapshot at or before `number`."""
+        row = conn.execute("SELECT MAX(number) FROM revisions WHERE sub = ? AND number <= ? AND snapshot = 1",
+                           (sub, number)).fetchone()
+        if row[0] is None:
+            return None
+        rows = conn.execute("SELECT number, snapshot, data FROM revisions"
+                            " WHERE sub = ? AND number BETWEEN ? AND ? ORDER BY number",
+                            (sub, row[0], number)).fetchall()
+        if not rows or rows[-1][0] != number:
+            return None
+        revision = {}
+        for _, snapshot, data in rows:
+            value = _unpack(data)
+            revision = value if snapshot else {f: apply_delta(revision[f], value[f]) for f in FIELDS}
+        return revision
+
+    def _latest_revision(self, conn: sqlite3.Connection, sub: str) -> tuple[int, dict | None]:
+        (number,) = conn.execute("SELECT MAX(number) FROM revisions WHERE sub = ?", (sub,)).fetchone()
+        if number is None:
+            return 0, None
+        with self._lock:
+            cached = self._latest.get(sub)
+        if cached and cached[0] == number:
+            return number, cached[1]
+        return number, self._rebuild(conn, sub, number)
+
+    def add(self, sub: str, llm_response: str, resume: str, job_description: str) -> int:
+        """Record a review round and return its revision number (1, 2, ...)."""
+        revision = {"llm_response": llm_response, "resume": resume, "job_description": job_description}
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            prior_number, prior = self._latest_revision(conn, sub)
+            number = prior_number + 1
+            data, snapshot = _pack(revision), True
+            if prior is not None and (number - 1) % self.snapshot_every:
+                delta = _pack({f: make_delta(prior[f], revision[f]) for f in FIELDS})
+                if len(delta) < len(data):
+                    data, snapshot = delta, False
+            conn.execute(
+                "INSERT INTO revisions (sub, number, created_at, snapshot, chars, data) VALUES (?, ?, ?, ?, ?, ?)",
+                (sub, number, now, int(snapshot), sum(map(len, revision.values())), data))
+            # drop rounds past max_revisions, keeping the snapshot the oldest kept one is rebuilt from
+            (base,) = conn.execute("SELECT MAX(number) FROM revisions WHERE sub = ? AND number <= ? AND snapshot = 1",
+                                   (sub, number - self.max_revisions + 1)).fetchone()
+            if base is not None:
+                conn.execute("DELETE FROM revisions WHERE sub = ? AND number < ?", (sub, base))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._remember(sub, number, revision)
+
+        with self._lock:  # add() runs on several worker threads
+            self._writes += 1
+            sweep = self._writes % self.SWEEP_EVERY == 0
+        if sweep:
+            self.evict_expired()
+        return number
+
+    def get(self, sub: str, number: int) -> dict | None:
+        """Return a revision's number, time and fields, or None if it does not exist."""
+        conn = self._connect()
+        row = conn.execute("SELECT created_at FROM revisions WHERE sub = ? AND number = ?",
+                           (sub, number)).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            cached = self._latest.get(sub)
+        revision = cached[1] if cached and cached[0] == number else self._rebuild(conn, sub, number)
+        if revision is None:
+            return None
+        return {"number": number, "created_at": row[0], **revision}
+
+    def revisions(self, sub: str) -> list[dict]:
+        """Return number, time, full size and stored size of the user's revisions, oldest first."""
+        return [{"number": number, "created_at": created_at, "chars": chars, "stored_bytes": stored,
+                 "snapshot": bool(snapshot)}
+                for number, created_at, chars, stored, snapshot in self._connect().execute(
+                    "SELECT number, created_at, chars, LENGTH(data), snapshot FROM revisions"
+                    " WHERE sub = ? ORDER BY number", (sub,))]
+
+    def evict_expired(self) -> int:
+        """Delete the histories of users with no revision newer than the TTL; return how many."""
+        cutoff = time.time() - self.ttl_seconds
+        conn = self._connect()
+        expired = [sub for (sub,) in conn.execute(
+            "SELECT sub FROM revisions GROUP BY sub HAVING MAX(created_at) < ?", (cutoff,))]
+        for sub in expired:
+            conn.execute("DELETE FROM revisions WHERE sub = ? AND created_at < ?", (sub, cutoff))
+            with self._lock:
+                self._latest.pop(sub, None)
+        return len(expired)
@@ -2,9 +2,8 @@
 from fastapi import Depends, HTTPException, Security, status
 from fastapi import APIRouter, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from google.oauth2 import id_token
-from google.auth.transport import requests as grequests
-import os, base64
+import os, base64, hashlib, json, re, threading, time
+from collections import OrderedDict
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -42,6 +41,136 @@ GOOGLE_WEB_CLIENT_ID = _clean_env(os.getenv("GOOGLE_WEB_CLIENT_ID"))
 ALLOWED_EMAILS = _parse_list("ALLOWED_EMAILS")
 ALLOWED_DOMAINS = _parse_list("ALLOWED_DOMAINS")
 
+# Google ID token verification settings
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = {"accounts.google.com", "https://accounts.google.com"}
+CERTS_FETCH_TIMEOUT = float(os.getenv("GOOGLE_CERTS_FETCH_TIMEOUT", "5"))
+CERTS_DEFAULT_MAX_AGE = 3600  # used when Google sends no Cache-Control max-age
+CERTS_RETRY_AFTER = 60  # keep serving stale certs this long after a failed refresh; least time between forced refreshes
+CLAIMS_CACHE_SIZE = int(os.getenv("CLAIMS_CACHE_SIZE", "4096"))
+
+_google_lock = threading.Lock()
+jwt = None  # google.auth.jwt, imported on the first token verification (see _google_auth)
+_transport = None  # google.auth transport for cert fetches
+
+
+def _google_auth():
+    """
+    Return google.auth's jwt module and the cert transport, importing
+    google.auth and requests on the first token verification rather than at
+    startup (they take about 0.1 s to import). The transport reuses one
+    pooled session for every cert fetch.
+    """
+    global jwt, _transport
+    with _google_lock:
+        if jwt is None:
+            from google.auth import jwt as google_jwt
+            from google.auth.transport import requests as grequests
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            _transport = grequests.Request(session=session)
+            jwt = google_jwt
+        return jwt, _transport
+
+
+class _CertCache:
+    """
+    Google's signing certs, refreshed according to the Cache-Control max-age
+    of the certs response. If a refresh fails or times out while certs are
+    cached, the stale certs keep being used and the refresh is retried later.
+    Forced refreshes (tokens signed by an unknown key) happen at most once
+    per CERTS_RETRY_AFTER, so made-up key ids cannot hammer Google.
+    """
+
+    def __init__(self):
+        self.certs: dict[str, str] = {}
+        self.expires_at = 0.0
+        self.fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fresh(self, force_refresh: bool) -> bool:
+        now = time.time()
+        if force_refresh and now - self.fetched_at < CERTS_RETRY_AFTER:
+            force_refresh = False
+        return bool(self.certs) and not force_refresh and now < self.expires_at
+
+    def get(self, force_refresh: bool = False) -> dict[str, str]:
+        """Return the current certs, fetching them when expired or forced."""
+        if self._fresh(force_refresh):
+            return self.certs
+        with self._lock:
+            # another thread may have refreshed while we waited
+            if self._fresh(force_refresh):
+                return self.certs
+            self.fetched_at = time.time()
+            try:
+                self.certs, max_age = self._fetch()
+                self.expires_at = time.time() + max_age
+            except Exception as e:
+                if not self.certs:
+                    raise
+                print("verify_token: cert refresh failed, using cached certs:", type(e).__name__, e)
+                self.expires_at = time.time() + CERTS_RETRY_AFTER
+            return self.certs
+
+    @staticmethod
+    def _fetch() -> tuple[dict[str, str], float]:
+        _, transport = _google_auth()
+        response = transport(GOOGLE_CERTS_URL, method="GET", timeout=CERTS_FETCH_TIMEOUT)
+        if response.status != 200:
+            raise ValueError(f"Could not fetch certificates at {GOOGLE_CERTS_URL} ({response.status})")
+        headers = {k.lower(): v for k, v in response.headers.items()}
+        match = re.search(r"max-age=(\d+)", headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else CERTS_DEFAULT_MAX_AGE
+        max_age -= int(headers.get("age", "0") or 0)
+        return json.loads(response.data.decode("utf-8")), max(max_age, 0)
+
+
+class _ClaimsCache:
+    """Bounded LRU of verified claims keyed by token hash, valid until the token's exp."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._claims: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            claims = self._claims.get(key)
+            if claims is None:
+                return None
+            if claims.get("exp", 0) <= time.time():
+                del self._claims[key]
+                return None
+            self._claims.move_to_end(key)
+            return dict(claims)
+
+    def put(self, key: str, claims: dict):
+        with self._lock:
+            self._claims[key] = dict(claims)
+            self._claims.move_to_end(key)
+            while len(self._claims) > self.max_size:
+                self._claims.popitem(last=False)
+
+
+_certs = _CertCache()
+_verified_claims = _ClaimsCache(CLAIMS_CACHE_SIZE)
+
+
+def _decode_google_id_token(token: str) -> dict:
+    """Verify the token signature and audience against Google's cached certs."""
+    jwt, _ = _google_auth()
+    certs = _certs.get()
+    # Google rotates keys: refetch once if the token was signed by a key we don't have yet
+    kid = jwt.decode_header(token).get("kid")
+    if kid not in certs:
+        certs = _certs.get(force_refresh=True)
+        if kid not in certs:
+            raise ValueError(f"Token signed by an unknown key {kid!r}")
+    return jwt.decode(token, certs=certs, audience=GOOGLE_WEB_CLIENT_ID)
+
 
 router = APIRouter()
 
@@ -99,20 +228,24 @@ def oauth2cb():
 
 
 def verify_token(creds: HTTPAuthorizationCredentials = Security(security)):
-    """Authenticate user by verifying the Google ID token."""
+    """Authenticate user by verifying the Google ID token.
+    Verified claims are cached per token until it expires, so repeat requests
+    with the same token skip signature checks and cert fetches.
+    """
     if not creds or not creds.credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication required. No ID token provided."
         )
     token = creds.credentials
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = _verified_claims.get(token_hash)
+    if claims is not None:
+        return claims
     try:
-        claims = id_token.verify_oauth2_token(
-            token,
-            grequests.Request(),
-            GOOGLE_WEB_CLIENT_ID,  # aud must equal your WEB client_id
-        )
-        if claims["iss"] not in {"accounts.google.com", "https://accounts.google.com"}:
+        # aud must equal your WEB client_id
+        claims = _decode_google_id_token(token)
+        if claims["iss"] not in GOOGLE_ISSUERS:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Wrong issuer"
@@ -122,6 +255,7 @@ def verify_token(creds: HTTPAuthorizationCredentials = Security(security)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid ID token for authentication: {e}"
         )
+    _verified_claims.put(token_hash, claims)
     return claims
 
 
@@ -0,0 +1,161 @@
+"""Per-user session state in SQLite, fronted by an in-process LRU cache."""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+from pydantic import BaseModel
+
+
+class SessionState(BaseModel):
+    """Working state of one user's review session (formerly the temp/ files)."""
+    resume_baseline: str = ""
+    resume_variant: str | None = None  # resume library variant the baseline was loaded from
+    resume_pinned: bool = False  # loaded explicitly with /resume; reviews do not auto-select a variant
+    job_description: str = ""
+    llm_response_current: str | None = None  # raw JSON text of the latest LLM response
+    llm_response_prior: str | None = None
+    resume_revised: str | None = None
+    resume_revised_prior: str | None = None  # tailored resume from the previous round
+    qa_pairs: list[dict[str, str]] | None = None
+
+    def record_llm_response(self, llm_response_json: str, revised_resume: str,
+                            job_description: str):
+        """Rotate the LLM responses to keep the last two and save the revised resume."""
+        self.llm_response_prior = self.llm_response_current
+        self.llm_response_current = llm_response_json
+        self.resume_revised_prior = self.resume_revised
+        self.resume_revised = revised_resume
+        self.job_description = job_description
+
+
+class SessionStore:
+    """
+    Durable session state keyed by the verified `sub` claim.
+
+    SQLite (WAL mode) is the source of truth, so several uvicorn workers can
+    share one database. Each row carries a version that is bumped on every
+    write; the in-process LRU cache only serves a state when its version
+    still matches the database, which costs one indexed lookup instead of
+    reading and parsing the whole state. Writes are read-modify-write inside
+    BEGIN IMMEDIATE transactions, so concurrent requests never lose updates.
+    Sessions not written for `ttl_seconds` are treated as new and swept.
+    """
+
+    SWEEP_EVERY = 256  # writes between sweeps of expired sessions
+
+    def __init__(self, db_file: Path, factory: Callable[[], SessionState] = SessionState,
+                 max_cached: int = 1024, ttl_seconds: float = 7 * 24 * 3600):
+        self.db_file = Path(db_file)
+        self.factory = factory
+        self.max_cached = max_cached
+        self.ttl_seconds = ttl_seconds
+        self._cache: OrderedDict[str, tuple[int, SessionState]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sub TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " state TEXT NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def init(self):
+        """Create the database if needed and sweep expired sessions."""
+        self._connect()
+        self.evict_expired()
+
+    def _remember(self, sub: str, version: int, state: SessionState):
+        with self._lock:
+            self._cache[sub] = (version, state.model_copy(deep=True))
+            self._cache.move_to_end(sub)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def _forget(self, sub: str):
+        with self._lock:
+            self._cache.pop(sub, None)
+
+    def get(self, sub: str) -> SessionState:
+        """Return a copy of the user's session, or a new one if missing or expired."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT version, updated_at FROM sessions WHERE sub = ?", (sub,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            self._forget(sub)
+            return self.factory()
+
+        with self._lock:
+            cached = self._cache.get(sub)
+            if cached and cached[0] == row[0]:
+                self._cache.move_to_end(sub)
+                return cached[1].model_copy(deep=True)
+
+        row = conn.execute(
+            "SELECT version, state FROM sessions WHERE sub = ?", (sub,)
+        ).fetchone()
+        if row is None:  # deleted by another worker in between
+            return self.factory()
+        state = SessionState.model_validate_json(row[1])
+        self._remember(sub, row[0], state)
+        return state
+
+    def update(self, sub: str, mutate: Callable[[SessionState], None]) -> SessionState:
+        """Atomically apply `mutate` to the user's session and return the new state."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT version, updated_at, state FROM sessions WHERE sub = ?", (sub,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                state = SessionState.model_validate_json(row[2])
+            else:
+                state = self.factory()
+            mutate(state)
+            version = (row[0] if row is not None else 0) + 1
+            conn.execute(
+                "INSERT INTO sessions (sub, version, updated_at, state) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(sub) DO UPDATE SET version = excluded.version, "
+                "updated_at = excluded.updated_at, state = excluded.state",
+                (sub, version, now, state.model_dump_json()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._remember(sub, version, state)
+
+        with self._lock:  # updates run on several worker threads
+            self._writes += 1
+            sweep = self._writes % self.SWEEP_EVERY == 0
+        if sweep:
+            self.evict_expired()
+        return state
+
+    def evict_expired(self) -> int:
+        """Delete sessions older than the TTL; return how many were removed."""
+        cutoff = time.time() - self.ttl_seconds
+        conn = self._connect()
+        expired = [sub for (sub,) in conn.execute(
+            "SELECT sub FROM sessions WHERE updated_at < ?", (cutoff,))]
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+        for sub in expired:
+            self._forget(sub)
+        return len(expired)
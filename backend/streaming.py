@@ -0,0 +1,80 @@
+"""Incremental parsing of streamed LLM JSON output for Server-Sent Events."""
+import json
+
+
+class JSONSectionParser:
+    """
+    Scan a JSON object as it streams in and return each top-level member
+    as soon as its value is complete, e.g. ("Fit", {...}) long before the
+    closing brace of the whole object has arrived.
+    Anything before the first "{" (e.g. a stray Markdown code fence) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0            # next character to scan
+        self._depth = 0          # nesting depth of objects/arrays
+        self._in_string = False
+        self._escape = False
+        self._expect = "start"   # start | key | colon | value | done
+        self._key_start = 0
+        self._key = None
+        self._value_start = 0
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        """Add a chunk of streamed text; return the members completed by it."""
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        for pos in range(self._pos, len(buf)):
+            c = buf[pos]
+            if self._expect in ("start", "done"):
+                if c == "{" and self._expect == "start":
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key":
+                        self._key = json.loads(buf[self._key_start:pos + 1])
+                        self._expect = "colon"
+                continue
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect == "key":
+                    self._key_start = pos
+            elif c == ":" and self._depth == 1 and self._expect == "colon":
+                self._expect = "value"
+                self._value_start = pos + 1
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_value(buf, pos, completed)
+                    self._expect = "done"
+            elif c == "," and self._depth == 1:
+                self._close_value(buf, pos, completed)
+                self._expect = "key"
+        self._pos = len(buf)
+        return completed
+
+    def _close_value(self, buf: str, end: int, completed: list):
+        """Parse the value that ends at buf[end] and record it."""
+        if self._expect != "value":
+            return
+        raw = buf[self._value_start:end].strip()
+        try:
+            completed.append((self._key, json.loads(raw)))
+        except json.JSONDecodeError:
+            pass  # leave malformed members for the final full parse
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,397 @@
+"""
+Sampled tracing of endpoints and LLM calls, exported off the request path.
+
+A request traced with @traceable becomes one trace whose spans are the
+traced functions it calls. Whether a trace is kept is decided once per
+trace (head sampling) from per-user and per-endpoint rates; spans of
+dropped traces are never serialized. Kept traces are shaped (long strings
+truncated or hashed) and handed to a bounded queue that a background
+thread drains into the exporter: LangSmith, a JSON-lines file, or nothing.
+When the queue is full, traces are dropped and counted instead of making
+the request wait.
+"""
+import contextvars
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# fraction of traces kept (all by default); "name=rate,..." overrides per root endpoint and per user (sub claim)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_SAMPLE_ENDPOINTS = os.getenv("TRACE_SAMPLE_ENDPOINTS", "")
+TRACE_SAMPLE_USERS = os.getenv("TRACE_SAMPLE_USERS", "")
+# "langsmith" (default when LANGSMITH_API_KEY is set), "file" or "none"
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "langsmith" if os.getenv("LANGSMITH_API_KEY") else "none")
+TRACE_FILE = Path(os.getenv("TRACE_FILE", str(BASE_DIR / "temp" / "traces.jsonl")))
+TRACE_PROJECT = os.getenv("LANGCHAIN_PROJECT", "AIRecruitingAgent")
+# strings longer than this are cut ("truncate") or replaced by their digest ("hash")
+TRACE_MAX_FIELD_CHARS = int(os.getenv("TRACE_MAX_FIELD_CHARS", "2000"))
+TRACE_LARGE_FIELDS = os.getenv("TRACE_LARGE_FIELDS", "truncate")
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))  # kept traces waiting for export
+# arguments never recorded
+TRACE_EXCLUDED_ARGS = frozenset({"creds"})
+
+_MAX_ITEMS = 50  # list items and dict keys recorded per container
+_MAX_DEPTH = 6
+
+
+def parse_rates(spec: str) -> dict[str, float]:
+    """Parse "name=rate,name=rate" into a dict; malformed entries are ignored."""
+    rates = {}
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        name, _, rate = entry.rpartition("=")
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class Sampler:
+    """Head sampling: the rate of the user if listed, else of the root endpoint, else the default."""
+
+    def __init__(self, rate: float = 1.0, endpoints: dict[str, float] | None = None,
+                 users: dict[str, float] | None = None, rng: random.Random | None = None):
+        self.default_rate = rate
+        self.endpoints = endpoints or {}
+        self.users = users or {}
+        self._random = (rng or random.Random()).random
+
+    def rate(self, name: str, user: str | None) -> float:
+        if user is not None and user in self.users:
+            return self.users[user]
+        return self.endpoints.get(name, self.default_rate)
+
+    def sample(self, name: str, user: str | None) -> bool:
+        rate = self.rate(name, user)
+        return rate >= 1.0 or (rate > 0.0 and self._random() < rate)
+
+
+def shape(value, max_chars: int = 2000, mode: str = "truncate", depth: int = 0):
+    """Return a JSON-ready copy of value with strings over max_chars truncated or hashed."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        digest = hashlib.sha256(value.encode("utf-8", "replace")).hexdigest()[:16]
+        if mode == "hash":
+            return {"sha256": digest, "chars": len(value)}
+        return f"{value[:max_chars]}... [{len(value) - max_chars} more chars, sha256 {digest}]"
+    if depth >= _MAX_DEPTH:
+        return f"<{type(value).__name__}>"
+    if hasattr(value, "model_dump"):  # pydantic models
+        value = value.model_dump()
+    if isinstance(value, dict):
+        shaped = {str(k): shape(v, max_chars, mode, depth + 1) for k, v in list(value.items())[:_MAX_ITEMS]}
+        if len(value) > _MAX_ITEMS:
+            shaped["..."] = f"{len(value) - _MAX_ITEMS} more keys"
+        return shaped
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        shaped = [shape(v, max_chars, mode, depth + 1) for v in items[:_MAX_ITEMS]]
+        if len(items) > _MAX_ITEMS:
+            shaped.append(f"... {len(items) - _MAX_ITEMS} more items")
+        return shaped
+    if isinstance(value, (bytes, bytearray)):
+        return {"bytes": len(value)}
+    return shape(repr(value), min(max_chars, 200), mode, depth)
+
+
+class NoopExporter:
+    """Discard traces (tracing off, or measuring the cost of tracing itself)."""
+
+    def export(self, spans: list[dict]):
+        pass
+
+
+class FileExporter:
+    """Append spans to a JSON-lines file, one span per line."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def export(self, spans: list[dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, separators=(",", ":")) + "\n")
+
+
+class LangSmithExporter:
+    """Send spans to LangSmith as runs; the SDK is imported by the export thread on first use."""
+
+    def __init__(self, project: str = TRACE_PROJECT, api_key: str | None = None):
+        self.project = project
+        self.api_key = api_key
+        self._client = None
+
+    def export(self, spans: list[dict]):
+        if self._client is None:
+            from langsmith import Client
+            self._client = Client(api_key=self.api_key or os.getenv("LANGSMITH_API_KEY"))
+        dotted = {}
+        for span in sorted(spans, key=lambda s: s["start_time"]):  # parents start first
+            start = datetime.datetime.fromtimestamp(span["start_time"], datetime.timezone.utc)
+            order = f"{start:%Y%m%dT%H%M%S%fZ}{span['id']}"
+            dotted[span["id"]] = f"{dotted[span['parent_id']]}.{order}" if span["parent_id"] in dotted else order
+            self._client.create_run(
+                name=span["name"], inputs=span["inputs"], run_type=span["run_type"],
+                project_name=self.project, id=span["id"], trace_id=span["trace_id"],
+                parent_run_id=span["parent_id"], dotted_order=dotted[span["id"]],
+                start_time=start,
+                end_time=datetime.datetime.fromtimestamp(span["end_time"], datetime.timezone.utc),
+                outputs=span["outputs"], error=span["error"],
+                extra={"metadata": {"user": span["user"]}})
+
+
+class ExportQueue:
+    """
+    Bounded queue of kept traces drained by one daemon thread. submit()
+    never blocks: when the exporter falls behind and the queue is full, the
+    trace is dropped and counted.
+    """
+
+    def __init__(self, exporter, max_size: int = 1000):
+        self.exporter = exporter
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def submit(self, spans: list[dict]) -> bool:
+        """Queue a trace for export; return False if it was dropped."""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            with self._lock:  # submit() runs on every request thread
+                self.dropped += 1
+            return False
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(spans)
+                self.exported += 1
+            except Exception as e:
+                self.errors += 1
+                print("trace export failed:", type(e).__name__, str(e))
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait up to timeout seconds for queued traces to be exported; return True if none are left."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "exported": self.exported,
+                "dropped": self.dropped, "errors": self.errors}
+
+
+class _Trace:
+    __slots__ = ("id", "name", "user", "sampled", "spans", "span_count", "run_ids", "closed")
+
+    def __init__(self, name: str):
+        self.id = None  # run ids are only drawn for kept traces
+        self.name = name
+        self.user = None
+        self.sampled = None  # decided when the first span ends, once the user is known
+        self.spans = []
+        self.span_count = 0
+        self.run_ids = {}
+        self.closed = False  # the root span ended and the trace was handed to the exporter
+
+    def run_id(self, span: int | None) -> str | None:
+        """Return the exported UUID of a span number."""
+        if span is None:
+            return None
+        if span not in self.run_ids:
+            self.run_ids[span] = str(uuid.uuid4())
+        return self.run_ids[span]
+
+
+_current: contextvars.ContextVar[tuple[_Trace, int] | None] = contextvars.ContextVar("trace", default=None)
+
+
+class Tracer:
+    """Record spans of traced calls, sample whole traces and export the kept ones."""
+
+    def __init__(self, exporter=None, sampler: Sampler | None = None, max_field_chars: int = 2000,
+                 large_fields: str = "truncate", max_queued: int = 1000):
+        self.sampler = sampler or Sampler()
+        self.max_field_chars = max_field_chars
+        self.large_fields = large_fields
+        self.queue = ExportQueue(exporter or NoopExporter(), max_queued)
+        self.sampled = 0
+        self.unsampled = 0
+
+    def _keep(self, trace: _Trace) -> bool:
+        if trace.sampled is None:
+            trace.sampled = self.sampler.sample(trace.name, trace.user)
+            if trace.sampled:
+                trace.id = str(uuid.uuid4())
+                self.sampled += 1
+            else:
+                self.unsampled += 1
+        return trace.sampled
+
+    def start(self, name: str, activate: bool = True):
+        """Open a span under the current one (or a new trace); return (trace, span id, parent id, token).
+        Spans that are not activated do not become the parent of calls made meanwhile."""
+        parent = _current.get()
+        trace = parent[0] if parent else _Trace(name)
+        span_id = trace.span_count = trace.span_count + 1
+        token = _current.set((trace, span_id)) if activate else None
+        return trace, span_id, parent[1] if parent else None, token
+
+    def end(self, trace: _Trace, span_id: int, parent_id: int | None, token, name: str, run_type: str,
+            started: float, inputs, outputs, error: BaseException | None):
+        """Close a span; record it if the trace is kept and export the trace when its root ends.
+        inputs and outputs are callables, so dropped traces never serialize their payloads."""
+        if token is not None:
+            _current.reset(token)
+        if trace.closed:  # e.g. a stream closed after its caller returned: the trace is already out
+            return
+        if self._keep(trace):
+            shaped = functools.partial(shape, max_chars=self.max_field_chars, mode=self.large_fields)
+            trace.spans.append({
+                "id": trace.run_id(span_id), "trace_id": trace.id, "parent_id": trace.run_id(parent_id),
+                "name": name,
+                "run_type": run_type, "user": trace.user, "start_time": started, "end_time": time.time(),
+                "inputs": shaped(inputs()), "outputs": shaped(outputs()) if error is None else None,
+                "error": f"{type(error).__name__}: {error}" if error is not None else None,
+            })
+        if parent_id is None:
+            trace.closed = True
+            if trace.sampled:
+                self.queue.submit(list(trace.spans))
+
+    def stats(self) -> dict:
+        return {"sampled": self.sampled, "unsampled": self.unsampled, **self.queue.stats()}
+
+
+def _exporter_from_env():
+    if TRACE_EXPORTER == "langsmith":
+        return LangSmithExporter()
+    if TRACE_EXPORTER == "file":
+        return FileExporter(TRACE_FILE)
+    return NoopExporter()
+
+
+tracer = Tracer(_exporter_from_env(),
+                Sampler(TRACE_SAMPLE_RATE, parse_rates(TRACE_SAMPLE_ENDPOINTS), parse_rates(TRACE_SAMPLE_USERS)),
+                max_field_chars=TRACE_MAX_FIELD_CHARS, large_fields=TRACE_LARGE_FIELDS,
+                max_queued=TRACE_QUEUE_SIZE)
+
+
+def set_user(sub: str):
+    """Attribute the current trace to a user, for per-user sampling rates and trace metadata."""
+    current = _current.get()
+    if current is not None and current[0].user is None:
+        current[0].user = sub
+
+
+def traceable(name: str, run_type: str = "chain"):
+    """
+    Trace calls of the decorated function (sync, async or async generator)
+    as spans named `name`. Arguments are recorded by parameter name, except
+    TRACE_EXCLUDED_ARGS; the return value is the output (streams record how
+    many items they yielded).
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        def inputs(args, kwargs):
+            def record():
+                try:
+                    bound = signature.bind_partial(*args, **kwargs).arguments
+                except TypeError:
+                    bound = {"args": args, "kwargs": kwargs}
+                return {k: v for k, v in bound.items() if k not in TRACE_EXCLUDED_ARGS}
+            return record
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                t, started = tracer, time.time()
+                # each step may run in a different context (its consumer's), so the span
+                # is made current only while a step runs, and reset within that step
+                trace, span_id, parent_id, token = t.start(name, activate=False)
+                items, error = 0, None
+                stream = func(*args, **kwargs)
+                try:
+                    while True:
+                        step = _current.set((trace, span_id))
+                        try:
+                            item = await stream.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            _current.reset(step)
+                        items += 1
+                        yield item
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    await stream.aclose()
+                    t.end(trace, span_id, parent_id, token, name, run_type, started,
+                          inputs(args, kwargs), lambda: {"items": items}, error)
+        elif inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                t, started = tracer, time.time()
+                trace, span_id, parent_id, token = t.start(name)
+                result = error = None
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    t.end(trace, span_id, parent_id, token, name, run_type, started,
+                          inputs(args, kwargs), lambda: result, error)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                t, started = tracer, time.time()
+                trace, span_id, parent_id, token = t.start(name)
+                result = error = None
+                try:
+                    result = func(*args, **kwargs)
+                    return result
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    t.end(trace, span_id, parent_id, token, name, run_type, started,
+                          inputs(args, kwargs), lambda: result, error)
+        return wrapper
+    return decorate
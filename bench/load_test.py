@@ -0,0 +1,236 @@
+"""
+Load test of the review API against a local OpenAI-compatible stub.
+
+Starts backend/llm_stub.py (replaying a recorded LLM response with injected
+latency) and the FastAPI app in child processes, with Google token checks
+replaced by "the bearer token is the user id". The app uses fresh temp
+session/job/cache stores. Then runs a concurrency sweep over /review,
+/questions and the demo paths and reports throughput, p50/p95/p99 latency
+and error rate per scenario and concurrency.
+
+    python -m bench.load_test --concurrency 1,8,32 --requests 200 --latency 2
+    python -m bench.load_test --json results.json
+    python -m bench.load_test --compare results.json   # exit 1 on regression
+
+Reviews and follow-ups bypass the LLM response cache unless --cache is
+given, so every non-demo request reaches the stub.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RECORDED_RESPONSE_FILE = BASE_DIR / "demo" / "run 1 temp files saved" / "LLM_response_current.json"
+RECORDED_JD_FILE = BASE_DIR / "demo" / "run 1 temp files saved" / "job_description.txt"
+RECORDED_QA_FILE = BASE_DIR / "demo" / "run 2 temp files saved" / "user_response.json"
+
+SCENARIOS = ("review", "questions", "review_demo", "questions_demo")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve_stub(port: int, options: dict):
+    import uvicorn
+    from backend.llm_stub import create_app
+    uvicorn.run(create_app(**options), host="127.0.0.1", port=port, log_level="warning")
+
+
+def _serve_api(port: int, stub_port: int, temp_dir: str):
+    """Run the API against the stub with token checks replaced by the bearer token as user id."""
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "load-test")
+    os.environ["LLM_HEDGE"] = os.environ.get("LLM_HEDGE", "false")
+    import uvicorn
+    from backend import api
+    from backend.jd_index import JobDescriptionIndex
+    from backend.job_queue import JobQueue
+    from backend.llm_cache import LLMResponseCache
+    from backend.resume_library import ResumeLibrary
+    from backend.session_store import SessionStore
+
+    temp = Path(temp_dir)
+    api.sessions = SessionStore(temp / "sessions.db", factory=api.new_session_state)
+    api.llm_cache = LLMResponseCache(temp / "llm_cache")
+    api.jobs = JobQueue(temp / "jobs.db", api.run_review_job, workers=api.JOB_WORKERS)
+    api.jd_index = JobDescriptionIndex(temp / "jd_index.db")
+    api.resume_library = ResumeLibrary(temp / "resumes.db")
+    api.verify_token = lambda creds=None: {"sub": creds.credentials, "email": "load@test"}
+    api.check_authorized_user = lambda claims: claims
+    uvicorn.run(api.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _wait_until_up(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not start within {timeout}s")
+
+
+def _request_for(scenario: str, user: str, cache: bool) -> tuple[str, dict, dict]:
+    """Return path, JSON body and headers for one request of a scenario."""
+    headers = {"Authorization": f"Bearer {user}"}
+    if scenario == "review":
+        body = {"job_description": RECORDED_JD_FILE.read_text(), "url": "load-test",
+                "no_cache": not cache}
+        return "/review", body, headers
+    if scenario == "questions":
+        qa_pairs = [{**pair, "answer": pair["answer"] or "Yes"}
+                    for pair in json.loads(RECORDED_QA_FILE.read_text())]
+        return "/questions", {"qa_pairs": qa_pairs, "no_cache": not cache}, headers
+    if scenario == "review_demo":
+        return "/review", {"job_description": "demo", "url": "load-test", "demo": True}, headers
+    if scenario == "questions_demo":
+        return "/questions", {"qa_pairs": [], "demo": True}, headers
+    raise ValueError(f"Unknown scenario {scenario!r}; choose from {SCENARIOS}")
+
+
+def _percentile(ordered: list[float], q: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, concurrency: int,
+                       requests: int, cache: bool = False) -> dict:
+    """Send `requests` requests with `concurrency` virtual users; return latency stats."""
+    latencies, errors = [], {}
+    remaining = requests
+
+    async def user(n: int):
+        nonlocal remaining
+        name = f"load-user-{n}"
+        path, body, headers = _request_for(scenario, name, cache)
+        if scenario == "questions":  # a follow-up needs a prior review in the session
+            review_path, review_body, _ = _request_for("review", name, cache)
+            await client.post(review_path, json=review_body, headers=headers)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body, headers=headers)
+                outcome = None if response.status_code == 200 else str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if outcome:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    failed = sum(errors.values())
+    return {"scenario": scenario, "concurrency": concurrency, "requests": len(ordered),
+            "errors": errors, "error_rate": failed / len(ordered) if ordered else 0.0,
+            "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+            "p50_seconds": _percentile(ordered, 0.50),
+            "p95_seconds": _percentile(ordered, 0.95),
+            "p99_seconds": _percentile(ordered, 0.99)}
+
+
+async def run_sweep(base_url: str, scenarios, concurrencies, requests: int,
+                    cache: bool = False, timeout: float = 600) -> list[dict]:
+    """Run every scenario at every concurrency level against a running API."""
+    limits = httpx.Limits(max_connections=max(concurrencies) + 10)
+    results = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        for scenario in scenarios:
+            for concurrency in concurrencies:
+                result = await run_scenario(client, scenario, concurrency, requests, cache)
+                print(format_result(result), flush=True)
+                results.append(result)
+    return results
+
+
+def format_result(r: dict) -> str:
+    def ms(seconds):
+        return f"{seconds * 1000:9.1f}" if seconds is not None else "        -"
+    return (f"{r['scenario']:<15} c={r['concurrency']:<4} n={r['requests']:<6}"
+            f" {r['throughput_rps']:8.2f} req/s  p50 {ms(r['p50_seconds'])} ms"
+            f"  p95 {ms(r['p95_seconds'])} ms  p99 {ms(r['p99_seconds'])} ms"
+            f"  errors {r['error_rate']:6.1%}")
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Return regressions: lower throughput, higher p95 or more errors than baseline by > tolerance."""
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = before.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        name = f"{r['scenario']} c={r['concurrency']}"
+        if r["throughput_rps"] < b["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {b['throughput_rps']:.2f} -> {r['throughput_rps']:.2f} req/s")
+        if b["p95_seconds"] and r["p95_seconds"] and r["p95_seconds"] > b["p95_seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {b['p95_seconds']:.3f} -> {r['p95_seconds']:.3f} s")
+        if r["error_rate"] > b["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {b['error_rate']:.1%} -> {r['error_rate']:.1%}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario and level")
+    parser.add_argument("--latency", type=float, default=1.0, help="stub LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--slow-fraction", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=30.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--response-file", type=Path, default=RECORDED_RESPONSE_FILE,
+                        help="recorded LLM response the stub replays")
+    parser.add_argument("--cache", action="store_true", help="allow LLM response cache hits")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--compare", type=Path, help="baseline results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    stub_port, api_port = _free_port(), _free_port()
+    stub_options = {"latency": args.latency, "jitter": args.jitter,
+                    "slow_fraction": args.slow_fraction, "slow_latency": args.slow_latency,
+                    "fail_rate": args.fail_rate, "content": args.response_file.read_text()}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        servers = [multiprocessing.Process(target=_serve_stub, args=(stub_port, stub_options), daemon=True),
+                   multiprocessing.Process(target=_serve_api, args=(api_port, stub_port, temp_dir), daemon=True)]
+        for server in servers:
+            server.start()
+        try:
+            _wait_until_up(f"http://127.0.0.1:{api_port}/health")
+            results = asyncio.run(run_sweep(
+                f"http://127.0.0.1:{api_port}", args.scenarios.split(","),
+                [int(c) for c in args.concurrency.split(",")], args.requests, args.cache))
+        finally:
+            for server in servers:
+                server.terminate()
+                server.join()
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
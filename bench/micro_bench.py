@@ -0,0 +1,157 @@
+"""
+Micro-benchmarks of redline_diff, redline_segments and review prompt
+assembly on a synthetic corpus (backend/demo_maker.py) that scales the demo
+resume and job description from 1 to 25 pages and varies the edit density
+from a few bullet tweaks (0.05) to a full rewrite (1.0).
+
+Reports the best-of-N wall time and the peak traced memory per target, size
+and density, and compares them to a stored baseline.
+
+    python -m bench.micro_bench                    # compare to bench/micro_baseline.json
+    python -m bench.micro_bench --save-baseline    # record a new baseline
+    python -m bench.micro_bench --pages 1,5 --targets redline
+
+Exits 1 if any case is slower (or uses more memory) than the baseline by
+more than --tolerance; times under --noise-floor seconds are not compared.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BASELINE_FILE = BASE_DIR / "bench" / "micro_baseline.json"
+
+# the classic SequenceMatcher engine is quadratic (about 5 s at 5 pages)
+CLASSIC_MAX_PAGES = 2
+
+
+def _targets() -> dict:
+    """Return name -> (function(case), varies with edit density, max pages)."""
+    from backend import api, redline
+
+    def review_prompt(case):
+        state = api.SessionState(resume_baseline=case["baseline"],
+                                 job_description=case["job_description"])
+        return api.create_review_prompt(case["job_description"], state)
+
+    return {
+        "redline": (lambda c: redline.redline_diff(c["baseline"], c["revised"], engine="linewise"),
+                    True, None),
+        "redline_classic": (lambda c: redline.redline_diff(c["baseline"], c["revised"], engine="classic"),
+                            True, CLASSIC_MAX_PAGES),
+        "redline_segments": (lambda c: redline.redline_segments(c["baseline"], c["revised"], offsets=True),
+                             True, None),
+        "review_prompt": (review_prompt, False, None),
+    }
+
+
+def _clear_caches():
+    from backend import redline
+    with redline._opcode_cache_lock:
+        redline._opcode_cache.clear()
+
+
+def measure(func, case: dict, repeat: int) -> dict:
+    """Return the best wall time of `repeat` cold runs and the peak traced memory of one more."""
+    times = []
+    for _ in range(repeat):
+        _clear_caches()
+        gc.collect()
+        start = time.perf_counter()
+        func(case)
+        times.append(time.perf_counter() - start)
+    _clear_caches()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_bytes": peak}
+
+
+def run(pages, densities, targets, repeat: int = 3) -> list[dict]:
+    """Run every target on every corpus case; return one result per case."""
+    from backend.demo_maker import create_benchmark_case
+    available = _targets()
+    results = []
+    for n_pages in pages:
+        for i, density in enumerate(densities):
+            case = create_benchmark_case(n_pages, density)
+            for name in targets:
+                func, by_density, max_pages = available[name]
+                if (not by_density and i > 0) or (max_pages and n_pages > max_pages):
+                    continue
+                result = {"target": name, "pages": n_pages,
+                          "density": density if by_density else None,
+                          **measure(func, case, repeat)}
+                print(format_result(result), flush=True)
+                results.append(result)
+    return results
+
+
+def format_result(r: dict) -> str:
+    density = f"{r['density']:.2f}" if r["density"] is not None else "   -"
+    return (f"{r['target']:<17} pages={r['pages']:<3} density={density}"
+            f"  {r['seconds'] * 1000:10.2f} ms  peak {r['peak_bytes'] / 1024:10.1f} KiB")
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float,
+            noise_floor: float = 0.001) -> list[str]:
+    """Return regressions: slower or more peak memory than baseline by more than tolerance."""
+    before = {(r["target"], r["pages"], r["density"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = before.get((r["target"], r["pages"], r["density"]))
+        if b is None:
+            continue
+        name = f"{r['target']} pages={r['pages']} density={r['density']}"
+        if max(r["seconds"], b["seconds"]) >= noise_floor and r["seconds"] > b["seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: {b['seconds'] * 1000:.2f} -> {r['seconds'] * 1000:.2f} ms")
+        if r["peak_bytes"] > b["peak_bytes"] * (1 + tolerance):
+            regressions.append(f"{name}: peak {b['peak_bytes']} -> {r['peak_bytes']} bytes")
+    return regressions
+
+
+def main(argv=None) -> int:
+    from backend.demo_maker import CORPUS_EDIT_DENSITIES, CORPUS_PAGES
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default=",".join(map(str, CORPUS_PAGES)))
+    parser.add_argument("--densities", default=",".join(map(str, CORPUS_EDIT_DENSITIES)))
+    parser.add_argument("--targets", default="redline,redline_classic,redline_segments,review_prompt")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best is kept")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--noise-floor", type=float, default=0.001, help="seconds")
+    args = parser.parse_args(argv)
+
+    results = run([int(p) for p in args.pages.split(",")],
+                  [float(d) for d in args.densities.split(",")],
+                  args.targets.split(","), args.repeat)
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "python": platform.python_version(), "platform": platform.platform(),
+            "results": results}, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("python") != platform.python_version():
+        print(f"Note: baseline recorded on Python {baseline.get('python')}")
+    regressions = compare(results, baseline["results"], args.tolerance, args.noise_floor)
+    for line in regressions:
+        print("REGRESSION", line)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Cold start report of the API: per-module import time of backend.api (from
+python -X importtime in a fresh interpreter) and the time from launching
+uvicorn to the first /health response.
+
+    python -m bench.startup_bench                  # import report and time to /health
+    python -m bench.startup_bench --top 30 --no-serve
+    python -m bench.startup_bench --max-import-seconds 0.8   # exit 1 if slower
+
+The SDK warm-up thread is disabled (SDK_WARM_UP=false), so the report shows
+what a worker pays before it can answer /health and demo requests. Lists
+the deferred SDKs (openai, langsmith, google.auth) if any were imported.
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# imported on first use, never by importing backend.api
+DEFERRED_MODULES = ("openai", "langsmith", "google.auth")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _env() -> dict:
+    env = dict(os.environ, SDK_WARM_UP="false")
+    env.setdefault("OPENAI_API_KEY", "startup-bench")
+    return env
+
+
+def import_profile(module: str = "backend.api") -> list[dict]:
+    """Import module in a fresh interpreter; return name, depth, self and cumulative seconds per module."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BASE_DIR, env=_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({"module": name, "depth": len(indent) // 2,
+                         "self": int(self_us) / 1e6, "cumulative": int(cumulative_us) / 1e6})
+    return rows
+
+
+def summarize(rows: list[dict], module: str = "backend.api", top: int = 15) -> dict:
+    """Return the total import time, the slowest direct imports and any deferred SDKs loaded."""
+    index = next((i for i, r in enumerate(rows) if r["module"] == module), None)
+    if index is None:
+        return {"total": 0.0, "slowest": [], "deferred_loaded": []}
+    # importtime prints a module after everything it imports, one level deeper
+    depth, direct = rows[index]["depth"], []
+    for r in reversed(rows[:index]):
+        if r["depth"] <= depth:
+            break
+        if r["depth"] == depth + 1:
+            direct.append(r)
+    direct.sort(key=lambda r: r["cumulative"], reverse=True)
+    loaded = [m for m in DEFERRED_MODULES
+              if any(r["module"] == m or r["module"].startswith(m + ".") for r in rows)]
+    return {"total": rows[index]["cumulative"], "slowest": direct[:top], "deferred_loaded": loaded}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_health(timeout: float = 60) -> float:
+    """Launch uvicorn on the app and return seconds until /health answers 200."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.api:app", "--host", "127.0.0.1",
+                               "--port", str(port), "--log-level", "warning"],
+                              cwd=BASE_DIR, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            time.sleep(0.01)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend.api")
+    parser.add_argument("--top", type=int, default=15, help="slowest direct imports to list")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    parser.add_argument("--no-serve", action="store_true", help="skip the time to first /health")
+    parser.add_argument("--max-import-seconds", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    summaries = [summarize(import_profile(args.module), args.module, args.top) for _ in range(args.repeat)]
+    summary = min(summaries, key=lambda s: s["total"])
+    print(f"import {args.module}: {summary['total'] * 1000:.0f} ms (best of {args.repeat})")
+    for r in summary["slowest"]:
+        print(f"  {r['cumulative'] * 1000:8.1f} ms  {r['module']}")
+    if summary["deferred_loaded"]:
+        print("deferred SDKs imported at startup:", ", ".join(summary["deferred_loaded"]))
+    if not args.no_serve:
+        best = min(time_to_health() for _ in range(args.repeat))
+        print(f"uvicorn start to first /health: {best * 1000:.0f} ms (best of {args.repeat})")
+    if args.max_import_seconds is not None and summary["total"] > args.max_import_seconds:
+        print(f"REGRESSION import takes {summary['total']:.2f} s > {args.max_import_seconds:.2f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
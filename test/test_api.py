@@ -1,7 +1,16 @@
 """Unit tests for the backend module."""
 
+import json
+import httpx
 import pytest
 from backend import api
+from backend.session_store import SessionStore
+from backend.llm_cache import LLMResponseCache
+from backend.job_queue import JobQueue
+from backend.jd_fetcher import JobDescriptionFetcher
+from backend.jd_index import JobDescriptionIndex
+from backend.resume_library import ResumeLibrary
+from backend.revision_store import RevisionStore
 from fastapi.testclient import TestClient
 from pathlib import Path
 from backend.security import verify_token
@@ -15,17 +24,19 @@ TEST_OUTPUT_FROM_LLM_CURRENT_FILE = BASE_DIR / "temp_stub" / "test_LLM_response_
 TEST_USER_RESPONSE_FILE = BASE_DIR / "temp_stub" / "test_user_response.json"
 # Production temp files
 TEMP_DIR = BASE_DIR.parent / "temp"
-RESUME_BASELINE_FILE = TEMP_DIR / "resume_baseline.txt"
-RESUME_REVISED_FILE = TEMP_DIR / "resume_revised.txt"
-USER_RESPONSE_FILE = TEMP_DIR / "user_response.json"
-OUTPUT_FROM_LLM_PRIOR_FILE = TEMP_DIR / "LLM_response_prior.json"
-OUTPUT_FROM_LLM_CURRENT_FILE = TEMP_DIR / "LLM_response_current.json"
-JOB_DESCRIPTION_FILE = TEMP_DIR / "job_description.txt"
 
 
 @pytest.fixture
-def test_client(monkeypatch):
+def test_client(monkeypatch, tmp_path):
     """Create a test client for the FastAPI app."""
+    # Keep session state for each test in its own database
+    monkeypatch.setattr(api, "sessions", SessionStore(
+        tmp_path / "sessions.db", factory=api.new_session_state))
+    monkeypatch.setattr(api, "llm_cache", LLMResponseCache(tmp_path / "llm_cache"))
+    monkeypatch.setattr(api, "jobs", JobQueue(tmp_path / "jobs.db", api.run_review_job, workers=1))
+    monkeypatch.setattr(api, "jd_index", JobDescriptionIndex(tmp_path / "jd_index.db"))
+    monkeypatch.setattr(api, "resume_library", ResumeLibrary(tmp_path / "resumes.db"))
+    monkeypatch.setattr(api, "revisions", RevisionStore(tmp_path / "revisions.db"))
     # Patch the verify_token that api.py calls directly
     monkeypatch.setattr(api, "verify_token", lambda creds=None: {
         "sub": "test-user-123",
@@ -39,26 +50,48 @@ def test_client(monkeypatch):
 
 
 def test_init_temp_folder_and_files(test_client):
-    """Test that temp folder and files are created."""
+    """Test that temp folder and session store are created with a demo baseline."""
     assert TEMP_DIR.exists()
-    assert RESUME_BASELINE_FILE.exists()
-    assert JOB_DESCRIPTION_FILE.exists()
-    assert not OUTPUT_FROM_LLM_CURRENT_FILE.exists()
-    assert not OUTPUT_FROM_LLM_PRIOR_FILE.exists()
-    assert not RESUME_REVISED_FILE.exists()
-    assert not USER_RESPONSE_FILE.exists()
+    assert api.sessions.db_file.exists()
+    state = api.sessions.get("new-user")
+    assert state.resume_baseline == api.RESUME_DEMO_FILE.read_text()
+    assert state.job_description == api.JOB_DESCRIPTION_DEMO_FILE.read_text()
+    assert state.llm_response_current is None
+    assert state.llm_response_prior is None
+    assert state.resume_revised is None
+    assert state.qa_pairs is None
 
 
-def test_get_job_description(test_client):
-    """Test /get_JD endpoint returns (currently demo) job description."""
-    response = test_client.post(
-        "/jobdescription",
-        json={"url": "https://example.com/job"}
-    )
-    assert response.status_code == 200
-    data_dict = response.json()
-    # check that content from demo job description file is returned
-    assert "CEO/Co-founder" in data_dict["job_description"]
+def test_get_job_description(test_client, monkeypatch):
+    """Test /jobdescription extracts the job text from the listing page and caches it."""
+    pages = {"https://example.com/job": "<html><body><nav>Jobs</nav><main><pre>"
+             + api.JOB_DESCRIPTION_DEMO_FILE.read_text() + "</pre></main></body></html>"}
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    fetched = []
+    auth = {"Authorization": "Bearer test-token"}
+    def handler(request):
+        fetched.append(str(request.url))
+        if str(request.url) not in pages:
+            return httpx.Response(404)
+        return httpx.Response(200, text=pages[str(request.url)], headers={"Content-Type": "text/html"})
+    monkeypatch.setattr(api, "jd_fetcher", JobDescriptionFetcher(
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)), resolve=lambda host, port: ["93.184.215.14"]))
+
+    for _ in range(2):
+        response = test_client.post("/jobdescription", json={"url": "https://example.com/job"}, headers=auth)
+        assert response.status_code == 200
+        assert "CEO/Co-founder" in response.json()["job_description"]
+        assert "Jobs" not in response.json()["job_description"].split("\n")[0]
+    assert fetched == ["https://example.com/job"]  # the repeat came from cache
+
+    response = test_client.post("/jobdescription", json={"url": "https://example.com/missing"}, headers=auth)
+    assert response.status_code == 502
+    response = test_client.post("/jobdescription", json={"url": "https://example.com/job", "demo": True})
+    assert "CEO/Co-founder" in response.json()["job_description"]  # the demo listing needs no token
+
+    monkeypatch.setattr(api, "verify_token", verify_token)  # the real check rejects anonymous callers
+    response = test_client.post("/jobdescription", json={"url": "https://example.com/other"})
+    assert response.status_code in (401, 403) and "https://example.com/other" not in fetched
 
 
 def test_create_resume_diff():
@@ -81,11 +114,13 @@ def test_create_review_prompt(monkeypatch):
     question2 = "Question2?"
     answer3 = "Answer3"
 
-    monkeypatch.setattr(api, "RESUME_BASELINE_FILE", TEST_RESUME_FILE)
     monkeypatch.setattr(api, "ADDITIONAL_EXPERIENCE_FILE", TEST_ADDITIONAL_EXPERIENCE_FILE)
-    monkeypatch.setattr(api, "OUTPUT_FROM_LLM_CURRENT_FILE", TEST_OUTPUT_FROM_LLM_CURRENT_FILE)
-    monkeypatch.setattr(api, "USER_RESPONSE_FILE", TEST_USER_RESPONSE_FILE)
-    prompt = api.create_review_prompt(job_description)
+    state = api.SessionState(
+        resume_baseline=TEST_RESUME_FILE.read_text(),
+        llm_response_current=TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text(),
+        qa_pairs=json.loads(TEST_USER_RESPONSE_FILE.read_text()),
+    )
+    prompt = api.create_review_prompt(job_description, state)
 
     # test that placeholder is replaced with json content
     assert "{{INPUT}}" not in prompt
@@ -99,6 +134,36 @@ def test_create_review_prompt(monkeypatch):
     assert answer3 in prompt
 
 
+def test_review_prompt_prefix_is_stable(monkeypatch):
+    """Test a follow-up round's prompt starts with the first round's prompt prefix."""
+    monkeypatch.setattr(api, "ADDITIONAL_EXPERIENCE_FILE", TEST_ADDITIONAL_EXPERIENCE_FILE)
+    first = api.SessionState(resume_baseline=TEST_RESUME_FILE.read_text())
+    follow_up = first.model_copy(update={
+        "llm_response_current": TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text(),
+        "qa_pairs": json.loads(TEST_USER_RESPONSE_FILE.read_text()),
+    })
+    prompt1 = api.create_review_prompt("This the test job description", first)
+    prompt2 = api.create_review_prompt("This the test job description", follow_up)
+
+    prefix = prompt1[:prompt1.rfind("}")]
+    assert prompt2.startswith(prefix)
+    assert prompt2.index('"Additional_Info"') < prompt2.index('"Fit"') < prompt2.index('"qa_pairs"')
+    assert api.prompt_cache_key(prompt1) == api.prompt_cache_key(prompt2)
+
+
+def test_record_llm_usage(monkeypatch):
+    """Test cached prompt tokens reported by the provider are totalled."""
+    from types import SimpleNamespace
+    monkeypatch.setattr(api, "llm_usage", dict.fromkeys(api.llm_usage, 0))
+    api.record_llm_usage(SimpleNamespace(
+        prompt_tokens=3000, completion_tokens=500,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=2048)))
+    api.record_llm_usage(SimpleNamespace(
+        prompt_tokens=3000, completion_tokens=500, prompt_tokens_details=None))
+    assert api.llm_usage == {"calls": 2, "prompt_tokens": 6000, "cached_tokens": 2048,
+                             "completion_tokens": 1000}
+
+
 def test_generate_review_demo(test_client, monkeypatch):
     """Test /generate/review endpoint returns demo JSON."""
     response = test_client.post(
@@ -120,7 +185,7 @@ def test_generate_review_demo(test_client, monkeypatch):
 def test_generate_review(test_client, monkeypatch):
     """Test /generate/review endpoint parses the LLM response and injects
     a diff resume."""
-    def mock_prompt_llm(prompt: str) -> str:
+    async def mock_prompt_llm(prompt: str) -> str:
         return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
     monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
 
@@ -139,6 +204,361 @@ def test_generate_review(test_client, monkeypatch):
     assert data_dict["Gap_Map"][1]["JD Requirement/Keyword"] == "Test Requirement1"
 
 
+def test_review_reasks_for_missing_fields(test_client, monkeypatch):
+    """Test a truncated LLM response is completed by re-asking only for the cut-off field."""
+    full = TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    revised = json.loads(full)["Tailored_Resume"]
+    prompts = []
+    async def mock_prompt_llm(prompt: str) -> str:
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            return full[:full.index('"Tailored_Resume"') + 40]
+        return json.dumps({"Tailored_Resume": revised})
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post(
+        "/review",
+        json={"job_description": "This the test job description", "url": "https://example.com/job"}
+    )
+    assert response.status_code == 200
+    assert len(prompts) == 2 and prompts[1].startswith(prompts[0])
+    assert api.sessions.get("test-user-123").resume_revised == revised
+
+
+def test_review_invalid_after_reask(test_client, monkeypatch):
+    """Test a response still invalid after the re-ask is a distinct 502, counted on /metrics."""
+    async def mock_prompt_llm(prompt: str) -> str:
+        return '{"Fit": "not an object"}'
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post("/review", json={"job_description": "Job", "url": "https://example.com/job"})
+    assert response.status_code == 502
+    assert "LLM returned an invalid review" in response.json()["detail"]
+    assert "OpenAI call failed" not in response.json()["detail"]
+    assert 'llm_invalid_responses_total{schema="ReviewOutput"}' in test_client.get("/metrics").text
+
+
+def test_stream_review(test_client, monkeypatch):
+    """Test /review/stream sends sections as events and the redlined resume last."""
+    llm_response = TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    async def mock_prompt_llm_stream(prompt: str):
+        for i in range(0, len(llm_response), 50):
+            yield llm_response[i:i + 50]
+    monkeypatch.setattr(api, "prompt_llm_stream", mock_prompt_llm_stream)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post(
+        "/review/stream",
+        json={
+            "job_description": "This the test job description",
+            "url": "https://example.com/bestjobever",
+        }
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line[len("event: "):] for line in response.text.splitlines()
+              if line.startswith("event: ")]
+    sections = [event for event in events if event != "token"]
+    assert sections == ["Preliminary", "Fit", "Gap_Map", "Questions", "Tailored_Resume", "done"]
+    assert "<add>" in response.text or "<del>" in response.text
+
+    # a second round honours redline_format and changes_since_prior like /review
+    response = test_client.post("/review/stream", json={
+        "job_description": "This the test job description", "url": "https://example.com/bestjobever",
+        "no_cache": True, "redline_format": "segments", "changes_since_prior": True})
+    redlines = {}
+    for block in response.text.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if lines.get("event") in ("Tailored_Resume", "Changes_Since_Prior"):
+            redlines[lines["event"]] = json.loads(lines["data"])
+    assert redlines["Tailored_Resume"]["format"] == "segments"
+    assert redlines["Changes_Since_Prior"]["format"] == "segments"
+
+
+def test_preassess_review(test_client, monkeypatch):
+    """Test /review/preassess scores the session resume locally and the prompt carries the hits."""
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    job_description = api.JOB_DESCRIPTION_DEMO_FILE.read_text()
+    response = test_client.post("/review/preassess",
+                                json={"job_description": job_description, "url": "https://example.com/job"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["Fit"]["preliminary"] is True and 1 <= result["Fit"]["score"] <= 10
+    assert {row["Present in Resume?"] for row in result["Gap_Map"]} <= {"Yes", "Partial", "No"}
+    assert test_client.post("/review/preassess", json={"job_description": "x", "url": "u",
+                                                       "demo": True}).json()["Gap_Map"]
+
+    assert '"Keyword_Hits":' not in api.create_review_prompt(job_description, api.new_session_state())
+    monkeypatch.setattr(api, "PREASSESS_HINTS", True)
+    prompt = api.create_review_prompt(job_description, api.new_session_state())
+    assert '"Keyword_Hits":{"Yes":[' in prompt and "Vision & Strategy (Med)" in prompt
+
+
+def test_review_state_is_per_user(test_client, monkeypatch):
+    """Test /review saves state to the caller's session without touching others."""
+    async def mock_prompt_llm(prompt: str) -> str:
+        return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post(
+        "/review",
+        json={"job_description": "Job for user 123", "url": "https://example.com/job"}
+    )
+    assert response.status_code == 200
+    state = api.sessions.get("test-user-123")
+    assert state.job_description == "Job for user 123"
+    assert state.llm_response_current == TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    assert state.resume_revised == json.loads(state.llm_response_current)["Tailored_Resume"]
+    assert api.sessions.get("someone-else").llm_response_current is None
+
+
+def test_review_llm_cache(test_client, monkeypatch):
+    """Test identical prompt inputs are served from the LLM cache unless bypassed."""
+    calls = []
+    async def mock_prompt_llm(prompt: str) -> str:
+        calls.append(prompt)
+        return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    listing = {"job_description": "Same job", "url": "https://example.com/job"}
+
+    # two new users with the same baseline and job share one LLM call
+    for sub in ("user-a", "user-b"):
+        monkeypatch.setattr(api, "verify_token", lambda creds=None, sub=sub: {"sub": sub})
+        response = test_client.post("/review", json=listing)
+        assert response.status_code == 200
+        assert response.json()["Fit"]["score"] == 10
+    assert len(calls) == 1
+    assert api.llm_cache.stats()["hits_memory"] == 1
+
+    monkeypatch.setattr(api, "verify_token", lambda creds=None: {"sub": "user-c"})
+    response = test_client.post("/review", json={**listing, "no_cache": True})
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert api.llm_cache.stats()["bypassed"] == 1
+
+
+def test_review_reposted_listing_reuses_review(test_client, monkeypatch):
+    """Test a user's exact repost is reviewed with their canonical text, and near or other
+    users' copies are never substituted."""
+    calls = []
+    async def mock_prompt_llm(prompt: str) -> str:
+        calls.append(prompt)
+        return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    original = api.JOB_DESCRIPTION_DEMO_FILE.read_text()
+    reformatted = original.replace("\n\n", "\n\n\n").upper()
+    near = "Apply via Greenhouse\n\n" + original + "\n\nPosted 2 days ago"
+
+    for sub, text in (("user-a", original), ("user-a", reformatted)):
+        monkeypatch.setattr(api, "verify_token", lambda creds=None, sub=sub: {"sub": sub})
+        response = test_client.post("/review", json={"job_description": text, "url": "https://example.com/job"})
+        assert response.status_code == 200
+    assert api.sessions.get("user-a").job_description == original
+    assert reformatted not in calls[-1]
+
+    for sub, text in (("user-a", near), ("user-b", reformatted)):
+        monkeypatch.setattr(api, "verify_token", lambda creds=None, sub=sub: {"sub": sub})
+        response = test_client.post("/review", json={"job_description": text, "url": "https://example.com/job"})
+        assert response.status_code == 200
+        assert api.sessions.get(sub).job_description == text
+
+
+def test_review_selects_closest_resume_variant(test_client, monkeypatch):
+    """Test /review uses the library variant closest to the job description as the baseline."""
+    prompts = []
+    async def mock_prompt_llm(prompt: str) -> str:
+        prompts.append(prompt)
+        return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    ic = "ACME CORP\n- Built Kafka pipelines in Python on Kubernetes\n"
+    manager = "ACME CORP\n- Led a team of 12 engineers and owned the hiring plan and roadmap\n"
+    for name, resume in (("ic", ic), ("manager", manager)):
+        assert test_client.put(f"/resume/library/{name}", json={"resume": resume}).status_code == 200
+
+    manager_jd = {"job_description": "Engineering manager to lead a team and hire", "url": "https://example.com/job"}
+    response = test_client.post("/review", json=manager_jd)
+    assert response.status_code == 200
+    assert response.json()["Resume_Variant"] == "manager"
+    assert "owned the hiring plan" in prompts[0] and "Kafka" not in prompts[0]
+    assert api.sessions.get("test-user-123").resume_baseline == manager
+
+    auth = {"Authorization": "Bearer test-token"}  # /resume answers anonymous callers with an error
+    listed = test_client.get("/resume", params={"command": "list"}, headers=auth).json()
+    assert [v["name"] for v in listed["resumes"]] == ["ic", "manager"] and listed["current"] == "manager"
+    assert test_client.get("/resume", params={"command": "load", "name": "ic"}, headers=auth).json()["resume"] == ic
+    # an explicit load pins the baseline: later reviews keep it
+    response = test_client.post("/review", json=manager_jd)
+    assert response.json()["Resume_Variant"] == "ic" and "Kafka" in prompts[-1]
+    assert test_client.get("/resume", params={"command": "auto"}, headers=auth).json() == {"pinned": False}
+    # the preassess preview uses the closest variant without saving it
+    assert test_client.post("/review/preassess", json=manager_jd).status_code == 200
+    assert api.sessions.get("test-user-123").resume_baseline == ic
+    assert test_client.delete("/resume/library/ic").status_code == 200
+    assert test_client.get("/resume", params={"command": "load", "name": "ic"}, headers=auth).status_code == 404
+
+
+def test_generate_review_segments(test_client, monkeypatch):
+    """Test /review can return the redline as typed segments."""
+    async def mock_prompt_llm(prompt: str) -> str:
+        return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post(
+        "/review",
+        json={"job_description": "This the test job description",
+              "url": "https://example.com/job", "redline_format": "segments"}
+    )
+    assert response.status_code == 200
+    redline = response.json()["Tailored_Resume"]
+    assert redline["version"] == 1 and redline["format"] == "segments"
+    revised = "".join(text for op, text in redline["segments"] if op != "-")
+    assert revised == json.loads(TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text())["Tailored_Resume"]
+
+
+def test_changes_since_prior(test_client, monkeypatch):
+    """Test a follow-up round can redline against the previous tailored resume."""
+    first = json.loads(TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text())
+    second = dict(first, Tailored_Resume=first["Tailored_Resume"] + "\nNew bullet from answers")
+    responses = [json.dumps(first), json.dumps(second)]
+    async def mock_prompt_llm(prompt: str) -> str:
+        return responses.pop(0)
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post("/review", json={
+        "job_description": "Job", "url": "https://example.com/job", "changes_since_prior": True})
+    assert "Changes_Since_Prior" not in response.json()
+    response = test_client.post("/questions", json={
+        "qa_pairs": [{"question": "Q?", "answer": "A"}], "changes_since_prior": True})
+    assert response.status_code == 200
+    changes = response.json()["Changes_Since_Prior"]
+    assert changes.count("<add>") == 1 and "<del>" not in changes
+    assert "New bullet from answers" in changes
+
+
+def test_revisions(test_client, monkeypatch):
+    """Test every review round is kept in the revision history and rounds can be compared."""
+    first = json.loads(TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text())
+    second = dict(first, Tailored_Resume=first["Tailored_Resume"] + "\nNew bullet from answers")
+    responses = [json.dumps(first), json.dumps(second)]
+    async def mock_prompt_llm(prompt: str) -> str:
+        return responses.pop(0)
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    body = {"job_description": "Job", "url": "https://example.com/job", "no_cache": True}
+    assert test_client.post("/review", json=body).json()["Revision"] == 1
+    assert test_client.post("/review", json=body).json()["Revision"] == 2
+    listed = test_client.get("/revisions").json()["revisions"]
+    assert [r["number"] for r in listed] == [1, 2]
+
+    revision = test_client.get("/revisions/1").json()
+    assert revision["tailored_resume"] == first["Tailored_Resume"]
+    assert revision["llm_response"]["Fit"] == first["Fit"]
+    changes = test_client.get("/revisions/2", params={"compare_to": 1}).json()["Changes"]
+    assert changes.count("<add>") == 1 and "New bullet from answers" in changes
+    assert test_client.get("/revisions/3").status_code == 404
+    assert test_client.get("/revisions/2", params={"compare_to": 9}).status_code == 404
+
+
+def test_review_batch(test_client, monkeypatch):
+    """Test /review/batch ranks listings by Fit score and reports failures per listing."""
+    scores = {"Job A": 4, "Job B": 9}
+    async def mock_prompt_llm(prompt: str) -> str:
+        assert "Tailored_Resume" not in prompt.split("{")[-1]
+        if "Job C" in prompt:
+            return "not json"
+        score = next(v for k, v in scores.items() if k in prompt)
+        return json.dumps({"Fit": {"score": score}, "Gap_Map": []})
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post("/review/batch", json={"listings": [
+        {"job_description": "Job A"}, {"job_description": "Job B"},
+        {"job_description": "Job C"}, {}]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["index"] for r in data["results"]] == [1, 0]
+    assert data["results"][0]["Fit"]["score"] == 9
+    assert sorted(e["index"] for e in data["errors"]) == [2, 3]
+    # batch screening does not touch the session
+    assert api.sessions.get("test-user-123").llm_response_current is None
+
+    monkeypatch.setattr(api, "BATCH_MAX_LISTINGS", 1)
+    response = test_client.post("/review/batch", json={"listings": [{}, {}]})
+    assert response.status_code == 422
+
+
+def test_review_job(test_client, monkeypatch):
+    """Test a queued review can be polled and long-polled for the /review response."""
+    async def mock_prompt_llm(prompt: str) -> str:
+        return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+
+    response = test_client.post(
+        "/jobs/review",
+        json={"job_description": "This the test job description", "url": "https://example.com/job"}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    response = test_client.get(f"/jobs/{job_id}", params={"wait": 10})
+    assert response.json()["status"] == "done"
+    result = test_client.get(f"/jobs/{job_id}/result").json()
+    assert result["Fit"]["score"] == 10
+    assert "<add>" in result["Tailored_Resume"] or "<del>" in result["Tailored_Resume"]
+
+    # jobs are only visible to the user who submitted them
+    monkeypatch.setattr(api, "verify_token", lambda creds=None: {"sub": "someone-else"})
+    assert test_client.get(f"/jobs/{job_id}").status_code == 404
+
+
+def test_metrics(test_client, monkeypatch):
+    """Test /metrics exposes per-stage latencies and cache results after a review."""
+    async def mock_prompt_llm(prompt: str) -> str:
+        return TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    test_client.post(
+        "/review",
+        json={"job_description": "This the test job description", "url": "https://example.com/job"}
+    )
+
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for stage in ("verify_token", "prompt_build", "llm_call", "redline", "session_save"):
+        assert f'review_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'llm_cache_requests_total{result="miss"}' in text
+    assert 'http_requests_total{route="/review",status="200"}' in text
+    assert 'job_queue_depth{status="queued"} 0' in text
+
+
+def test_reload_assets(test_client, monkeypatch, tmp_path):
+    """Test /assets/reload makes edited demo payloads visible immediately."""
+    demo_file = tmp_path / "demo.json"
+    demo_file.write_text(json.dumps({"Fit": {"score": 1}}))
+    monkeypatch.setattr(api, "RESPONSE_REVIEW_DEMO_FILE", demo_file)
+    monkeypatch.setattr(api, "assets", api.AssetCache(check_interval=3600))
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    listing = {"job_description": "demo", "url": "https://demo.com", "demo": True}
+
+    assert test_client.post("/review", json=listing).json()["Fit"]["score"] == 1
+    demo_file.write_text(json.dumps({"Fit": {"score": 2}}))
+    assert test_client.post("/review", json=listing).json()["Fit"]["score"] == 1
+    assert test_client.post("/assets/reload").json() == {"reloaded": 1}
+    assert test_client.post("/review", json=listing).json()["Fit"]["score"] == 2
+
+
 def test_process_questions_and_answers_demo(test_client, monkeypatch):
     """Test /questions endpoint creates an updated review off user's answers."""
     response = test_client.post(
@@ -0,0 +1,48 @@
+"""Unit tests for the in-memory asset cache."""
+
+import json
+import os
+from backend.assets import AssetCache
+
+
+def test_reads_once_until_file_changes(tmp_path, monkeypatch):
+    """Test files are read once and re-read when their size or mtime changes."""
+    path = tmp_path / "prompt.txt"
+    path.write_text("v1")
+    cache = AssetCache(check_interval=0)
+    reads = []
+    original = type(path).read_text
+    monkeypatch.setattr(type(path), "read_text", lambda self, *a, **k: reads.append(self) or original(self, *a, **k))
+
+    assert cache.text(path) == "v1"
+    assert cache.text(path) == "v1"
+    assert len(reads) == 1
+
+    path.write_text("v2 longer")
+    assert cache.text(path) == "v2 longer"
+    path.write_text("v3 longer")
+    os.utime(path, ns=(1, 1))
+    assert cache.text(path) == "v3 longer"
+    assert len(reads) == 3
+
+
+def test_check_interval_and_reload(tmp_path):
+    """Test changes are not checked within the interval, and reload() forces a re-read."""
+    path = tmp_path / "demo.txt"
+    path.write_text("old")
+    cache = AssetCache(check_interval=3600)
+    assert cache.text(path) == "old"
+    path.write_text("newer")
+    assert cache.text(path) == "old"
+    assert cache.reload() == 1
+    assert cache.text(path) == "newer"
+
+
+def test_missing_files_and_json(tmp_path):
+    """Test missing files, parsed JSON and pre-serialized JSON bytes."""
+    cache = AssetCache(check_interval=0)
+    assert cache.text_or_none(tmp_path / "missing.txt") is None
+    path = tmp_path / "demo.json"
+    path.write_text(json.dumps({"Fit": {"score": 8}, "name": "Zoë"}, indent=4))
+    assert cache.json(path)["Fit"]["score"] == 8
+    assert cache.json_bytes(path) == '{"Fit":{"score":8},"name":"Zoë"}'.encode("utf-8")
@@ -0,0 +1,151 @@
+"""Unit tests for the job description fetcher."""
+
+import asyncio
+import json
+import httpx
+import pytest
+from backend.jd_fetcher import (JobDescriptionFetcher, JobDescriptionFetchError, JobTextExtractor,
+                                check_url)
+
+PAGE = """<html><head><title>Acme careers</title><script>var x = "<p>not text</p>";</script></head>
+<body><nav><ul><li>Home<li>Jobs</ul></nav>
+<main><h1>Senior Product Manager</h1><p>Own the   roadmap &amp; strategy.</p>
+<ul><li>5+ years PM</li><li>SaaS</li></ul></main>
+<footer>Copyright Acme</footer></body></html>"""
+
+
+def _public(host, port):
+    return ["93.184.215.14"]
+
+
+def _fetcher(handler, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return JobDescriptionFetcher(client, **{"resolve": _public, **kwargs})
+
+
+def test_extracts_main_text_and_skips_chrome():
+    """Test the visible text of <main> is kept and nav, scripts and footer are dropped."""
+    extractor = JobTextExtractor()
+    for i in range(0, len(PAGE), 7):  # fed in small chunks, as streamed
+        extractor.feed(PAGE[i:i + 7])
+    extractor.close()
+    assert extractor.text() == ("Senior Product Manager\n\nOwn the roadmap & strategy.\n\n"
+                                "* 5+ years PM\n* SaaS")
+
+
+def test_prefers_json_ld_job_posting():
+    """Test a schema.org JobPosting description wins over the page text."""
+    posting = {"@context": "https://schema.org", "@type": "JobPosting", "title": "Data Engineer",
+               "description": "<p>Build pipelines.</p><ul><li>Python</li></ul>"}
+    extractor = JobTextExtractor()
+    extractor.feed(f'<script type="application/ld+json">{json.dumps(posting)}</script><main>Other</main>')
+    assert extractor.done
+    assert extractor.text() == "Data Engineer\n\nBuild pipelines.\n\n* Python"
+
+
+def test_cache_and_conditional_get():
+    """Test repeat lookups come from cache and stale entries revalidate with the ETag."""
+    requests = []
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html; charset=utf-8",
+                                                       "ETag": '"v1"'})
+    fetcher = _fetcher(handler, fresh_seconds=60)
+    async def run():
+        first = await fetcher.fetch("https://jobs.example.com/1")
+        second = await fetcher.fetch("https://jobs.example.com/1")
+        assert len(requests) == 1 and first == second
+        fetcher.fresh_seconds = 0
+        third = await fetcher.fetch("https://jobs.example.com/1")
+        assert third == first
+    asyncio.run(run())
+    assert len(requests) == 2 and requests[1].headers["If-None-Match"] == '"v1"'
+    assert fetcher.stats() == {"entries": 1, "hits": 1, "revalidated": 1, "downloads": 1, "errors": 0}
+
+
+def test_concurrent_fetches_share_one_download():
+    """Test simultaneous lookups of one URL make a single request."""
+    count = 0
+    async def handler(request):
+        nonlocal count
+        count += 1
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html"})
+    fetcher = _fetcher(handler)
+    async def run():
+        return await asyncio.gather(*(fetcher.fetch("https://jobs.example.com/2") for _ in range(5)))
+    results = asyncio.run(run())
+    assert count == 1 and len(set(results)) == 1
+
+
+def test_size_cap_and_errors():
+    """Test the download stops at max_bytes and bad URLs or statuses raise."""
+    big = "<main>" + "<p>requirement</p>" * 10_000 + "</main>"
+    fetcher = _fetcher(lambda r: httpx.Response(200, text=big, headers={"Content-Type": "text/html"}),
+                       max_bytes=1000)
+    text = asyncio.run(fetcher.fetch("https://jobs.example.com/big"))
+    assert 0 < text.count("requirement") < 100
+
+    missing = _fetcher(lambda r: httpx.Response(404))
+    with pytest.raises(JobDescriptionFetchError, match="404"):
+        asyncio.run(missing.fetch("https://jobs.example.com/gone"))
+    for url in ("file:///etc/passwd", "http://127.0.0.1/admin", "http://10.0.0.5/", "http://localhost:8000/"):
+        with pytest.raises(JobDescriptionFetchError):
+            check_url(url, resolve=None)
+    assert check_url("https://boards.greenhouse.io/acme/jobs/1", _public) == "https://boards.greenhouse.io/acme/jobs/1"
+
+
+def test_redirects_are_checked_hop_by_hop():
+    """Test a redirect is followed to a public page but never to an internal address."""
+    def handler(request):
+        if request.url.path == "/moved":
+            return httpx.Response(302, headers={"Location": "/job"})
+        if request.url.path == "/job":
+            return httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html"})
+        if request.url.path == "/loop":
+            return httpx.Response(302, headers={"Location": "/loop"})
+        assert request.url.host != "169.254.169.254"
+        return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data/"})
+    fetcher = _fetcher(handler)
+    assert asyncio.run(fetcher.fetch("https://jobs.example.com/moved")).startswith("Senior Product Manager")
+    with pytest.raises(JobDescriptionFetchError, match="non-public"):
+        asyncio.run(fetcher.fetch("https://jobs.example.com/metadata"))
+    with pytest.raises(JobDescriptionFetchError, match="redirected more than"):
+        asyncio.run(fetcher.fetch("https://jobs.example.com/loop"))
+
+
+def test_host_names_resolving_to_internal_addresses_are_refused():
+    """Test a DNS name is refused when any of its addresses is internal, on the first hop or a redirect."""
+    addresses = {"jobs.example.com": ["93.184.215.14"], "internal.example.com": ["93.184.215.14", "10.0.0.7"],
+                 "metadata.example.com": ["169.254.169.254"], "v6.example.com": ["::1"]}
+    requested = []
+    def handler(request):
+        requested.append(request.url.host)
+        if request.url.path == "/moved":
+            return httpx.Response(302, headers={"Location": "http://metadata.example.com/latest/"})
+        return httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html"})
+    fetcher = _fetcher(handler, resolve=lambda host, port: addresses[host])
+    for host in ("internal.example.com", "metadata.example.com", "v6.example.com"):
+        with pytest.raises(JobDescriptionFetchError, match="non-public"):
+            asyncio.run(fetcher.fetch(f"https://{host}/job"))
+    with pytest.raises(JobDescriptionFetchError, match="non-public"):
+        asyncio.run(fetcher.fetch("https://jobs.example.com/moved"))
+    assert requested == ["jobs.example.com"]
+
+    def unknown(host, port):
+        raise OSError("Name or service not known")
+    with pytest.raises(JobDescriptionFetchError, match="Could not resolve"):
+        check_url("https://nowhere.example/", unknown)
+
+
+def test_paragraphs_survive_for_boilerplate_stripping():
+    """Test extracted paragraphs stay blank-line separated so only boilerplate blocks are stripped."""
+    from backend.prompt_budget import strip_jd_boilerplate
+    extractor = JobTextExtractor()
+    extractor.feed("<main><h2>About the role</h2>\n<p>Lead the\nplatform team.</p>"
+                   "<h2>Benefits</h2><ul><li>401(k) match</li><li>Paid time off</li></ul></main>")
+    extractor.close()
+    stripped = strip_jd_boilerplate(extractor.text())
+    assert stripped == "About the role\n\nLead the platform team."
@@ -0,0 +1,93 @@
+"""Unit tests for the background job queue."""
+
+import asyncio
+import time
+import pytest
+from backend.job_queue import JobQueue, QueueFull
+
+
+async def echo(sub, payload):
+    return {"sub": sub, **payload}
+
+
+def test_claim_is_fair_between_users(tmp_path):
+    """Test a user with running jobs waits behind another user's first job."""
+    queue = JobQueue(tmp_path / "jobs.db", echo)
+    heavy = [queue.submit("heavy", {"n": i}) for i in range(3)]
+    light = queue.submit("light", {"n": 0})
+
+    assert queue.claim().id == heavy[0].id
+    assert queue.claim().id == light.id
+    assert queue.claim().id == heavy[1].id
+
+
+def test_queue_limits(tmp_path):
+    """Test submit refuses jobs past the per-user and total queue limits."""
+    queue = JobQueue(tmp_path / "jobs.db", echo, max_queued=3, max_queued_per_user=2)
+    queue.submit("alice", {})
+    queue.submit("alice", {})
+    with pytest.raises(QueueFull):
+        queue.submit("alice", {})
+    queue.submit("bob", {})
+    with pytest.raises(QueueFull):
+        queue.submit("carol", {})
+
+
+def test_expired_lease_is_retried_then_failed(tmp_path, monkeypatch):
+    """Test a job left running by a dead worker is claimed again, then given up on."""
+    queue = JobQueue(tmp_path / "jobs.db", echo, timeout_seconds=10, max_attempts=2)
+    job = queue.submit("alice", {})
+    assert queue.claim().id == job.id
+    assert queue.claim() is None
+
+    # a new process on the same database, after the lease ran out
+    later = time.time() + 60
+    monkeypatch.setattr("backend.job_queue.time.time", lambda: later)
+    restarted = JobQueue(tmp_path / "jobs.db", echo, timeout_seconds=10, max_attempts=2)
+    assert restarted.claim().attempts == 2
+
+    monkeypatch.setattr("backend.job_queue.time.time", lambda: later + 60)
+    assert restarted.claim() is None
+    assert restarted.get(job.id).status == "failed"
+
+
+def test_workers_run_jobs_and_wait_returns_results(tmp_path):
+    """Test workers run submitted jobs and a long-poll returns when they finish."""
+    async def flaky(sub, payload):
+        await asyncio.sleep(0.01)
+        if payload.get("fail"):
+            raise ValueError("bad listing")
+        return {"sub": sub}
+
+    async def run():
+        queue = JobQueue(tmp_path / "jobs.db", flaky, workers=2)
+        queue.init()
+        await queue.start()
+        try:
+            ok = await queue.enqueue("alice", {})
+            bad = await queue.enqueue("alice", {"fail": True})
+            return await queue.wait(ok.id, 5), await queue.wait(bad.id, 5)
+        finally:
+            await queue.stop()
+
+    ok, bad = asyncio.run(run())
+    assert ok.status == "done" and ok.result == {"sub": "alice"}
+    assert bad.status == "failed" and "bad listing" in bad.error
+
+
+def test_stop_requeues_running_jobs(tmp_path):
+    """Test jobs interrupted by shutdown go back to the queue for the next process."""
+    async def slow(sub, payload):
+        await asyncio.sleep(60)
+
+    async def run():
+        queue = JobQueue(tmp_path / "jobs.db", slow, workers=1)
+        await queue.start()
+        job = await queue.enqueue("alice", {})
+        while queue.get(job.id).status != "running":
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return queue.get(job.id)
+
+    job = asyncio.run(run())
+    assert job.status == "queued" and job.attempts == 0
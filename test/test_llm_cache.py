@@ -0,0 +1,45 @@
+"""Unit tests for the content-addressed LLM response cache."""
+
+import os
+import time
+from backend.llm_cache import LLMResponseCache, make_cache_key
+
+
+def test_cache_key_is_canonical():
+    """Test the key ignores dict ordering but not content, template or model."""
+    key = make_cache_key("gpt-5-mini", "template", {"Resume": "r", "Job_Description": "j"})
+    assert key == make_cache_key("gpt-5-mini", "template", {"Job_Description": "j", "Resume": "r"})
+    assert key != make_cache_key("gpt-5-mini", "template", {"Job_Description": "j2", "Resume": "r"})
+    assert key != make_cache_key("gpt-5-mini", "template v2", {"Job_Description": "j", "Resume": "r"})
+    assert key != make_cache_key("gpt-5", "template", {"Job_Description": "j", "Resume": "r"})
+
+
+def test_memory_then_disk_hits(tmp_path):
+    """Test hits come from memory, and from disk for a fresh process."""
+    cache = LLMResponseCache(tmp_path)
+    assert cache.get("k") is None
+    cache.put("k", '{"Fit": 1}')
+    assert cache.get("k") == '{"Fit": 1}'
+
+    other_worker = LLMResponseCache(tmp_path)
+    assert other_worker.get("k") == '{"Fit": 1}'
+    assert other_worker.get("k") == '{"Fit": 1}'
+    assert cache.stats()["hits_memory"] == 1 and cache.stats()["misses"] == 1
+    assert other_worker.stats()["hits_disk"] == 1 and other_worker.stats()["hits_memory"] == 1
+
+
+def test_size_and_ttl_eviction(tmp_path):
+    """Test both tiers stay within their byte limits and drop expired entries."""
+    cache = LLMResponseCache(tmp_path, max_memory_bytes=10, max_disk_bytes=10)
+    cache.put("old", "x" * 6)
+    old_time = time.time() - 60
+    os.utime(tmp_path / "old.json", (old_time, old_time))
+    cache.put("new", "y" * 6)
+    assert cache.stats()["memory_entries"] == 1
+    assert not (tmp_path / "old.json").exists()
+    assert cache.get("new") == "y" * 6
+
+    expiring = LLMResponseCache(tmp_path, ttl_seconds=0)
+    time.sleep(0.01)
+    assert expiring.get("new") is None
+    assert not (tmp_path / "new.json").exists()
@@ -0,0 +1,169 @@
+"""Unit tests for hedged LLM requests, fallbacks and circuit breakers against the stub server."""
+
+import asyncio
+import httpx
+import pytest
+from openai import AsyncOpenAI, BadRequestError
+from backend.llm_client import CircuitBreaker, HedgedLLMClient, LLMEndpoint
+from backend.llm_stub import create_app
+
+MESSAGES = [{"role": "user", "content": "Review this resume"}]
+
+
+def stub_endpoint(name, **stub_options):
+    """Return an endpoint backed by an in-process stub server, and the stub app."""
+    app = create_app(content='{"Fit": {"score": 7}}', **stub_options)
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stub")
+    client = AsyncOpenAI(api_key="test", base_url="http://stub/v1", http_client=http_client,
+                         max_retries=0)
+    return LLMEndpoint(name, client, "stub-model"), app
+
+
+def test_hedge_beats_slow_first_request():
+    """Test a hedged request answers when the first request hits the latency tail."""
+    endpoint, app = stub_endpoint("primary", pattern=[5.0, 0.01])
+    client = HedgedLLMClient([endpoint], initial_hedge_delay=0.05)
+
+    async def run():
+        start = asyncio.get_running_loop().time()
+        response = await client.create(messages=MESSAGES)
+        return response, asyncio.get_running_loop().time() - start
+
+    response, elapsed = asyncio.run(run())
+    assert response.choices[0].message.content == '{"Fit": {"score": 7}}'
+    assert elapsed < 2
+    assert app.state.requests == 2
+    assert endpoint.hedges == 1 and endpoint.hedge_wins == 1
+    assert len(endpoint.latency.samples) == 2  # the cancelled loser counts too
+
+
+def test_hedge_delay_follows_observed_latency():
+    """Test the hedge delay is the clamped percentile of recent latencies."""
+    endpoint, _ = stub_endpoint("primary")
+    client = HedgedLLMClient([endpoint], hedge_percentile=0.9, initial_hedge_delay=60,
+                             min_hedge_delay=1, max_hedge_delay=20)
+    assert client.hedge_delay(endpoint) == 60
+    for seconds in range(1, 11):
+        endpoint.latency.record(seconds)
+    assert client.hedge_delay(endpoint) == 10
+    for _ in range(20):
+        endpoint.latency.record(100)
+    assert client.hedge_delay(endpoint) == 20
+
+
+def test_fallback_and_circuit_breaker():
+    """Test failures fall back to the next endpoint and open the failing endpoint's circuit."""
+    primary, primary_app = stub_endpoint("primary", fail_rate=1.0)
+    primary.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    fallback, fallback_app = stub_endpoint("fallback")
+    client = HedgedLLMClient([primary, fallback], hedge=False)
+
+    async def run():
+        for _ in range(3):
+            response = await client.create(messages=MESSAGES)
+            assert response.choices[0].message.content == '{"Fit": {"score": 7}}'
+
+    asyncio.run(run())
+    assert primary.breaker.state == "open"
+    assert primary_app.state.requests == 2  # skipped once its circuit opened
+    assert fallback_app.state.requests == 3
+
+
+def test_stream_falls_back_before_first_chunk():
+    """Test a stream that fails to start is served by the next endpoint."""
+    primary, _ = stub_endpoint("primary", fail_rate=1.0)
+    fallback, _ = stub_endpoint("fallback")
+    client = HedgedLLMClient([primary, fallback])
+
+    async def run():
+        return "".join([chunk.choices[0].delta.content
+                        async for chunk in client.stream(messages=MESSAGES)
+                        if chunk.choices])
+
+    assert asyncio.run(run()) == '{"Fit": {"score": 7}}'
+
+
+def test_circuit_breaker_half_open():
+    """Test an open circuit lets one trial request through after the reset time."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+    with pytest.raises(ValueError):
+        HedgedLLMClient([])
+
+
+def test_cancelled_trial_releases_half_open_circuit():
+    """Test a half-open trial that is cancelled or closed early lets the next request through."""
+    endpoint, app = stub_endpoint("primary", pattern=[5.0, 0.01, 0.01])
+    endpoint.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    endpoint.breaker.record_failure()
+    client = HedgedLLMClient([endpoint], hedge=False)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.create(messages=MESSAGES), timeout=0.1)
+        assert endpoint.breaker.state == "half-open" and endpoint.breaker.allow()
+        endpoint.breaker.release_trial()
+        stream = client.stream(messages=MESSAGES)
+        await anext(stream)
+        await stream.aclose()  # consumer went away mid-stream
+        assert endpoint.breaker.allow()
+        endpoint.breaker.release_trial()
+        response = await client.create(messages=MESSAGES)
+        assert response.choices[0].message.content == '{"Fit": {"score": 7}}'
+
+    asyncio.run(run())
+    assert endpoint.breaker.state == "closed" and app.state.requests == 3
+
+
+def test_request_errors_do_not_trip_the_breaker():
+    """Test a 4xx caused by the request is raised as is, without a failure or a fallback call."""
+    primary, primary_app = stub_endpoint("primary", fail_rate=1.0, fail_status=400)
+    primary.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    fallback, fallback_app = stub_endpoint("fallback")
+    client = HedgedLLMClient([primary, fallback], hedge=False)
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(BadRequestError):
+                await client.create(messages=MESSAGES)
+        with pytest.raises(BadRequestError):
+            async for _ in client.stream(messages=MESSAGES):
+                pass
+
+    asyncio.run(run())
+    assert primary.breaker.state == "closed" and primary.breaker.failures == 0
+    assert primary_app.state.requests == 4 and fallback_app.state.requests == 0
+
+
+def test_cancelled_caller_cancels_running_request():
+    """Test the request in flight is cancelled when the caller is, not left running."""
+    class HangingCompletions:
+        cancelled = 0
+
+        async def create(self, **kwargs):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                HangingCompletions.cancelled += 1
+                raise
+
+    class HangingClient:
+        class chat:
+            completions = HangingCompletions()
+
+    endpoint = LLMEndpoint("hanging", HangingClient(), "stub-model")
+    client = HedgedLLMClient([endpoint], initial_hedge_delay=30)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.create(messages=MESSAGES), timeout=0.05)
+        await asyncio.sleep(0.01)
+        assert HangingCompletions.cancelled == 1  # before asyncio.run cancels what is left
+
+    asyncio.run(run())
+    assert endpoint.breaker.allow()
@@ -0,0 +1,42 @@
+"""Unit tests for LLM output validation and repair."""
+
+import json
+from backend.llm_output import ScreenOutput, parse_llm_output, reask_prompt, repair_json
+
+COMPLETE = {"Fit": {"score": 7, "rationale": "ok"}, "Gap_Map": [{"JD Requirement/Keyword": "SQL"}],
+            "Questions": ["Led a team?"], "Tailored_Resume": "Jane Doe\nData Scientist"}
+
+
+def test_repair_fences_and_trailing_commas():
+    """Test fenced output with trailing commas parses after repair."""
+    text = '```json\n{"Fit": {"score": 7, "rationale": "ok",}, "Gap_Map": [],}\n```'
+    repaired, value_cut = repair_json(text)
+    assert json.loads(repaired) == {"Fit": {"score": 7, "rationale": "ok"}, "Gap_Map": []}
+    assert not value_cut
+
+
+def test_truncated_output_reports_cut_field():
+    """Test a response cut off inside a value keeps earlier fields and flags the rest."""
+    text = json.dumps(COMPLETE)
+    response, missing = parse_llm_output(text[:text.index("Data Scientist")])
+    assert missing == ["Tailored_Resume"]
+    assert response["Questions"] == ["Led a team?"]
+
+    response, missing = parse_llm_output(text[:text.index("Led a")])
+    assert missing == ["Questions", "Tailored_Resume"]
+    assert response["Fit"]["score"] == 7
+
+
+def test_invalid_fields_are_reported():
+    """Test schema violations are reported per field and valid output passes."""
+    response, missing = parse_llm_output(json.dumps({**COMPLETE, "Questions": "not a list"}))
+    assert missing == ["Questions"]
+    assert parse_llm_output(json.dumps(COMPLETE)) == (COMPLETE, [])
+    assert parse_llm_output('{"Fit": {"score": 5}, "Gap_Map": []}', ScreenOutput)[1] == []
+    assert parse_llm_output("Sorry, I can't help with that.")[1] == list(COMPLETE)
+
+
+def test_reask_prompt_keeps_prefix():
+    """Test the re-ask extends the original prompt and names only the missing fields."""
+    prompt = reask_prompt("PROMPT", ["Tailored_Resume"])
+    assert prompt.startswith("PROMPT") and '"Tailored_Resume"' in prompt and "Fit" not in prompt
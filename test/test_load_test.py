@@ -0,0 +1,39 @@
+"""Smoke test of the load-test driver against the app in-process."""
+
+import asyncio
+import httpx
+from backend import api
+from backend.jd_index import JobDescriptionIndex
+from backend.resume_library import ResumeLibrary
+from backend.job_queue import JobQueue
+from backend.llm_cache import LLMResponseCache
+from backend.session_store import SessionStore
+from bench.load_test import RECORDED_RESPONSE_FILE, compare, run_scenario
+
+
+def test_run_scenario_reports_latency_and_errors(monkeypatch, tmp_path):
+    """Test the driver's stats for a short /review run and the regression check."""
+    monkeypatch.setattr(api, "sessions", SessionStore(
+        tmp_path / "sessions.db", factory=api.new_session_state))
+    monkeypatch.setattr(api, "llm_cache", LLMResponseCache(tmp_path / "llm_cache"))
+    monkeypatch.setattr(api, "jobs", JobQueue(tmp_path / "jobs.db", api.run_review_job))
+    monkeypatch.setattr(api, "jd_index", JobDescriptionIndex(tmp_path / "jd_index.db"))
+    monkeypatch.setattr(api, "resume_library", ResumeLibrary(tmp_path / "resumes.db"))
+    monkeypatch.setattr(api, "verify_token", lambda creds=None: {"sub": creds.credentials})
+    monkeypatch.setattr(api, "check_authorized_user", lambda claims: claims)
+    async def mock_prompt_llm(prompt: str) -> str:
+        return RECORDED_RESPONSE_FILE.read_text()
+    monkeypatch.setattr(api, "prompt_llm", mock_prompt_llm)
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            return await run_scenario(client, "review", concurrency=3, requests=6)
+
+    result = asyncio.run(run())
+    assert result["requests"] == 6 and result["error_rate"] == 0
+    assert 0 < result["p50_seconds"] <= result["p95_seconds"] <= result["p99_seconds"]
+
+    slower = {**result, "throughput_rps": result["throughput_rps"] / 2}
+    assert compare([slower], [result], tolerance=0.2)
+    assert not compare([result], [result], tolerance=0.2)
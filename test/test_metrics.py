@@ -0,0 +1,38 @@
+"""Unit tests for the metrics registry and its text exposition."""
+
+import pytest
+from backend.metrics import Registry, stage_errors, stage_seconds, stage_timer
+
+
+def test_render_text_format():
+    """Test counters, gauges and histograms render in the Prometheus text format."""
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    requests.inc(route="/review")
+    requests.inc(2, route="/review")
+    in_flight.inc()
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/review"} 3' in lines
+    assert "in_flight 1" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_stage_timer_records_time_and_errors():
+    """Test stage_timer observes every run and counts the ones that raise."""
+    with stage_timer("unit_test_stage"):
+        pass
+    with pytest.raises(ValueError):
+        with stage_timer("unit_test_stage"):
+            raise ValueError("boom")
+    assert stage_seconds._values[("unit_test_stage",)][2] == 2
+    assert stage_errors._values[("unit_test_stage", "ValueError")] == 1
@@ -0,0 +1,28 @@
+"""Smoke test of the micro-benchmark corpus and driver."""
+
+from backend.demo_maker import create_benchmark_case, edit_text, scale_text
+from bench.micro_bench import compare, run
+
+
+def test_corpus_scales_and_edits():
+    """Test corpus pages scale the demo text and edit density controls how many lines change."""
+    one, five = scale_text("Jane DOE led 12 teams\n", 1), scale_text("Jane DOE led 12 teams\n", 5)
+    assert one == "Jane DOE led 12 teams\n" and five.count("Jane") == 5 and len(set(five.split("\n\n"))) > 1
+    case = create_benchmark_case(2, 0.05)
+    assert case["baseline"] == create_benchmark_case(2, 1.0)["baseline"]  # same baseline at every density
+    def changed(density):
+        edited = edit_text(case["baseline"], density).splitlines()
+        return sum(a != b for a, b in zip(case["baseline"].splitlines(), edited))
+    assert changed(0.0) == 0 and changed(0.05) < changed(1.0)
+
+
+def test_run_and_compare():
+    """Test the driver measures every target once per size and flags regressions."""
+    results = run([1], [0.05, 1.0], ["redline", "review_prompt"], repeat=1)
+    assert [(r["target"], r["density"]) for r in results] == [
+        ("redline", 0.05), ("review_prompt", None), ("redline", 1.0)]
+    assert all(r["seconds"] > 0 and r["peak_bytes"] > 0 for r in results)
+
+    slower = [{**r, "seconds": r["seconds"] * 2 + 0.01} for r in results]
+    assert len(compare(slower, results, tolerance=0.25)) == len(results)
+    assert not compare(results, results, tolerance=0.25)
@@ -0,0 +1,77 @@
+"""Unit tests for the local keyword pre-assessment."""
+
+from backend.pre_assess import extract_requirements, keyword_hints, pre_assess, terms
+
+JD = """Senior Data Engineer
+
+About us:
+We build analytics for retailers.
+
+Responsibilities:
+- Build and maintain batch and streaming data pipelines in Python and Spark
+- Partner with analysts on data modeling
+
+Requirements:
+- 5+ years building data pipelines with Python
+- Experience with Kubernetes and Terraform
+- Bachelor's degree in computer science (master's preferred)
+
+Nice to have:
+- Experience with Kafka
+"""
+
+RESUME = """ACME RETAIL   2019 - 2024
+Data Engineer
+* Built streaming pipelines in Python and Spark processing 2B events a day
+* Led data modeling for the analytics team
+* Managed Kafka clusters
+"""
+
+
+def test_terms_stem_and_drop_filler():
+    """Test stemming makes resume verbs match JD nouns and filler words are ignored."""
+    assert terms("Led leadership, building pipelines") == terms("leading leader built pipeline")
+    assert terms("Strong experience with excellent skills") == []
+
+
+def test_extract_requirements_by_section():
+    """Test requirement lines get their section's priority and intro text is skipped."""
+    found = {r["text"]: r["priority"] for r in extract_requirements(JD)}
+    assert found["5+ years building data pipelines with Python"] == "High"
+    assert found["Bachelor's degree in computer science (master's preferred)"] == "High"
+    assert found["Partner with analysts on data modeling"] == "Med"
+    assert found["Experience with Kafka"] == "Low"
+    assert "We build analytics for retailers." not in found
+
+
+def test_pre_assess_gap_map_and_score():
+    """Test matched, partial and missing requirements, their evidence and the preliminary score."""
+    result = pre_assess(JD, RESUME)
+    rows = {row["JD Requirement/Keyword"]: row for row in result["Gap_Map"]}
+    pipelines = rows["5+ years building data pipelines with Python (High)"]
+    assert pipelines["Present in Resume?"] == "Yes"
+    assert pipelines["Where/Evidence"].startswith("ACME RETAIL: Built streaming pipelines")
+    assert rows["Experience with Kafka (Low)"]["Present in Resume?"] == "Yes"
+    missing = rows["Experience with Kubernetes and Terraform (High)"]
+    assert missing["Present in Resume?"] == "No"
+    assert missing["Gap handling"] == "Add - if true, cover: kubernetes, terraform"
+    assert 1 < result["Fit"]["score"] < 10 and result["Fit"]["preliminary"]
+
+    result["Gap_Map"].clear()  # callers get their own copy of the cached result
+    assert pre_assess(JD, RESUME)["Gap_Map"]
+    hints = keyword_hints(pre_assess(JD, RESUME))
+    assert "5+ years building data pipelines with Python (High) @ ACME RETAIL" in hints["Yes"]
+    assert "Experience with Kubernetes and Terraform (High)" in hints["No"]
+
+
+def test_requirements_survive_boilerplate_stripping(monkeypatch):
+    """Test requirements fall back to the raw JD and a JD without any gets no preliminary Fit."""
+    import backend.pre_assess as pre_assess_module
+
+    monkeypatch.setattr(pre_assess_module, "strip_jd_boilerplate", lambda text: "")
+    assert [r["text"] for r in extract_requirements(JD)] == [r["text"] for r in pre_assess_module._requirements(JD)]
+    assert extract_requirements(JD)
+
+    result = pre_assess("", RESUME)
+    assert result["Gap_Map"] == [] and result["Fit"]["score"] is None
+    assert keyword_hints(result) == {"Yes": [], "Partial": [], "No": []}
@@ -0,0 +1,106 @@
+"""Unit tests for prompt token budgeting and compaction."""
+
+from backend.prompt_budget import (compact_json, compact_qa_pairs, count_tokens, fit_to_budget,
+                                   strip_jd_boilerplate)
+
+JD = """Senior Data Scientist
+
+Responsibilities:
+- Build forecasting models
+- Partner with product teams
+
+Benefits:
+
+- Medical, dental and vision
+- Generous paid time off
+
+Requirements:
+- 5+ years of Python
+
+Acme is an equal opportunity employer. All qualified applicants will receive
+consideration without regard to race, color, religion, sex or national origin."""
+
+
+def test_strip_jd_boilerplate():
+    """Test benefits sections and EEO statements are dropped and the role is kept."""
+    stripped = strip_jd_boilerplate(JD)
+    assert "forecasting models" in stripped
+    assert "5+ years of Python" in stripped
+    assert "dental" not in stripped
+    assert "equal opportunity" not in stripped
+    assert "qualified applicants" not in stripped  # wrapped sentence dropped whole
+
+
+def test_strip_jd_boilerplate_single_block():
+    """Test a JD without blank lines loses only its boilerplate sentences, never the requirements."""
+    jd = ("Staff iOS Engineer at Globex\n"
+          "You will own our Swift codebase and ship SwiftUI features. We offer paid time off and a 401(k).\n"
+          "- 6+ years building iOS apps\n"
+          "- Generous parental leave\n"
+          "Globex is an equal opportunity employer.")
+    stripped = strip_jd_boilerplate(jd)
+    assert stripped == ("Staff iOS Engineer at Globex\n"
+                        "You will own our Swift codebase and ship SwiftUI features.\n"
+                        "- 6+ years building iOS apps")
+    eeo_only = "We are an equal opportunity employer and value diversity."
+    assert strip_jd_boilerplate(eeo_only) == eeo_only  # never stripped to nothing
+
+
+def test_strip_jd_boilerplate_inline_and_colonless_headings():
+    """Test an inline "Salary range: ..." drops only its line and a colonless heading's section ends early."""
+    jd = ("Senior Backend Engineer\n"
+          "Salary range: $150k-$180k\n"
+          "You will build our payments APIs in Go.\n"
+          "- 5+ years of Go\n"
+          "- Experience with PostgreSQL and Kafka\n"
+          "Benefits\n"
+          "- Gym membership\n"
+          "- Medical, dental and vision\n"
+          "\n"
+          "- Own the ledger service\n"
+          "Perks\n"
+          "- Free lunch\n"
+          "What you'll do\n"
+          "- Mentor two engineers\n"
+          "Bonus Points: Rust.")
+    stripped = strip_jd_boilerplate(jd)
+    assert "$150k" not in stripped and "Gym" not in stripped and "lunch" not in stripped
+    for kept in ("payments APIs in Go", "5+ years of Go", "PostgreSQL and Kafka", "ledger service",
+                 "What you'll do", "Mentor two engineers", "Bonus Points: Rust."):
+        assert kept in stripped
+
+
+def test_compact_qa_pairs():
+    """Test repeated questions keep the latest answer and old pairs age out."""
+    qa_pairs = [
+        {"question": "Led a team?", "answer": "No"},
+        {"question": "Used Spark?", "answer": ""},
+        {"question": "Used SQL?", "answer": "Yes"},
+        {"question": "led a  team?", "answer": "Yes, 5 people"},
+    ]
+    assert compact_qa_pairs(qa_pairs, 10) == [
+        {"question": "Used SQL?", "answer": "Yes"},
+        {"question": "led a  team?", "answer": "Yes, 5 people"},
+    ]
+    assert compact_qa_pairs(qa_pairs, 1) == [{"question": "led a  team?", "answer": "Yes, 5 people"}]
+
+
+def test_fit_to_budget_keeps_resume():
+    """Test the budget drops qa_pairs and Gap_Map first and never cuts the resume."""
+    input_dict = {
+        "Job_Description": "Job line\n" * 200,
+        "Resume": "Resume line\n" * 100,
+        "Gap_Map": [{"JD Requirement/Keyword": "x" * 400}],
+        "qa_pairs": [{"question": "q" * 200, "answer": "a" * 200}] * 3,
+    }
+    budget = count_tokens(compact_json(input_dict)) - 400
+    fitted, steps = fit_to_budget(input_dict, budget)
+    assert count_tokens(compact_json(fitted)) <= budget
+    assert fitted["Resume"] == input_dict["Resume"]
+    assert "Gap_Map" not in fitted
+    assert steps[0] == "dropped 3 oldest qa_pairs"
+
+    fitted, steps = fit_to_budget(input_dict, budget - 300)
+    assert count_tokens(compact_json(fitted)) <= budget - 300
+    assert fitted["Job_Description"].endswith("[...]")
+    assert fitted["Resume"] == input_dict["Resume"]
@@ -0,0 +1,181 @@
+"""Equivalence tests for the redline diff engines."""
+
+import json
+import random
+import re
+import pytest
+from pathlib import Path
+from backend import redline
+from backend.demo_maker import edit_text
+from backend.redline import redline_diff, redline_segments
+
+
+DEMO_DIR = Path(__file__).resolve().parent.parent / "demo"
+DEMO_RUNS = [DEMO_DIR / "run 1 temp files saved", DEMO_DIR / "run 2 temp files saved"]
+ADD = re.compile(r'<span style="color:#008000"><add>(.*?)</add></span>', re.DOTALL)
+DEL = re.compile(r'<span style="color:#c00000"><del>(.*?)</del></span>', re.DOTALL)
+
+
+def accept_changes(markup: str) -> str:
+    """Apply the redline: keep additions, drop deletions."""
+    return ADD.sub(r"\1", DEL.sub("", markup))
+
+
+def reject_changes(markup: str) -> str:
+    """Undo the redline: keep deletions, drop additions."""
+    return DEL.sub(r"\1", ADD.sub("", markup))
+
+
+def _legacy_tokenize(text: str):
+    """The original position-by-position tokenizer."""
+    tokens, i = [], 0
+    while i < len(text):
+        m = redline._TOKEN_PATTERN.match(text, i)
+        tokens.append(m.group(0))
+        i = m.end()
+    return tokens
+
+
+@pytest.mark.parametrize("engine", sorted(redline.ENGINES))
+def test_create_resume_diff_engines(engine):
+    """Test both engines produce the markup expected by test_create_resume_diff."""
+    baseline = "This is a text\nThis is a text on a new line"
+    revised = "This is a short text\nThis is gibberish on a new line"
+    expected_diff = '''This is a<span style="color:#008000"><add> short</add></span> text
+This is <span style="color:#c00000"><del>a text</del></span><span style="color:#008000"><add>gibberish</add></span> on a new line'''
+    assert redline_diff(baseline, revised, engine=engine) == expected_diff
+
+
+@pytest.mark.parametrize("run_dir", DEMO_RUNS, ids=lambda p: p.name)
+@pytest.mark.parametrize("engine", sorted(redline.ENGINES))
+def test_demo_runs_round_trip(run_dir, engine):
+    """Test each engine's redline of the saved demo runs reproduces both resumes."""
+    baseline = (run_dir / "resume_baseline.txt").read_text()
+    revised = (run_dir / "resume_revised.txt").read_text()
+    markup = redline_diff(baseline, revised, engine=engine)
+    assert accept_changes(markup) == revised
+    assert reject_changes(markup) == baseline
+    assert "<del>" in markup and "<add>" in markup
+
+
+def test_engines_make_equally_small_edits_on_demo_runs():
+    """Test the engines agree on the demo runs: identical markup on run 2, and on run 1 (where an
+    added line's newline can fall on either side of it) the same spans and changed characters."""
+    def edits(markup):
+        return [len(ADD.findall(markup)), sum(map(len, ADD.findall(markup))),
+                len(DEL.findall(markup)), sum(map(len, DEL.findall(markup)))]
+    for run_dir in DEMO_RUNS:
+        baseline = (run_dir / "resume_baseline.txt").read_text()
+        revised = (run_dir / "resume_revised.txt").read_text()
+        linewise = redline_diff(baseline, revised, engine="linewise")
+        classic = redline_diff(baseline, revised, engine="classic")
+        assert edits(linewise) == edits(classic)
+    assert linewise == classic  # run 2
+
+
+def _changed_chars(markup: str) -> int:
+    return sum(map(len, ADD.findall(markup))) + sum(map(len, DEL.findall(markup)))
+
+
+def _random_edit(rng: random.Random) -> tuple[str, str]:
+    """Return a random text of words, spaces and line breaks, and a copy with a few token edits."""
+    words = "led built shipped python data team a the of and - scale growth".split()
+    tokens = [rng.choice(words) + rng.choice((" ", " ", "\n")) for _ in range(rng.randrange(5, 60))]
+    revised = list(tokens)
+    for _ in range(rng.randrange(1, 6)):
+        i = rng.randrange(len(revised))
+        action = rng.random()
+        if action < 0.4:
+            revised.insert(i, rng.choice(words) + rng.choice((" ", "\n")))
+        elif action < 0.7 and len(revised) > 1:
+            del revised[i]
+        else:
+            revised[i] = rng.choice(words) + " "
+    return "".join(tokens), "".join(revised)
+
+
+def test_engines_on_random_edits():
+    """Test both engines give an exact redline of random edits, and on tailoring-style edits of
+    the demo resume linewise never marks more text as changed than classic."""
+    for seed in range(300):
+        baseline, revised = _random_edit(random.Random(seed))
+        for engine in redline.ENGINES:
+            markup = redline_diff(baseline, revised, engine=engine)
+            assert accept_changes(markup) == revised and reject_changes(markup) == baseline, (seed, engine)
+
+    resume = (DEMO_DIR / "resume_demo.txt").read_text()
+    for seed in range(12):
+        revised = edit_text(resume, (0.05, 0.2, 0.5)[seed % 3], seed=seed)
+        linewise = redline_diff(resume, revised, engine="linewise")
+        classic = redline_diff(resume, revised, engine="classic")
+        assert accept_changes(linewise) == revised and reject_changes(linewise) == resume
+        assert _changed_chars(linewise) <= _changed_chars(classic), seed
+
+
+def test_default_engine_is_classic():
+    """Test the default markup stays the classic engine's."""
+    baseline, revised = _random_edit(random.Random(7))
+    assert redline.REDLINE_ENGINE == "classic"
+    assert redline_diff(baseline, revised) == redline_diff(baseline, revised, engine="classic")
+
+
+def test_linewise_keeps_unchanged_lines_verbatim():
+    """Test edits in one bullet do not leak markup into unchanged lines."""
+    baseline = "\n".join(f"- bullet {i} did things" for i in range(200))
+    revised = baseline.replace("bullet 100 did things", "bullet 100 shipped things")
+    markup = redline_diff(baseline, revised, engine="linewise")
+    assert markup == redline_diff(baseline, revised, engine="classic")
+    assert markup.count("<add>") == 1 and markup.count("<del>") == 1
+
+
+def test_tokenizer_matches_legacy():
+    """Test the findall tokenizer splits text exactly like the original loop."""
+    text = (DEMO_RUNS[1] / "resume_revised.txt").read_text() + " don't-stop -x- _a_ é…\t\n"
+    assert redline._tokenize(text) == _legacy_tokenize(text)
+
+
+def apply_segments(redline: dict, baseline: str) -> tuple[str, str]:
+    """Rebuild (baseline, revised) from typed segments."""
+    old, new = [], []
+    for segment in redline["segments"]:
+        op = segment[0]
+        text = baseline[segment[1]:segment[2]] if len(segment) == 3 else segment[1]
+        if op in "=-":
+            old.append(text)
+        if op in "=+":
+            new.append(text)
+    return "".join(old), "".join(new)
+
+
+@pytest.mark.parametrize("run_dir", DEMO_RUNS, ids=lambda p: p.name)
+@pytest.mark.parametrize("offsets", [False, True])
+def test_segments_round_trip(run_dir, offsets):
+    """Test typed segments rebuild both resumes and are smaller than the HTML redline."""
+    baseline = (run_dir / "resume_baseline.txt").read_text()
+    revised = (run_dir / "resume_revised.txt").read_text()
+    segments = redline_segments(baseline, revised, offsets=offsets)
+    assert segments["version"] == redline.REDLINE_SEGMENTS_VERSION
+    assert segments["format"] == ("offsets" if offsets else "segments")
+    assert apply_segments(segments, baseline) == (baseline, revised)
+    assert len(json.dumps(segments)) < len(json.dumps(redline_diff(baseline, revised)))
+    ops = [segment[0] for segment in segments["segments"]]
+    assert all(a != b for a, b in zip(ops, ops[1:]))  # adjacent segments are merged
+
+
+def test_opcodes_memoized(monkeypatch):
+    """Test the same (baseline, revised) pair is only diffed once."""
+    calls = []
+    def counting_engine(baseline, revised):
+        calls.append((baseline, revised))
+        return redline._linewise_opcodes(baseline, revised)
+    monkeypatch.setitem(redline.ENGINES, "counting", counting_engine)
+    html = redline_diff("same baseline", "same revised", engine="counting")
+    redline_segments("same baseline", "same revised", engine="counting")
+    assert redline_diff("same baseline", "same revised", engine="counting") == html
+    assert len(calls) == 1
+
+
+def test_unknown_engine():
+    """Test an unknown engine name is rejected."""
+    with pytest.raises(ValueError):
+        redline_diff("a", "b", engine="bogus")
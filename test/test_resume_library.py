@@ -0,0 +1,51 @@
+"""Unit tests for the per-user resume library."""
+
+import pytest
+from backend.resume_library import LibraryFull, ResumeLibrary
+
+IC = """JANE DOE
+Senior Software Engineer
+ACME CORP   2019 - present
+- Built Python and Kafka data pipelines processing 2B events a day
+- Wrote Kubernetes operators and Terraform modules for the platform team
+- Profiled and optimized PostgreSQL queries, cutting p99 latency 40%
+"""
+MANAGER = """JANE DOE
+Engineering Manager
+ACME CORP   2019 - present
+- Led and hired a team of 12 engineers across two product squads
+- Ran quarterly roadmap planning with product and design leadership
+- Coached managers, owned performance reviews and career growth plans
+"""
+JD_IC = "We need a backend engineer to build Kafka pipelines in Python on Kubernetes and tune PostgreSQL."
+JD_MANAGER = "Hiring an engineering manager to lead and grow a team, hire engineers and own the roadmap."
+
+
+def test_selects_closest_variant(tmp_path):
+    """Test each job description picks the variant it shares the most distinctive terms with."""
+    library = ResumeLibrary(tmp_path / "resumes.db")
+    assert library.select("u1", JD_IC) is None
+    library.save("u1", "ic", IC)
+    library.save("u1", "manager", MANAGER)
+
+    match = library.select("u1", JD_IC)
+    assert match.name == "ic" and match.resume == IC
+    assert match.scores["ic"] > match.scores["manager"]
+    assert library.select("u1", JD_MANAGER).name == "manager"
+    assert library.select("u2", JD_IC) is None  # libraries are per user
+
+
+def test_save_replace_delete_and_limit(tmp_path):
+    """Test saving a name again replaces it, deleting frees a slot, and max_variants is enforced."""
+    library = ResumeLibrary(tmp_path / "resumes.db", max_variants=2)
+    library.save("u1", "ic", IC)
+    library.save("u1", "manager", MANAGER)
+    library.save("u1", "ic", IC + "- Mentored two junior engineers\n")  # replacing is not adding
+    assert library.get("u1", "ic").endswith("junior engineers\n")
+    assert [v["name"] for v in library.variants("u1")] == ["ic", "manager"]
+    with pytest.raises(LibraryFull):
+        library.save("u1", "fintech", IC)
+
+    assert library.delete("u1", "manager") and not library.delete("u1", "manager")
+    library.save("u1", "fintech", IC)
+    assert library.get("u1", "manager") is None
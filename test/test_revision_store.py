@@ -0,0 +1,52 @@
+"""Unit tests for the per-user revision history."""
+
+import json
+from backend.revision_store import RevisionStore, apply_delta, make_delta
+
+RESUME = "JANE DOE\nSenior Engineer\n- Built Kafka pipelines, 2B events a day.\n- Tuned PostgreSQL.\n"
+
+
+def round_of(i: int) -> tuple[str, str, str]:
+    resume = RESUME + "".join(f"- Answer {n}, added in round {n}.\n" for n in range(i))
+    return json.dumps({"Fit": {"score": i}, "Tailored_Resume": resume}), resume, "Job description"
+
+
+def test_delta_round_trip():
+    """Test a delta rebuilds the new text exactly and stores only what changed."""
+    prior = json.dumps({"Fit": {"score": 5, "rationale": "Strong, Kafka. " * 50}, "Questions": ["a", "b"]})
+    text = prior.replace('"b"', '"b", "c"').replace("score\": 5", "score\": 7")
+    delta = make_delta(prior, text)
+    assert apply_delta(prior, delta) == text
+    assert len(json.dumps(delta)) < len(text) // 4
+    assert apply_delta("", make_delta("", "x")) == "x" and apply_delta("x", make_delta("x", "")) == ""
+
+
+def test_every_revision_rebuilds_from_deltas_and_snapshots(tmp_path):
+    """Test each round is recorded once, deltas between snapshots, and any round reads back intact."""
+    store = RevisionStore(tmp_path / "revisions.db", snapshot_every=4)
+    for i in range(10):
+        assert store.add("alice", *round_of(i)) == i + 1
+    store.add("bob", *round_of(0))
+
+    listed = store.revisions("alice")
+    assert [r["number"] for r in listed] == list(range(1, 11))
+    assert [r["number"] for r in listed if r["snapshot"]] == [1, 5, 9]
+    other_worker = RevisionStore(tmp_path / "revisions.db")  # nothing cached
+    for i in range(10):
+        llm_response, resume, job_description = round_of(i)
+        revision = other_worker.get("alice", i + 1)
+        assert (revision["llm_response"], revision["resume"], revision["job_description"]) == \
+            (llm_response, resume, job_description)
+    assert other_worker.get("alice", 11) is None and other_worker.get("bob", 2) is None
+    assert other_worker.add("alice", *round_of(10)) == 11
+
+
+def test_old_revisions_are_pruned_back_to_a_snapshot(tmp_path):
+    """Test max_revisions drops old rounds but keeps the snapshot the oldest kept round needs."""
+    store = RevisionStore(tmp_path / "revisions.db", snapshot_every=4, max_revisions=5)
+    for i in range(12):
+        store.add("alice", *round_of(i))
+    numbers = [r["number"] for r in store.revisions("alice")]
+    assert numbers == list(range(5, 13))  # round 8 is the 5th newest, rebuilt from snapshot 5
+    assert store.get("alice", 4) is None
+    assert RevisionStore(tmp_path / "revisions.db").get("alice", 8)["resume"] == round_of(7)[1]
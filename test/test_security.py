@@ -0,0 +1,98 @@
+"""Unit tests for cached Google ID token verification."""
+
+import time
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from backend import security
+
+
+class FakeCertsResponse:
+    """Minimal stand-in for google.auth transport responses."""
+    def __init__(self, status=200, max_age=300):
+        self.status = status
+        self.headers = {"Cache-Control": f"public, max-age={max_age}", "Age": "100"}
+        self.data = b'{"key1": "cert1"}'
+
+
+@pytest.fixture
+def fake_google(monkeypatch):
+    """Count cert fetches and token decodes instead of calling Google."""
+    calls = {"certs": 0, "decode": 0}
+    def fake_transport(url, method="GET", timeout=None):
+        calls["certs"] += 1
+        return FakeCertsResponse()
+    def fake_decode(token, certs=None, audience=None):
+        calls["decode"] += 1
+        assert certs == {"key1": "cert1"}
+        return {"iss": "accounts.google.com", "sub": token, "exp": time.time() + 3600}
+    security._google_auth()  # load google.auth so its jwt functions can be replaced
+    monkeypatch.setattr(security, "_transport", fake_transport)
+    monkeypatch.setattr(security.jwt, "decode", fake_decode)
+    monkeypatch.setattr(security.jwt, "decode_header", lambda token: {"kid": "key1"})
+    monkeypatch.setattr(security, "_certs", security._CertCache())
+    monkeypatch.setattr(security, "_verified_claims", security._ClaimsCache(2))
+    return calls
+
+
+def creds(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_claims_cached_per_token(fake_google):
+    """Test repeat requests with the same token skip verification."""
+    assert security.verify_token(creds("a"))["sub"] == "a"
+    assert security.verify_token(creds("a"))["sub"] == "a"
+    assert security.verify_token(creds("b"))["sub"] == "b"
+    assert fake_google == {"certs": 1, "decode": 2}
+
+
+def test_claims_cache_honours_exp_and_size():
+    """Test expired claims are dropped and the cache stays bounded."""
+    cache = security._ClaimsCache(2)
+    cache.put("expired", {"exp": time.time() - 1})
+    assert cache.get("expired") is None
+    for key in ("a", "b", "c"):
+        cache.put(key, {"exp": time.time() + 60})
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+def test_certs_follow_cache_headers_and_survive_outage(fake_google, monkeypatch):
+    """Test certs expire per max-age minus Age, and stale certs are used if refresh fails."""
+    certs = security._certs
+    certs.get()
+    assert 190 <= certs.expires_at - time.time() <= 200
+
+    def failing_transport(url, method="GET", timeout=None):
+        raise TimeoutError("cert endpoint is slow")
+    monkeypatch.setattr(security, "_transport", failing_transport)
+    certs.expires_at = 0
+    assert certs.get() == {"key1": "cert1"}
+    assert certs.expires_at > time.time()
+
+
+def test_wrong_issuer_rejected(fake_google, monkeypatch):
+    """Test tokens from other issuers are rejected and not cached."""
+    monkeypatch.setattr(security.jwt, "decode", lambda token, certs=None, audience=None: {
+        "iss": "evil.example.com", "exp": time.time() + 60})
+    with pytest.raises(HTTPException) as e:
+        security.verify_token(creds("x"))
+    assert e.value.status_code == 401
+    assert security._verified_claims.get(security.hashlib.sha256(b"x").hexdigest()) is None
+
+
+def test_unknown_key_refreshes_at_most_once_per_retry_window(fake_google, monkeypatch):
+    """Test tokens with made-up key ids are rejected without refetching certs on every request."""
+    assert security.verify_token(creds("a"))["sub"] == "a"
+    monkeypatch.setattr(security.jwt, "decode_header", lambda token: {"kid": "made-up"})
+    for token in ("x", "y", "z"):
+        with pytest.raises(HTTPException) as e:
+            security.verify_token(creds(token))
+        assert e.value.status_code == 401 and "unknown key" in e.value.detail
+    assert fake_google == {"certs": 1, "decode": 1}
+
+    security._certs.fetched_at -= security.CERTS_RETRY_AFTER  # a rotated key is picked up later
+    with pytest.raises(HTTPException):
+        security.verify_token(creds("w"))
+    assert fake_google["certs"] == 2
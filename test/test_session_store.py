@@ -0,0 +1,52 @@
+"""Unit tests for the per-user session store."""
+
+import threading
+from backend.session_store import SessionState, SessionStore
+
+
+def test_update_round_trips_through_sqlite(tmp_path):
+    """Test updates persist and are visible to a second store on the same database."""
+    store = SessionStore(tmp_path / "sessions.db")
+    store.update("alice", lambda s: s.record_llm_response('{"Fit": {}}', "revised", "JD"))
+    store.update("alice", lambda s: s.record_llm_response('{"Fit": 2}', "revised 2", "JD"))
+
+    other_worker = SessionStore(tmp_path / "sessions.db")
+    state = other_worker.get("alice")
+    assert state.llm_response_current == '{"Fit": 2}'
+    assert state.llm_response_prior == '{"Fit": {}}'
+    assert state.resume_revised == "revised 2"
+    assert other_worker.get("bob") == SessionState()
+
+
+def test_cache_notices_writes_from_other_workers(tmp_path):
+    """Test a cached session is refreshed when another store bumps its version."""
+    store = SessionStore(tmp_path / "sessions.db")
+    other_worker = SessionStore(tmp_path / "sessions.db")
+    store.update("alice", lambda s: setattr(s, "job_description", "first"))
+    assert store.get("alice").job_description == "first"
+    other_worker.update("alice", lambda s: setattr(s, "job_description", "second"))
+    assert store.get("alice").job_description == "second"
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    """Test read-modify-write updates from many threads all land."""
+    store = SessionStore(tmp_path / "sessions.db")
+
+    def add_answer(i):
+        store.update("alice", lambda s: setattr(
+            s, "qa_pairs", (s.qa_pairs or []) + [{"question": str(i), "answer": "a"}]))
+
+    threads = [threading.Thread(target=add_answer, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store.get("alice").qa_pairs) == 20
+
+
+def test_expired_sessions_are_evicted(tmp_path):
+    """Test sessions past their TTL read as new and are swept from the database."""
+    store = SessionStore(tmp_path / "sessions.db", ttl_seconds=0)
+    store.update("alice", lambda s: setattr(s, "job_description", "JD"))
+    assert store.get("alice").job_description == ""
+    assert store.evict_expired() == 1
@@ -0,0 +1,38 @@
+"""Cold start: the SDKs stay unloaded until a request needs them."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from bench.startup_bench import DEFERRED_MODULES, import_profile, summarize
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_import_report_defers_sdks():
+    """Test importing backend.api loads none of the deferred SDKs and the report lists its imports."""
+    summary = summarize(import_profile("backend.api"))
+    assert summary["total"] > 0 and summary["deferred_loaded"] == []
+    assert "fastapi" in [r["module"] for r in summary["slowest"]]
+
+
+def test_demo_and_static_routes_skip_sdk_init():
+    """Test /health, the splash page and demo reviews answer without building the LLM client."""
+    script = (
+        "import sys\n"
+        "from fastapi.testclient import TestClient\n"
+        "from backend import api\n"
+        "with TestClient(api.app) as c:\n"
+        "    assert c.get('/health').status_code == 200 and c.get('/').status_code == 200\n"
+        "    body = {'job_description': 'x', 'url': 'u', 'demo': True}\n"
+        "    assert c.post('/review', json=body).status_code == 200\n"
+        "    assert c.post('/review/preassess', json=body).status_code == 200\n"
+        "assert api.llm_client is None and api.http_client is None\n"
+        f"print(sorted(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    env = dict(os.environ, SDK_WARM_UP="false", OPENAI_API_KEY="test", TRACE_SAMPLE_RATE="1",
+               TRACE_EXPORTER="none")
+    result = subprocess.run([sys.executable, "-c", script], cwd=BASE_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,34 @@
+"""Unit tests for incremental parsing of streamed LLM output."""
+
+import json
+from pathlib import Path
+from backend.streaming import JSONSectionParser, sse_event
+
+
+BASE_DIR = Path(__file__).resolve().parent
+TEST_OUTPUT_FROM_LLM_CURRENT_FILE = BASE_DIR / "temp_stub" / "test_LLM_response_current.json"
+
+
+def test_sections_complete_in_order():
+    """Test each top-level member is returned as soon as its value closes."""
+    text = TEST_OUTPUT_FROM_LLM_CURRENT_FILE.read_text()
+    expected = json.loads(text)
+    parser = JSONSectionParser()
+    sections = []
+    for i in range(0, len(text), 7):  # feed in small uneven chunks
+        sections.extend(parser.feed(text[i:i + 7]))
+    assert [key for key, _ in sections] == list(expected)
+    assert dict(sections) == expected
+
+
+def test_section_emitted_before_object_closes():
+    """Test Fit is available while Tailored_Resume is still streaming."""
+    parser = JSONSectionParser()
+    done = parser.feed('```json\n{"Fit": {"score": 7, "rationale": "a, {b}"}, "Tailored_Resume": "Jane')
+    assert done == [("Fit", {"score": 7, "rationale": "a, {b}"})]
+    assert parser.feed(' \\"JD\\" Doe"}\n```') == [("Tailored_Resume", 'Jane "JD" Doe')]
+
+
+def test_sse_event_format():
+    """Test events are framed as Server-Sent Events with JSON data."""
+    assert sse_event("Fit", {"score": 1}) == 'event: Fit\ndata: {"score": 1}\n\n'
@@ -0,0 +1,131 @@
+"""Unit tests for sampled, non-blocking tracing."""
+
+import asyncio
+import json
+import random
+import threading
+from backend import tracing
+from backend.tracing import ExportQueue, FileExporter, Sampler, Tracer, shape, traceable
+
+
+@traceable(name="inner", run_type="llm")
+async def inner(prompt: str) -> str:
+    return prompt.upper()
+
+
+@traceable(name="outer")
+async def outer(job_description: str, sub: str, creds=None) -> dict:
+    tracing.set_user(sub)
+    return {"answer": await inner(job_description)}
+
+
+def test_sampled_traces_are_exported_with_shaped_payloads(tmp_path, monkeypatch):
+    """Test a kept trace reaches the file exporter as parent and child spans, large fields cut, creds left out."""
+    exporter = FileExporter(tmp_path / "traces.jsonl")
+    monkeypatch.setattr(tracing, "tracer", Tracer(exporter, Sampler(1.0), max_field_chars=10))
+    assert asyncio.run(outer("x" * 50, "u1", creds="secret")) == {"answer": "X" * 50}
+    assert tracing.tracer.queue.flush()
+
+    spans = [json.loads(line) for line in exporter.path.read_text().splitlines()]
+    child, root = spans  # children end first
+    assert (root["name"], root["parent_id"], child["parent_id"]) == ("outer", None, root["id"])
+    assert child["trace_id"] == root["trace_id"] and child["run_type"] == "llm" and root["user"] == "u1"
+    assert "creds" not in root["inputs"] and root["inputs"]["sub"] == "u1"
+    assert root["inputs"]["job_description"].startswith("x" * 10 + "... [40 more chars, sha256 ")
+    assert tracing.tracer.stats()["exported"] == 1
+
+
+def test_head_sampling_per_endpoint_and_user(tmp_path, monkeypatch):
+    """Test endpoint and user rates decide whole traces, and dropped traces record nothing."""
+    exporter = FileExporter(tmp_path / "traces.jsonl")
+    sampler = Sampler(0.0, endpoints={"outer": 0.0}, users={"debug-me": 1.0}, rng=random.Random(1))
+    monkeypatch.setattr(tracing, "tracer", Tracer(exporter, sampler))
+    for sub in ("u1", "u2", "debug-me"):
+        asyncio.run(outer("jd", sub))
+    assert tracing.tracer.queue.flush()
+    users = {json.loads(line)["user"] for line in exporter.path.read_text().splitlines()}
+    assert users == {"debug-me"}
+    assert tracing.tracer.stats()["sampled"] == 1 and tracing.tracer.stats()["unsampled"] == 2
+
+    assert Sampler(0.5, rng=random.Random(7)).sample("x", None) in (True, False)
+    assert tracing.parse_rates("prompt_LLM=0.05, u=2, bad") == {"prompt_LLM": 0.05, "u": 1.0}
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test submit() returns at once and counts a drop while the exporter is stuck."""
+    release = threading.Event()
+    class StuckExporter:
+        def export(self, spans):
+            release.wait(5)
+    export_queue = ExportQueue(StuckExporter(), max_size=1)
+    results = [export_queue.submit([{"n": i}]) for i in range(4)]
+    assert results.count(False) >= 2 and export_queue.stats()["dropped"] == results.count(False)
+    release.set()
+    assert export_queue.flush()
+
+
+def test_shape_hashes_and_bounds_containers():
+    """Test hash mode replaces long strings by their digest and containers are capped."""
+    hashed = shape({"resume": "r" * 5000}, max_chars=100, mode="hash")
+    assert hashed["resume"]["chars"] == 5000 and len(hashed["resume"]["sha256"]) == 16
+    assert len(shape(list(range(500)))) == 51
+
+
+def test_traced_stream_counts_items(monkeypatch):
+    """Test async generators are traced and keep yielding through the wrapper."""
+    exported = []
+    class ListExporter:
+        def export(self, spans):
+            exported.extend(spans)
+    monkeypatch.setattr(tracing, "tracer", Tracer(ListExporter(), Sampler(1.0)))
+
+    @traceable(name="stream")
+    async def stream(n: int):
+        for i in range(n):
+            yield i
+
+    async def consume():
+        return [i async for i in stream(3)]
+    assert asyncio.run(consume()) == [0, 1, 2]
+    assert tracing.tracer.queue.flush()
+    assert exported[0]["outputs"] == {"items": 3}
+
+
+def test_stream_root_carries_user_and_late_spans_are_ignored(monkeypatch):
+    """Test a traced stream parents the streams it consumes, samples by its user, and spans ending
+    after their root are left out of the exported trace."""
+    exported = []
+    class ListExporter:
+        def export(self, spans):
+            exported.extend(spans)
+    monkeypatch.setattr(tracing, "tracer", Tracer(ListExporter(), Sampler(0.0, users={"u1": 1.0})))
+
+    @traceable(name="llm_stream", run_type="llm")
+    async def llm_stream():
+        for token in ("a", "b"):
+            yield token
+
+    @traceable(name="review_stream")
+    async def review_stream(sub: str):
+        tracing.set_user(sub)
+        async for token in llm_stream():
+            yield token
+
+    async def consume(stream):
+        return [item async for item in stream]
+    assert asyncio.run(consume(review_stream("u1"))) == ["a", "b"]
+    assert asyncio.run(consume(review_stream("u2"))) == ["a", "b"]  # not sampled
+    assert tracing.tracer.queue.flush()
+    child, root = exported
+    assert (child["name"], root["name"], root["user"]) == ("llm_stream", "review_stream", "u1")
+    assert child["parent_id"] == root["id"]
+
+    exported.clear()
+    t = tracing.tracer
+    trace, root_id, _, token = t.start("root")
+    tracing.set_user("u1")
+    late = t.start("late", activate=False)
+    t.end(trace, root_id, None, token, "root", "chain", 0.0, dict, lambda: None, None)
+    t.end(*late, "late", "chain", 0.0, dict, lambda: None, None)
+    assert t.queue.flush()
+    assert [span["name"] for span in exported] == ["root"]